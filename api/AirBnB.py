@@ -1,29 +1,550 @@
+import dataclasses
+import functools
+import hashlib
+import threading
+import numpy as np
 import pandas as pd
 # import streamlit as st
+from .exceptions import AirBnBError, DataFrameError, FileProcessingError
+from .instrument import instrumented, stage
+from .engine import (
+  Summary, basic_earnings, customer_stats, listing_stats, merge_summaries,
+  performance_stats, summarize
+)
+from .binning import Histogram, bin_counts
+from .bundle import ReportBundle, write_bundle
+from .guests import GuestIndex
+from .leadtime import LeadTime, lead_time_breakdown, lead_times
+from .compact import compact_frame, memory_usage, row_keys
+from .currency import FxRates, convert_money, currencies, load_fx_rates
+from .forecast import DEFAULT_HORIZON, ForecastModel, fit_forecast, project
+from .result_cache import get_result_cache
+from .reconcile import DEFAULT_TOLERANCE, Reconciliation, adjustment_total, reconcile, split_transactions
+from .schema import concat_chunks
+from .occupancy import OccupancyGrid
+from .timeseries import CalendarIndex, rollup
 
-class AirBnBError(Exception):
-    """Base exception class for AirBnB related errors"""
-    pass
 
-class DataFrameError(AirBnBError):
-    """Exception raised for errors in DataFrame operations"""
-    pass
+def _freeze(result):
+  """
+  Make the arrays of a result read-only, recursing into dataclasses and the analysis
+  objects of this package, since cached results are shared across reports and threads.
+  """
+  if isinstance(result, np.ndarray):
+    result.setflags(write=False)
+  elif dataclasses.is_dataclass(result) and not isinstance(result, type):
+    for field in dataclasses.fields(result):
+      _freeze(getattr(result, field.name))
+  elif type(result).__module__.startswith(f'{__package__}.') and hasattr(result, '__dict__'):
+    for value in vars(result).values():
+      _freeze(value)
+  return result
 
-class FileProcessingError(AirBnBError):
-    """Exception raised for errors during file processing"""
-    pass
+
+def _copy_result(result):
+  """Hand out copies of cached containers so callers can't modify the cache."""
+  if isinstance(result, (pd.DataFrame, pd.Series)):
+    return result.copy()
+  if isinstance(result, (dict, list)):
+    return type(result)(result)
+  if dataclasses.is_dataclass(result) and not isinstance(result, type):
+    # Arrays are read-only already (see `_freeze`); frames are copied lazily under
+    # copy-on-write and dicts and lists outright
+    copies = {}
+    for field in dataclasses.fields(result):
+      value = getattr(result, field.name)
+      if isinstance(value, (pd.DataFrame, pd.Series)):
+        copies[field.name] = value.copy(deep=False)
+      elif isinstance(value, (dict, list)):
+        copies[field.name] = type(value)(value)
+    return dataclasses.replace(result, **copies) if copies else result
+  return result
+
+
+def memoized(method):
+  """
+  Cache a getter's result on the instance, keyed by its name and arguments.
+
+  The cache is dropped whenever `df` or `filtered_df` is reassigned. Calls with
+  unhashable arguments bypass the cache.
+  """
+  @functools.wraps(method)
+  def wrapper(self, *args, **kwargs):
+    key = (method.__name__, args, tuple(sorted(kwargs.items())))
+    try:
+      hash(key)
+    except TypeError:
+      return method(self, *args, **kwargs)
+    return _copy_result(self._memo(key, lambda: method(self, *args, **kwargs)))
+  return wrapper
+
+
+def synchronized(method):
+  """
+  Run a method under the instance's lock, so lazily built state is built once even when
+  a background job and the page read the report at the same time.
+  """
+  @functools.wraps(method)
+  def wrapper(self, *args, **kwargs):
+    with self._lock:
+      return method(self, *args, **kwargs)
+  return wrapper
+
+
+def _active_rows(result, self, *args, **kwargs) -> int | None:
+  """Rows a getter ran over, for `instrumented`."""
+  if self._filtered_df is not None:
+    return len(self._filtered_df)
+  return self.length
+
+
+def _chain_keys(previous: str | None, key: str | None) -> str | None:
+  """Content key of a report after appending the export with content key `key`."""
+  if previous is None or key is None:
+    return None
+  return hashlib.sha256(f'{previous}+{key}'.encode()).hexdigest()
+
+
+# Results `save` writes into a bundle, by name, with the memoization key they are read
+# back under. The rest are recomputed from the bundled frames on first use.
+BUNDLED_RESULTS = {
+  'basic_earnings': ('get_basic_earnings', (), ()),
+  'performance_stats': ('get_performance_stats', (), ()),
+  'listing_stats': ('get_listing_stats', (), ()),
+  'customer_stats': ('customer_stats', None),
+  'lead_times': ('get_lead_times', (), ()),
+  'lead_time_by_listing': ('get_lead_time_breakdown', (), (('by', 'listing'),)),
+  'lead_time_by_month': ('get_lead_time_breakdown', (), (('by', 'month'),)),
+}
+_BUNDLED_NAMES = {key: name for name, key in BUNDLED_RESULTS.items()}
 
 
 class AirBnB:
-  def __init__(self, df: pd.DataFrame):
+  def __init__(self, df: pd.DataFrame, compact: bool = False, content_key: str | None = None):
+    """
+    Args:
+      df: earnings DataFrame. Reservations feed every analysis; payouts and adjustments
+        are kept in `ledger` for payout reconciliation
+      compact: keep the data in the smaller layout of `api.compact.compact_frame`, meant
+        for reports held in memory for a long time such as per-session app state
+      content_key: Optional content hash of the export behind `df` (see
+        `api.disk_cache.content_key`). Reports with the same key share their results
+        through the process-wide `api.result_cache`.
+    """
     if not isinstance(df, pd.DataFrame):
       raise TypeError("Input must be a pandas DataFrame")
     
+    self.compact = compact
+    # Guards the lazily built frames and aggregates and the memoized results; reentrant
+    # because they build on each other
+    self._lock = threading.RLock()
+    self._cache = {}
+    self._cache_hits = 0
+    self._cache_misses = 0
+    self.version = 0
+    self._filtered_df = None
+    self._filter_source = None
+    self._custom_filter = False
+    self.date_range = (None, None)
+    self.currency = None
+    self.fx_rates = None
+    self._views = {}
     self.df = df if len(df) > 0 else None
-    self.filtered_df = None
-    self.length = len(df) if len(df) > 0 else None
-    self.columns = df.columns if len(df) > 0 else None
+    self.content_key = content_key if self.df is not None else None
+
+  @property
+  @synchronized
+  def df(self) -> pd.DataFrame | None:
+    # Reports opened with `load` read their rows from the bundle once they are needed
+    if 'reservations' in self._unread:
+      self._df = self._read_frame('reservations')
+    # Batches added through `append` are only concatenated once the rows are needed
+    if self._pending:
+      self._df = concat_chunks([self._df, *self._pending])
+      self._pending = []
+    return self._df
+
+  @df.setter
+  @synchronized
+  def df(self, df: pd.DataFrame | None):
+    if df is not None and self.compact:
+      df = compact_frame(df)
+    ledger = None
+    if df is not None:
+      df, ledger = split_transactions(df)
+      if len(df) == 0:
+        df = None
+    self._df = df
+    self._ledger = ledger
+    self._bundle = None
+    self._unread = set()
+    # Whoever assigns new data vouches for its key
+    self.content_key = None
+    self._pending = []
+    self._pending_ledger = []
+    self._seen_keys = None
+    self._calendar = None
+    self._converted = {}
+    self.length = len(df) if df is not None else None
+    self.columns = df.columns if df is not None else None
+    self._invalidate()
+
+  def consolidate(self):
+    """
+    Concatenate batches added through `append` now rather than on first use, e.g.
+    before handing the report to another thread.
+    """
+    self.df
+    self.ledger
+
+  def _read_frame(self, name: str) -> pd.DataFrame | None:
+    self._unread.discard(name)
+    with stage(f'bundle {name}', rows=self.length):
+      return self._bundle.frame(name)
+
+  @property
+  @synchronized
+  def ledger(self) -> pd.DataFrame | None:
+    """Every transaction, reservations included, or None when the data lacks the ledger columns."""
+    if 'ledger' in self._unread:
+      self._ledger = self._read_frame('ledger')
+    if self._pending_ledger:
+      self._ledger = concat_chunks([self._ledger, *self._pending_ledger])
+      self._pending_ledger = []
+    return self._ledger
+
+  @property
+  def filtered_df(self) -> pd.DataFrame | None:
+    return self._filtered_df
+
+  @filtered_df.setter
+  @synchronized
+  def filtered_df(self, filtered_df: pd.DataFrame | None):
+    self._filter_source = filtered_df
+    self._filtered_df = self._to_currency(filtered_df)
+    # Only filters applied through `set_date_range` can be described in a shared result key
+    self._custom_filter = filtered_df is not None
+    self._invalidate()
+
+  @property
+  def active_df(self) -> pd.DataFrame | None:
+    """
+    `filtered_df` when a filter is applied, otherwise `df`, in the reporting currency.
+    All getters read from it.
+    """
+    if self._filtered_df is not None:
+      return self._filtered_df
+    return self._reporting('reservations', self.df)
+
+  @property
+  def currencies(self) -> list[str]:
+    """Currencies of the transactions as exported, most frequent first."""
+    return currencies(self.ledger if self.ledger is not None else self.df)
+
+  def _to_currency(self, df: pd.DataFrame | None) -> pd.DataFrame | None:
+    if df is None or self.currency is None:
+      return df
+    return convert_money(df, self.fx_rates, self.currency)
+
+  @synchronized
+  def _reporting(self, name: str, df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """`df` in the reporting currency, converted once per currency and version of the data."""
+    if df is None or self.currency is None:
+      return df
+    key = (name, self.currency)
+    if key not in self._converted:
+      with stage('convert', rows=len(df)):
+        self._converted[key] = convert_money(df, self.fx_rates, self.currency)
+    return self._converted[key]
+
+  def _view(self) -> str | None:
+    """Currency results are computed in, None when the data needs no conversion to it."""
+    if self.currency is None:
+      return None
+    frames = [('reservations', self.df), ('ledger', self.ledger)]
+    if all(self._reporting(name, df) is df for name, df in frames):
+      return None
+    return self.currency
+
+  @synchronized
+  def set_currency(self, currency: str | None = None, fx_rates: FxRates | None = None):
+    """
+    Report every money column in `currency`, converting transactions in other currencies
+    at the rates in force on their `Date` (see `api.currency`). Passing None reports
+    amounts as exported, summed across currencies. Payout reconciliation always stays in
+    the exported currencies.
+
+    Converted columns and the results of each currency are kept until the data changes,
+    so switching back to a currency recomputes nothing.
+
+    Args:
+      currency: Optional reporting currency code, e.g. 'PHP'
+      fx_rates: Optional exchange rates, defaults to `api.currency.load_fx_rates()`
+
+    Raises:
+      DataFrameError: a currency of the data has no rates
+      FileProcessingError: the default rate table can't be read
+    """
+    currency = currency.upper() if currency else None
+    if fx_rates is not None and fx_rates is not self.fx_rates:
+      # Results of every converting currency used the old rates
+      self._views.clear()
+      if self._view() is not None:
+        self._invalidate()
+      self.fx_rates = fx_rates
+      self._converted = {}
+    elif currency == self.currency:
+      return
+    if currency is not None and self.fx_rates is None:
+      self.fx_rates = load_fx_rates()
+
+    previous_view, previous_currency = self._view(), self.currency
+    self.currency = currency
+    try:
+      view = self._view()
+      filtered_df = self._filtered_df
+      if self._custom_filter:
+        filtered_df = self._to_currency(self._filter_source)
+      elif filtered_df is not None:
+        filtered_df = self.calendar.slice(self._reporting('reservations', self.df), *self.date_range)
+    except Exception:
+      self.currency = previous_currency
+      raise
+    self._filtered_df = filtered_df
+    if view != previous_view:
+      self._views[previous_view] = (self._cache, self._summary)
+      self._cache, self._summary = self._views.pop(view, ({}, None))
+
+  @property
+  @synchronized
+  def calendar(self) -> CalendarIndex:
+    """Reservations sorted by `Start date`, built once per version of `df`."""
+    if self.length is None:
+      raise DataFrameError("No data available")
+    if self._calendar is None:
+      self._calendar = CalendarIndex(self.df)
+    return self._calendar
+
+  @synchronized
+  def set_date_range(self, start=None, end=None):
+    """
+    Restrict every getter to reservations starting within [start, end] (inclusive).
+
+    The range is resolved with binary searches on `calendar`. Passing no bounds clears
+    the filter, and re-applying the current range is a no-op so cached results survive.
+
+    Args:
+      start: Optional first `Start date` to include
+      end: Optional last `Start date` to include
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if (start, end) == self.date_range:
+      return
+
+    self.date_range = (start, end)
+    if start is None and end is None:
+      self.filtered_df = None
+    else:
+      self.filtered_df = self.calendar.slice(self._reporting('reservations', self.df), start, end)
+      self._custom_filter = False
+
+  @synchronized
+  def _invalidate(self):
+    """Drop every memoized result after the underlying data changed."""
+    self._summary = None
+    # A new dict rather than clearing it, so computations still running on other threads
+    # store their stale results in the old one
+    self._cache = {}
+    self._views.clear()
+    self.version += 1
+
+  def _result_scope(self) -> tuple | None:
+    """What `active_df` holds, in terms other reports can match; None when it can't be told."""
+    if self.content_key is None or self._custom_filter:
+      return None
+    view = self._view()
+    currency = (view, self.fx_rates.key) if view is not None else None
+    return (self.content_key, self.compact, self.date_range, currency)
+
+  def _memo(self, key: tuple, compute):
+    """
+    Return the cached result under `key`, computing and storing it on a miss. Misses go
+    through the process-wide result cache when the report's content is known, so
+    reports of the same exports compute each result once.
+
+    Only lookups and stores hold the report's lock, so a long computation on one thread
+    doesn't hold up cached results on another; when two threads miss the same key, the
+    first stored result wins.
+    """
+    with self._lock:
+      cache = self._cache
+      try:
+        result = cache[key]
+        self._cache_hits += 1
+        return result
+      except KeyError:
+        self._cache_misses += 1
+        if self._bundle is not None and self._filtered_df is None and self._view() is None:
+          compute = functools.partial(self._bundled_result, key, compute)
+        scope = self._result_scope()
+    if scope is None:
+      result = _freeze(compute())
+    else:
+      result = get_result_cache().get_or_compute((scope, key), lambda: _freeze(compute()))
+    with self._lock:
+      # Results of data that changed meanwhile went to a cache that was dropped
+      return cache.setdefault(key, result)
+
+  def _bundled_result(self, key: tuple, compute):
+    """Result saved under `key` in the bundle the report was loaded from, else `compute()`."""
+    name = _BUNDLED_NAMES.get(key)
+    if name is None and key[0] == 'customer_stats' and key[1] is not None:
+      # Guests are ranked with a stable order, so a shorter ranking is a prefix of the full one
+      full = _BUNDLED_NAMES[('customer_stats', None)]
+      if full in self._bundle.results:
+        return self._bundle.result(full).head(key[1])
+    if name is None or name not in self._bundle.results:
+      return compute()
+    with stage('bundle', rows=self.length):
+      return self._bundle.result(name)
+
+  def cache_info(self) -> dict:
+    """
+    Returns:
+      dict: memoization hits, misses, number of cached results and the data version
+    """
+    return {
+      'hits': self._cache_hits,
+      'misses': self._cache_misses,
+      'size': len(self._cache),
+      'version': self.version
+    }
+
+  def memory_usage(self) -> pd.DataFrame:
+    """
+    Report how much memory the data held by this report takes.
+
+    Returns:
+      DataFrame indexed by column (and 'Index') with its dtype and deep size in bytes,
+      empty when there is no data
+    """
+    if self.length is None:
+      return pd.DataFrame({'dtype': pd.Series(dtype=str), 'bytes': pd.Series(dtype='int64')})
+    return memory_usage(self.df)
+
+  @synchronized
+  def append(self, new_df: pd.DataFrame, content_key: str | None = None) -> int:
+    """
+    Add a new batch of transactions (e.g. the latest monthly export) and update the
+    running aggregates without recomputing them over the full history.
+
+    Rows whose `Confirmation code` and `Reference code` were already seen, either in
+    earlier data or earlier in the same batch, are skipped. Any `filtered_df` is cleared
+    since it no longer reflects the data.
+
+    Args:
+      new_df: earnings DataFrame with the same layout as the initial data
+      content_key: Optional content hash of the export behind `new_df`, see `__init__`
+
+    Returns:
+      int: number of rows actually added, of any type
+
+    Raises:
+      TypeError: input is not a DataFrame
+    """
+    if not isinstance(new_df, pd.DataFrame):
+      raise TypeError("Input must be a pandas DataFrame")
+    if self.compact:
+      new_df = compact_frame(new_df)
+    if self._bundle is not None:
+      # Bundled results no longer describe the data
+      self.consolidate()
+      self._bundle = None
+    has_data = self._df is not None or self._ledger is not None
+    next_key = _chain_keys(self.content_key if has_data else '', content_key)
+
+    # Rows are identified by the hash of their `Confirmation code` and `Reference code`
+    # (`KEY_COLUMNS`), or the `ROW_KEY_COLUMN` compact frames keep instead
+    if self._seen_keys is None and (self._df is not None or self._ledger is not None):
+      # The ledger holds every transaction, so payouts are de-duplicated as well
+      known = self.ledger if self._ledger is not None else self._df
+      self._seen_keys = row_keys(known)
+
+    new_keys = row_keys(new_df)
+    if new_keys is not None:
+      seen = self._seen_keys if self._seen_keys is not None else new_keys[:0]
+      # Hash-based lookups; np.isin would sort both sides
+      candidates = pd.Index(new_keys)
+      keep = ~candidates.duplicated() & ~candidates.isin(seen)
+      self._seen_keys = np.concatenate([seen, new_keys[keep]])
+      if not keep.all():
+        new_df = new_df[keep]
+
+    if len(new_df) == 0:
+      return 0
+    self._converted = {}
+
+    if self._df is None and self._ledger is None:
+      seen_keys = self._seen_keys
+      self.df = new_df
+      self._seen_keys = seen_keys
+      self.content_key = next_key
+      return len(new_df)
+
+    added = len(new_df)
+    self.content_key = next_key
+    new_df, new_ledger = split_transactions(new_df)
+    if new_ledger is not None:
+      self._pending_ledger.append(new_ledger)
+    if len(new_df) == 0:
+      self._invalidate()
+      return added
+    if self._df is None:
+      self._df = new_df
+      self.length = len(new_df)
+      self.columns = new_df.columns
+      self._calendar = None
+      self._filtered_df = None
+      self._custom_filter = False
+      self.date_range = (None, None)
+      self._invalidate()
+      return added
+
+    # Only fold the batch into aggregates of the full data that already exist; otherwise
+    # they are built lazily over the combined rows on first use
+    summary = None
+    if self._summary is not None and self._filtered_df is None and self.currency is None:
+      summary = merge_summaries(self._summary, summarize(new_df))
+    self._pending.append(new_df)
+    self.length += len(new_df)
+    self._calendar = None
+    self._filtered_df = None
+    self._custom_filter = False
+    self.date_range = (None, None)
+    self._invalidate()
+    self._summary = summary
+    return added
+
+  @property
+  @synchronized
+  def summary(self) -> Summary:
+    """
+    Partial aggregates behind every summary getter, computed in a single pass over
+    `active_df` the first time any of them is requested.
+
+    Raises:
+      DataFrameError: no data available
+    """
+    if self.length is None:
+      raise DataFrameError("No data available")
+    if self._summary is None:
+      with stage('summarize', rows=len(self.active_df)):
+        self._summary = summarize(self.active_df)
+    return self._summary
   
+  @instrumented(rows=_active_rows)
+  @memoized
   def get_basic_earnings(self) -> dict:
     """
     Calculate basic earnings statistics from the AirBnB dataset
@@ -36,32 +557,14 @@ class AirBnB:
     """
 
     try:
-      if self.df is None:
-         raise DataFrameError("No data available")
-      
-      required_columns = ['Gross earnings', 'Service fee', 'Occupancy taxes']
-      missing_columns = [col for col in required_columns if col not in self.df.columns]
-
-      if missing_columns:
-        raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
-
-      df = self.df
-      gross_earnings = df['Gross earnings'].sum()
-      adjustments = 0 # columns to be decided
-      service_fees = df['Service fee'].sum()
-      tax_withheld = df['Occupancy taxes'].sum()
-      total = gross_earnings + adjustments - service_fees - tax_withheld
-
-      return {
-        'gross_earnings': gross_earnings,
-        'adjustments': adjustments,
-        'service_fees': service_fees,
-        'tax_withheld': tax_withheld,
-        'total': total
-      }
+      ledger = self._reporting('ledger', self.ledger)
+      adjustments = adjustment_total(ledger, *self.date_range) if ledger is not None else 0.0
+      return basic_earnings(self.summary, adjustments=adjustments)
     except Exception as e:
       raise DataFrameError(f"An error occurred while processing: {e}")
   
+  @instrumented(rows=_active_rows)
+  @memoized
   def get_performance_stats(self) -> dict[str, float]:
     """
     Calculate simple performance statistics from the DataFrame.
@@ -74,22 +577,12 @@ class AirBnB:
     """
 
     try:
-      if self.df is None:
-        raise DataFrameError("NO data available")
-      
-      if 'Nights' not in self.df.columns:
-        raise DataFrameError("Missing required column: Nights")
-      
-      df = self.df
-      total_nights = df['Nights'].sum()
-      average_nights = df['Nights'].mean()
-      return {
-        'total_nights': total_nights,
-        'average_nights': average_nights
-      }
+      return performance_stats(self.summary)
     except Exception as e:
       raise DataFrameError(f"Error calculating performance stats: {str(e)}")
   
+  @instrumented(rows=_active_rows)
+  @memoized
   def get_listing_stats(self) -> pd.DataFrame:
     """
     Calculate listing statistics from the DataFrame.
@@ -102,38 +595,18 @@ class AirBnB:
     """
 
     try:
-      if self.df is None:
-        raise DataFrameError("No data available")
-
-      required_columns = ['Listing', 'Nights', 'Amount', 'Paid out',
-      'Service fee', 'Fast pay fee', 'Cleaning fee',
-      'Occupancy taxes', 'Guest']
-      missing_columns = [col for col in required_columns if col not in self.df.columns]
-      
-      if missing_columns:
-          raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
-
-      units_df = self.df[['Listing', 'Nights', 'Amount', 'Paid out',
-        'Service fee', 'Fast pay fee', 'Cleaning fee',
-        'Occupancy taxes', 'Guest']].groupby(by="Listing").agg({
-        'Nights': ['sum', 'mean', 'max'],
-        'Amount': ['sum', 'mean', 'max'],
-        'Paid out': ['sum'],
-        'Service fee': ['sum'],
-        'Fast pay fee': ['sum'],
-        'Cleaning fee': ['sum'],
-        'Occupancy taxes': ['sum'],
-        'Guest': ['nunique', 'count']
-      })
-      units_df.columns = [x[0] + '_' + x[1] for x in units_df.columns]
-      return units_df
+      return listing_stats(self.summary)
     except Exception as e:
       raise DataFrameError(f"Error calculating listing stats: {str(e)}")
   
-  def get_customer_stats(self, top_customers = int | None) -> pd.DataFrame:
+  @instrumented(rows=_active_rows)
+  def get_customer_stats(self, top_customers: int | None = None) -> pd.DataFrame:
     """
     Calculate customer statistics from the DataFrame.
 
+    Only the requested number of guests is ranked, with a partial sort; each limit is
+    memoized separately.
+
     Args:
       top_customers: Optional limit for number of top customers to return
     
@@ -145,46 +618,382 @@ class AirBnB:
     """
 
     try:
-      if self.df is None:
-        raise DataFrameError("No data available")
-      
-      required_columns = ['Guest', 'Gross earnings', 'Confirmation code', 'Nights']
-      missing_columns = [col for col in required_columns if col not in self.df.columns]
-      
-      if missing_columns:
-          raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
-
       # customer_df = self.filtered_df if self.filtered_df is not None else self.df
-      df = self.df
-      repeat_counts = df['Guest'].value_counts()
-      repeat_counts = repeat_counts[repeat_counts > 1].index
-      customers_df = df[df['Guest'].isin(repeat_counts)]
-      customers_df = customers_df.groupby('Guest').agg({
-        'Gross earnings': ['sum', 'mean'],
-        'Confirmation code': 'count',
-        'Nights': 'sum'
-      })
-
-      customers_df.columns = ['Total Gross Earnings', 'Average Earnings per Booking',
-      'Bookings Executed', 'Total Nights']
-      customers_df = customers_df.sort_values(by="Total Gross Earnings", axis=0, ascending=False)
-      # customers_df.sort_values(by="Total Gross Earnings", axis=1, inplace=True)
-
-      if top_customers and isinstance(top_customers, int):
-        customers_df = customers_df.head(top_customers)
-
-      return customers_df
+      top = top_customers if top_customers and isinstance(top_customers, int) else None
+      customers_df = self._memo(('customer_stats', top), lambda: customer_stats(self.summary, top=top))
+
+      return customers_df.copy()
     except Exception as e:
       raise DataFrameError(f"Error calculating customer stats: {str(e)}")
 
-  def get_booking_stats(self) -> pd.DataFrame:
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_time_series(self, freq: str = 'month', by_listing: bool = False) -> pd.DataFrame:
+    """
+    Calculate bookings, earnings, booked nights and occupancy over time.
+
+    Args:
+      freq: bucket size, one of 'day', 'week', 'month' or 'year' (Earnings year)
+      by_listing: split each bucket per listing
+
+    Returns:
+      DataFrame indexed by period (and listing)
+
+    Raises:
+      DataFrameError
+    """
+
     try:
-      df = self.df
-      time_diff = df['Start date'] - df['Booking date']
-      df['booking_to_date'] = time_diff / pd.Timedelta('1 days')
-      return df
+      if self.length is None:
+        raise DataFrameError("No data available")
+      return rollup(self.active_df, freq=freq, by_listing=by_listing)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating time series: {str(e)}")
+
+  @property
+  def occupancy(self) -> OccupancyGrid:
+    """
+    Nightly occupancy grid, built on first use. It covers every reservation rather than
+    those starting within `date_range`, so stays that began before a window still count
+    towards it; custom `filtered_df` rows are used as they are.
+    """
+    if self.length is None:
+      raise DataFrameError("No data available")
+    if self._custom_filter:
+      return self._memo(('occupancy',), lambda: OccupancyGrid(self.active_df))
+    return self._memo(('occupancy',), lambda: OccupancyGrid(self._reporting('reservations', self.df)))
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_occupancy_stats(self, start=None, end=None) -> pd.DataFrame:
+    """
+    Calculate occupancy rate, ADR and RevPAR per listing over a window of nights.
+
+    Args:
+      start: Optional first night of the window, defaults to the start of `date_range`
+      end: Optional last night of the window (inclusive), defaults to the end of `date_range`
+
+    Returns:
+      DataFrame indexed by listing
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      start = start if start is not None else self.date_range[0]
+      end = end if end is not None else self.date_range[1]
+      return self.occupancy.stats(start, end)
     except Exception as e:
-      raise DataFrameError(f"Error calculating booking stats: {str(e)}")
+      raise DataFrameError(f"Error calculating occupancy stats: {str(e)}")
+
+  @property
+  def guests(self) -> GuestIndex:
+    """Bookings of `active_df` grouped by guest, built on first use."""
+    if self.length is None:
+      raise DataFrameError("No data available")
+    return self._memo(('guest_index',), lambda: GuestIndex(self.active_df))
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_guest_stats(self, top: int | None = None, as_of=None, inactive_days: int = 365) -> pd.DataFrame:
+    """
+    Calculate bookings, first and last stay, lifetime value, days between stays and
+    churn for every guest.
+
+    Args:
+      top: Optional number of guests of the highest lifetime values to return, highest
+        first, ranked with a partial sort
+      as_of: Optional reference date for churn, defaults to the latest stay
+      inactive_days: days without a stay after which a guest counts as churned
+
+    Returns:
+      DataFrame indexed by guest
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return self.guests.guest_table(as_of=as_of, inactive_days=inactive_days, top=top)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating guest stats: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_retention(self, as_of=None, inactive_days: int = 365) -> dict:
+    """
+    Calculate repeat and churn rates and the median days between repeat stays.
+
+    Args:
+      as_of: Optional reference date for churn, defaults to the latest stay
+      inactive_days: days without a stay after which a guest counts as churned
+
+    Returns:
+      dict
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return self.guests.churn(as_of=as_of, inactive_days=inactive_days)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating retention: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_cohorts(self, normalize: bool = False) -> pd.DataFrame:
+    """
+    Calculate how many guests of each first-stay month book again in later months.
+
+    Args:
+      normalize: report shares of each cohort instead of guest counts
+
+    Returns:
+      DataFrame indexed by cohort month, one column per month since the first stay
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return self.guests.cohorts(normalize=normalize)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating cohorts: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_histogram(self, column: str, edges: tuple, labels: tuple | None = None, right: bool = False, include_lowest: bool = False) -> Histogram:
+    """
+    Count the values of a column per bin, see `api.binning.bin_counts`.
+
+    Args:
+      column: numeric column of `active_df`
+      edges: bin edges; pass a tuple so the result is cached
+      labels: Optional name of each bin
+      right: bins are closed on the right instead of the left
+      include_lowest: with `right`, also count values equal to the first edge
+
+    Returns:
+      Histogram
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      if self.length is None:
+        raise DataFrameError("No data available")
+      return bin_counts(self.active_df[column], edges, labels=labels, right=right, include_lowest=include_lowest)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating histogram: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_lead_times(self) -> LeadTime:
+    """
+    Calculate the days between booking and arrival of every reservation.
+
+    Returns:
+      LeadTime with a read-only array aligned with `active_df`, summary stats and quantiles
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      if self.length is None:
+        raise DataFrameError("No data available")
+      return lead_times(self.active_df)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating lead times: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_lead_time_histogram(self, edges: tuple, labels: tuple | None = None, right: bool = False, include_lowest: bool = False) -> Histogram:
+    """
+    Count the lead times of `get_lead_times` per bin, see `api.binning.bin_counts`.
+
+    Args:
+      edges: bin edges in days; pass a tuple so the result is cached
+      labels: Optional name of each bin
+      right: bins are closed on the right instead of the left
+      include_lowest: with `right`, also count values equal to the first edge
+
+    Returns:
+      Histogram
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return bin_counts(self.get_lead_times().days, edges, labels=labels, right=right, include_lowest=include_lowest)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating lead time histogram: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_lead_time_breakdown(self, by: str = 'listing') -> pd.DataFrame:
+    """
+    Calculate lead time statistics per listing or per month of arrival.
+
+    Args:
+      by: one of 'listing' or 'month'
+
+    Returns:
+      DataFrame indexed by Listing or Month
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return lead_time_breakdown(self.active_df, by=by, days=self.get_lead_times().days)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating lead time breakdown: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  def forecast_model(self, as_of=None, max_workers: int | None = None) -> ForecastModel:
+    """
+    Seasonal baselines and booking pace curves of every listing in `active_df`, see
+    `api.forecast.fit_forecast`. Fitted once per version of the data and `as_of`.
+
+    Raises:
+      DataFrameError: no data available or required columns missing
+    """
+    if self.length is None:
+      raise DataFrameError("No data available")
+
+    try:
+      as_of = pd.Timestamp(as_of).normalize() if as_of is not None else None
+      return self._memo(('forecast_model', as_of), lambda: fit_forecast(self.active_df, as_of=as_of, max_workers=max_workers))
+    except Exception as e:
+      raise DataFrameError(f"Error fitting forecast model: {str(e)}")
+
+  @instrumented(rows=_active_rows)
+  @memoized
+  def get_forecast(self, horizon: int = DEFAULT_HORIZON, by_listing: bool = False, as_of=None) -> pd.DataFrame:
+    """
+    Project nights, earnings and occupancy for the coming months from what is already
+    booked, each listing's seasonality and how far ahead its stays are usually booked.
+
+    Args:
+      horizon: number of months to project, starting with the month of `as_of`
+      by_listing: split every month per listing
+      as_of: Optional day to forecast from, defaults to the latest `Booking date`
+
+    Returns:
+      DataFrame indexed by Month (and Listing), see `api.forecast.project`
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      return project(self.forecast_model(as_of), self.active_df, horizon=horizon, by_listing=by_listing)
+    except Exception as e:
+      raise DataFrameError(f"Error calculating forecast: {str(e)}")
+
+  @instrumented(rows=lambda result, self, *args, **kwargs: len(self.ledger))
+  @memoized
+  def get_reconciliation(self, tolerance: float = DEFAULT_TOLERANCE) -> Reconciliation:
+    """
+    Match every payout to the reservations and adjustments it settles, see
+    `api.reconcile.reconcile`. Always covers the whole ledger in its exported currencies,
+    whatever the date range and reporting currency.
+
+    Args:
+      tolerance: largest difference between paid out and expected money counted as a match
+
+    Returns:
+      Reconciliation with settled items, settlements and unmatched money
+
+    Raises:
+      DataFrameError
+    """
+
+    try:
+      if self.ledger is None:
+        raise DataFrameError("No transactions available")
+      return reconcile(self.ledger, tolerance=tolerance)
+    except Exception as e:
+      raise DataFrameError(f"Error reconciling payouts: {str(e)}")
+
+  def save(self, path: str):
+    """
+    Write the data and the results in `BUNDLED_RESULTS` to a bundle file (see
+    `api.bundle`) that `load` opens again without recomputing them.
+
+    Results are computed first if needed. They cover the whole report as exported, so no
+    date range, other filter or converting reporting currency may be applied; results
+    that can't be computed are left out.
+
+    Args:
+      path: destination file, conventionally ending in `api.bundle.BUNDLE_SUFFIX`
+
+    Requires pyarrow (the `arrow` extra).
+
+    Raises:
+      DataFrameError: no data available, a filter is applied or amounts are converted
+      FileProcessingError: pyarrow is not installed
+    """
+    if self.length is None:
+      raise DataFrameError("No data available")
+    if self._filtered_df is not None:
+      raise DataFrameError("Clear the date range before saving; bundles hold results over the whole report")
+    if self._view() is not None:
+      raise DataFrameError("Reset the reporting currency before saving; bundles hold results as exported")
+
+    getters = {
+      'basic_earnings': self.get_basic_earnings,
+      'performance_stats': self.get_performance_stats,
+      'listing_stats': self.get_listing_stats,
+      'customer_stats': self.get_customer_stats,
+      'lead_times': self.get_lead_times,
+      'lead_time_by_listing': lambda: self.get_lead_time_breakdown(by='listing'),
+      'lead_time_by_month': lambda: self.get_lead_time_breakdown(by='month'),
+    }
+    results = {}
+    for name, getter in getters.items():
+      try:
+        results[name] = getter()
+      except DataFrameError:
+        pass
+
+    meta = {
+      'length': self.length,
+      'columns': [str(col) for col in self.columns],
+      'compact': self.compact,
+      'content_key': self.content_key,
+    }
+    with stage('save', rows=self.length):
+      write_bundle(path, meta, {'reservations': self.df, 'ledger': self.ledger}, results)
+
+  @classmethod
+  def load(cls, path: str) -> 'AirBnB':
+    """
+    Open a bundle written by `save`.
+
+    Only the bundle's footer is read here. Saved results and frames are read from the
+    memory-mapped file the first time they are needed, and results that were not saved,
+    or that cover another date range, are computed from the frames as usual.
+
+    Requires pyarrow (the `arrow` extra).
+
+    Raises:
+      FileProcessingError: missing file, not a bundle, written by a newer version, or
+        pyarrow is not installed
+    """
+    bundle = ReportBundle(path)
+    bnb = cls(pd.DataFrame(), compact=bundle.meta['compact'])
+    bnb._bundle = bundle
+    bnb._unread = {'reservations', 'ledger'}
+    bnb.length = bundle.meta['length']
+    bnb.columns = pd.Index(bundle.meta['columns'])
+    bnb.content_key = bundle.meta['content_key']
+    return bnb
 
   # @staticmethod
   # def process_file(file) -> pd.DataFrame:
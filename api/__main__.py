@@ -0,0 +1,85 @@
+"""
+Generate an AirBnB earnings report without the Streamlit app.
+
+Usage:
+  python -m api report.csv --format json --output out/
+  python -m api exports/ --format parquet --start 2024-01-01 --end 2024-12-31
+
+Only the standard library is imported until the arguments have been parsed, and
+plotting or Streamlit libraries are never imported, so the command starts quickly
+under cron.
+"""
+import argparse
+import datetime
+import os
+import sys
+
+
+def _date(value: str) -> datetime.date:
+  """argparse type of --start and --end."""
+  try:
+    return datetime.date.fromisoformat(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f'invalid date {value!r}, expected YYYY-MM-DD')
+
+
+def main(argv=None) -> int:
+  parser = argparse.ArgumentParser(
+    prog='python -m api',
+    description='Generate an AirBnB earnings report from one or more CSV exports.'
+  )
+  parser.add_argument('paths', nargs='+', help='CSV exports or directories containing them')
+  parser.add_argument('-o', '--output', default='airbnb-report', help='output directory (default: airbnb-report)')
+  parser.add_argument('-f', '--format', default='json', choices=['json', 'csv', 'parquet'], help='output format')
+  parser.add_argument('--top-customers', type=int, default=None, help='limit the repeat customer and guest tables')
+  parser.add_argument('--freq', default='month', choices=['day', 'week', 'month', 'year'], help='time series bucket size')
+  parser.add_argument('--start', type=_date, default=None, help='first stay date to include (YYYY-MM-DD)')
+  parser.add_argument('--end', type=_date, default=None, help='last stay date to include (YYYY-MM-DD)')
+  parser.add_argument('--currency', default=None, help='convert every amount to this currency, e.g. PHP')
+  parser.add_argument('--fx-rates', default=None, help='exchange rate CSV for --currency (default: sample rates in data/fx-rates.csv)')
+  parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes when reading several exports')
+  parser.add_argument('--no-cache', action='store_true', help='skip the on-disk report cache')
+  parser.add_argument('--timings', action='store_true', help='also write the time spent per stage to timings.json')
+  args = parser.parse_args(argv)
+
+  # Deferred so that --help and argument errors don't pay for pandas
+  from .batch import analyze_reports
+  from .exceptions import AirBnBError
+  from .instrument import Recorder, recording
+  from .report import build_report, write_report
+
+  recorder = Recorder() if args.timings else None
+  try:
+    with recording(recorder):
+      bnb = analyze_reports(args.paths, max_workers=args.workers, use_cache=not args.no_cache)
+      if bnb.length is None:
+        print('error: no reservations found', file=sys.stderr)
+        return 1
+      if args.currency:
+        from .currency import load_fx_rates
+        fx_rates = load_fx_rates(args.fx_rates)
+        if fx_rates.sample:
+          print('warning: converting with the sample exchange rates of data/fx-rates.csv; '
+            'pass --fx-rates or set AIRBNB_ANALYZER_FX_RATES', file=sys.stderr)
+        bnb.set_currency(args.currency, fx_rates)
+      if args.start or args.end:
+        bnb.set_date_range(args.start, args.end)
+      report = build_report(bnb, top_customers=args.top_customers, freq=args.freq)
+      written = write_report(report, args.output, args.format)
+  except AirBnBError as e:
+    print(f'error: {e}', file=sys.stderr)
+    return 1
+
+  if recorder is not None:
+    path = os.path.join(args.output, 'timings.json')
+    with open(path, 'w') as f:
+      f.write(recorder.to_json(indent=2))
+    written.append(path)
+
+  for path in written:
+    print(path)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Analyze many AirBnB earnings exports together.
+
+Usage:
+  python -m api.batch exports/ account-2.csv --workers 4
+"""
+import argparse
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+from .AirBnB import AirBnB
+from .disk_cache import content_key, get_default_cache
+from .exceptions import AirBnBError, FileProcessingError
+from .schema import KEY_COLUMNS, concat_chunks, read_earnings_csv
+
+
+def find_reports(paths: Iterable[str]) -> list[str]:
+  """
+  Expand directories into the CSV files they contain.
+
+  Returns:
+    list: sorted, de-duplicated CSV paths
+
+  Raises:
+    FileProcessingError: a path does not exist
+  """
+  reports = []
+  for path in paths:
+    if os.path.isdir(path):
+      reports.extend(
+        os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith('.csv')
+      )
+    elif os.path.isfile(path):
+      reports.append(path)
+    else:
+      raise FileProcessingError(f'No such file or directory: {path}')
+  return sorted(set(os.path.abspath(report) for report in reports))
+
+
+def load_report(path: str, engine: Optional[str] = 'auto', use_cache: bool = True) -> pd.DataFrame:
+  """
+  Read every transaction of a single export, going through the on-disk report cache.
+  Defined at module level so process pool workers can pickle it.
+  """
+  cache = get_default_cache() if use_cache else None
+  key = content_key(path) if cache is not None and cache.enabled else None
+  if key is not None:
+    df = cache.get(key)
+    if df is not None:
+      return df
+
+  df = read_earnings_csv(path, engine=engine)
+  if key is not None:
+    try:
+      cache.put(key, df)
+    except OSError:
+      pass
+  return df
+
+
+def load_reports(
+  paths: Iterable[str],
+  max_workers: Optional[int] = None,
+  engine: Optional[str] = 'auto',
+  use_cache: bool = True
+) -> pd.DataFrame:
+  """
+  Parse many exports in parallel with a process pool and merge their transactions.
+
+  Transactions that appear in several exports (same `Confirmation code` and
+  `Reference code`) are kept once.
+
+  Args:
+    paths: CSV files and/or directories of CSV files
+    max_workers: Optional number of worker processes, defaults to the number of CPUs
+    engine: CSV parser backend, see `api.schema.resolve_engine`
+    use_cache: read and populate the on-disk report cache
+
+  Returns:
+    DataFrame of the de-duplicated transactions of every export
+
+  Raises:
+    FileProcessingError: no CSV files found, or a path does not exist
+  """
+  reports = find_reports(paths)
+  if not reports:
+    raise FileProcessingError('No CSV files found')
+
+  if len(reports) == 1 or max_workers == 1:
+    frames = [load_report(report, engine, use_cache) for report in reports]
+  else:
+    workers = min(max_workers or os.cpu_count() or 1, len(reports))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      frames = list(executor.map(load_report, reports, [engine] * len(reports), [use_cache] * len(reports)))
+
+  df = concat_chunks(frames)
+  if all(col in df.columns for col in KEY_COLUMNS):
+    df = df.drop_duplicates(subset=KEY_COLUMNS)
+  return df
+
+
+def analyze_reports(paths: Iterable[str], max_workers: Optional[int] = None, **kwargs) -> AirBnB:
+  """Build a single AirBnB report over the union of many exports, see `load_reports`."""
+  return AirBnB(load_reports(paths, max_workers=max_workers, **kwargs))
+
+
+def main(argv: Optional[list[str]] = None):
+  parser = argparse.ArgumentParser(
+    prog='python -m api.batch',
+    description='Analyze many AirBnB earnings exports together.'
+  )
+  parser.add_argument('paths', nargs='+', help='CSV exports or directories containing them')
+  parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+  parser.add_argument('--engine', default='auto', choices=['auto', 'pyarrow', 'c'], help='CSV parser backend')
+  parser.add_argument('--no-cache', action='store_true', help='skip the on-disk report cache')
+  args = parser.parse_args(argv)
+
+  try:
+    reports = find_reports(args.paths)
+    bnb = analyze_reports(reports, max_workers=args.workers, engine=args.engine, use_cache=not args.no_cache)
+  except AirBnBError as e:
+    parser.exit(1, f'error: {e}\n')
+
+  print(f'{len(reports)} reports, {bnb.length or 0} unique reservations')
+  if bnb.length is None:
+    return
+  for name, value in bnb.get_basic_earnings().items():
+    print(f'{name:>16}: {value:,.2f}')
+  if bnb.ledger is not None:
+    reconciliation = bnb.get_reconciliation().summary()
+    print(f"{reconciliation['unmatched_settlements']} of {reconciliation['settlements']} payouts unmatched "
+      f"({reconciliation['unmatched_amount']:,.2f}), {reconciliation['pending_items']} transactions not paid out yet")
+  with pd.option_context('display.width', 200, 'display.max_columns', None):
+    print(bnb.get_listing_stats())
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+HISTOGRAM_STATS = ['count', 'proportion', 'percent']
+
+
+@dataclass(frozen=True)
+class Histogram:
+  """
+  Counts of values per bin.
+
+  Bin `i` covers `edges[i]` to `edges[i + 1]`, closed on the left unless `right` is set.
+  The arrays are read-only so a histogram can be shared between cached results.
+  """
+  edges: np.ndarray
+  counts: np.ndarray
+  labels: list[str]
+  right: bool = False
+
+  @property
+  def total(self) -> int:
+    return int(self.counts.sum())
+
+  def values(self, stat: str = 'count') -> np.ndarray:
+    """
+    Args:
+      stat: one of 'count', 'proportion' or 'percent'
+
+    Raises:
+      ValueError: unknown stat
+    """
+    if stat not in HISTOGRAM_STATS:
+      raise ValueError(f"Unsupported stat: {stat}")
+    if stat == 'count':
+      return self.counts
+    proportion = self.counts / self.total if self.total else np.zeros(len(self.counts))
+    return proportion * 100 if stat == 'percent' else proportion
+
+  def most_frequent(self) -> list[str]:
+    """Labels of every bin with the highest count."""
+    return [self.labels[i] for i in np.flatnonzero(self.counts == self.counts.max())]
+
+  def least_frequent(self) -> list[str]:
+    """Labels of every bin with the lowest count."""
+    return [self.labels[i] for i in np.flatnonzero(self.counts == self.counts.min())]
+
+  def to_frame(self, stat: str = 'count') -> pd.DataFrame:
+    return pd.DataFrame({stat: self.values(stat)}, index=pd.Index(self.labels, name='bin'))
+
+
+def _default_labels(edges: np.ndarray, right: bool) -> list[str]:
+  left_bracket, right_bracket = ('(', ']') if right else ('[', ')')
+  return [f'{left_bracket}{lo:g}, {hi:g}{right_bracket}' for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def bin_counts(
+  values,
+  edges: Sequence[float],
+  labels: Optional[Sequence[str]] = None,
+  right: bool = False,
+  include_lowest: bool = False
+) -> Histogram:
+  """
+  Count values per bin in a single vectorized pass, with the same bin semantics as `pd.cut`.
+
+  Args:
+    values: array-like of numbers; NaN and out-of-range values are not counted
+    edges: monotonically increasing bin edges, may end with `float('inf')`
+    labels: Optional name of each bin, defaults to interval notation
+    right: bins are closed on the right instead of the left
+    include_lowest: with `right`, also count values equal to the first edge
+
+  Returns:
+    Histogram
+
+  Raises:
+    ValueError: edges are not increasing or labels don't match the number of bins
+  """
+  edges = np.asarray(edges, dtype='float64')
+  n_bins = len(edges) - 1
+  if n_bins < 1 or np.any(np.diff(edges) <= 0):
+    raise ValueError("Bin edges must be increasing and define at least one bin")
+  if labels is not None and len(labels) != n_bins:
+    raise ValueError(f"Expected {n_bins} labels, got {len(labels)}")
+
+  if isinstance(values, (pd.Series, pd.Index)):
+    values = values.to_numpy(dtype='float64', na_value=np.nan)
+  values = np.asarray(values, dtype='float64')
+
+  # NaN sorts past every edge, so it falls outside the valid bin range
+  bins = np.searchsorted(edges, values, side='left' if right else 'right') - 1
+  if right and include_lowest:
+    bins[values == edges[0]] = 0
+  bins = bins[(bins >= 0) & (bins < n_bins)]
+  counts = np.bincount(bins, minlength=n_bins)
+
+  edges.flags.writeable = False
+  counts.flags.writeable = False
+  return Histogram(
+    edges=edges,
+    counts=counts,
+    labels=list(labels) if labels is not None else _default_labels(edges, right),
+    right=right
+  )
@@ -0,0 +1,198 @@
+"""
+Single-file bundles of an analyzed report, see `AirBnB.save` and `AirBnB.load`.
+
+Layout:
+  MAGIC | frame sections | JSON footer | footer length (uint64, little endian) | MAGIC
+
+Each frame section is an uncompressed Arrow IPC file aligned to `ALIGNMENT` bytes. The
+footer holds the report's metadata, small results inline and where every section
+starts, so opening a bundle reads only its last bytes and memory-maps the rest; a
+section is only read, straight from the mapping, the first time it is asked for.
+"""
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Optional
+from .exceptions import FileProcessingError
+from .leadtime import LeadTime
+from .schema import SCHEMA_VERSION
+
+MAGIC = b'ABNBBNDL'
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+BUNDLE_SUFFIX = '.abnb'
+
+_LENGTH = struct.Struct('<Q')
+
+
+def _pyarrow():
+  """
+  Raises:
+    FileProcessingError: pyarrow is not installed
+  """
+  try:
+    import pyarrow as pa
+  except ImportError:
+    raise FileProcessingError(
+      "Report bundles require pyarrow; install it with `pip install pyarrow` or the project's `arrow` extra"
+    )
+  return pa
+
+
+def _write_frame(f, df: pd.DataFrame) -> dict:
+  pa = _pyarrow()
+
+  f.write(b'\0' * (-f.tell() % ALIGNMENT))
+  offset = f.tell()
+  table = pa.Table.from_pandas(df)
+  with pa.ipc.new_file(f, table.schema) as writer:
+    writer.write_table(table)
+  return {'offset': offset, 'length': f.tell() - offset}
+
+
+def _write_result(f, name: str, value) -> dict:
+  """Frames get their own section; everything else is small enough for the footer."""
+  if isinstance(value, pd.DataFrame):
+    return {'kind': 'frame', **_write_frame(f, value)}
+  if isinstance(value, LeadTime):
+    return {
+      'kind': 'lead_time',
+      **_write_frame(f, pd.DataFrame({'days': value.days})),
+      'stats': value.stats,
+      'quantiles': [[float(q), float(v)] for q, v in value.quantiles.items()],
+    }
+  if isinstance(value, dict):
+    return {'kind': 'dict', 'value': {key: float(item) for key, item in value.items()}}
+  raise TypeError(f'Cannot bundle result {name!r} of type {type(value).__name__}')
+
+
+def write_bundle(path: str, meta: dict, frames: dict[str, pd.DataFrame], results: dict[str, object]):
+  """
+  Write a bundle, replacing `path` atomically.
+
+  Args:
+    path: destination file
+    meta: JSON-serializable report metadata
+    frames: data frames by name, None values are skipped
+    results: getter results by name: DataFrames, LeadTimes or dicts of numbers
+
+  Raises:
+    FileProcessingError: pyarrow is not installed
+  """
+  _pyarrow()
+  directory = os.path.dirname(os.path.abspath(path))
+  # Write to a temporary file first so readers never map a partial bundle
+  fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(MAGIC)
+      footer = {
+        'version': BUNDLE_VERSION,
+        'schema_version': SCHEMA_VERSION,
+        'meta': meta,
+        'frames': {name: _write_frame(f, df) for name, df in frames.items() if df is not None},
+        'results': {name: _write_result(f, name, value) for name, value in results.items()},
+      }
+      data = json.dumps(footer).encode()
+      f.write(data)
+      f.write(_LENGTH.pack(len(data)))
+      f.write(MAGIC)
+    os.replace(tmp_path, path)
+  except BaseException:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+
+
+class ReportBundle:
+  """
+  Memory-mapped reader of a bundle written by `write_bundle`.
+
+  Opening one only parses the footer. Frames are read zero-copy from the mapping into
+  Arrow and converted to pandas on each `frame` or `result` call, so callers keep what
+  they read.
+  """
+  def __init__(self, path: str):
+    """
+    Raises:
+      FileProcessingError: missing file, not a bundle, written by a newer version, or
+        pyarrow is not installed
+    """
+    pa = _pyarrow()
+
+    self.path = path
+    try:
+      self._file = pa.memory_map(path, 'r')
+    except (FileNotFoundError, OSError) as e:
+      raise FileProcessingError(f'Cannot open report bundle {path}: {e}')
+
+    # Sections are zero-copy slices of the whole mapping rather than reads at the file's
+    # position, so several threads can read the bundle at once
+    self._buffer = self._file.read_buffer()
+    size = self._buffer.size
+    tail = len(MAGIC) + _LENGTH.size
+    if size < len(MAGIC) + tail or self._read(0, len(MAGIC)) != MAGIC or self._read(size - len(MAGIC), len(MAGIC)) != MAGIC:
+      raise FileProcessingError(f'Not a report bundle: {path}')
+    (length,) = _LENGTH.unpack(self._read(size - tail, _LENGTH.size))
+    try:
+      footer = json.loads(self._read(size - tail - length, length))
+    except ValueError:
+      raise FileProcessingError(f'Corrupt report bundle: {path}')
+
+    if footer['version'] > BUNDLE_VERSION:
+      raise FileProcessingError(f"Report bundle {path} has version {footer['version']}, newer than {BUNDLE_VERSION}")
+    if footer['schema_version'] != SCHEMA_VERSION:
+      raise FileProcessingError(f"Report bundle {path} was written for schema v{footer['schema_version']}")
+    self.meta: dict = footer['meta']
+    self._frames: dict = footer['frames']
+    self._results: dict = footer['results']
+
+  def _read(self, offset: int, length: int) -> bytes:
+    return self._buffer.slice(offset, length).to_pybytes()
+
+  def _table(self, section: dict):
+    pa = _pyarrow()
+
+    buffer = self._buffer.slice(section['offset'], section['length'])
+    return pa.ipc.open_file(buffer).read_all()
+
+  @property
+  def frames(self) -> list[str]:
+    return list(self._frames)
+
+  @property
+  def results(self) -> list[str]:
+    return list(self._results)
+
+  def frame(self, name: str) -> Optional[pd.DataFrame]:
+    """Frame saved under `name`, or None when the bundle has none."""
+    section = self._frames.get(name)
+    if section is None:
+      return None
+    return self._table(section).to_pandas()
+
+  def result(self, name: str):
+    """
+    Raises:
+      KeyError: no result saved under `name`
+    """
+    section = self._results[name]
+    kind = section['kind']
+    if kind == 'frame':
+      return self._table(section).to_pandas()
+    if kind == 'lead_time':
+      days = self._table(section).column('days').to_numpy()
+      quantiles = np.array(section['quantiles'], dtype='float64').reshape(-1, 2)
+      return LeadTime(
+        days=days,
+        stats=dict(section['stats']),
+        quantiles=pd.Series(quantiles[:, 1], index=pd.Index(quantiles[:, 0], name='quantile'))
+      )
+    return dict(section['value'])
+
+  def close(self):
+    """Unmap the file; frames and results already read stay valid."""
+    self._file.close()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import threading
+import weakref
+from typing import Callable
+from .schema import INTEGER_COLUMNS, KEY_COLUMNS, MONEY_COLUMNS, RESERVATION_TYPE
+
+# Columns no analysis reads. `Confirmation code` is still counted per guest, and
+# `Reference code` and `Date` place each transaction in the payout that settles it.
+DROPPED_COLUMNS = ['Arriving by date', 'Details']
+
+# Hash of `KEY_COLUMNS`, enough to de-duplicate appended batches without the text columns
+ROW_KEY_COLUMN = 'Row key'
+
+# Largest error allowed when storing money as float32
+MONEY_TOLERANCE = 0.005
+
+_COMPACT_ATTR = 'compact'
+
+
+def row_keys(df: pd.DataFrame) -> np.ndarray | None:
+  """Hashes of each row's `KEY_COLUMNS`, or None when the frame lacks them."""
+  if ROW_KEY_COLUMN in df.columns:
+    return df[ROW_KEY_COLUMN].to_numpy()
+  if any(col not in df.columns for col in KEY_COLUMNS):
+    return None
+  return pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False).to_numpy()
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+  return bool(df.attrs.get(_COMPACT_ATTR))
+
+
+def _downcast_money(values: pd.Series) -> pd.Series:
+  """Store money as Float32 when every amount survives the round trip to the cent."""
+  wide = values.to_numpy(dtype='float64', na_value=np.nan)
+  narrow = wide.astype('float32')
+  with np.errstate(invalid='ignore'):
+    lossless = np.all(np.isnan(wide) | (np.abs(narrow.astype('float64') - wide) < MONEY_TOLERANCE))
+  return values.astype('Float32') if lossless else values
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Shrink an earnings frame for long-lived storage.
+
+  Unused columns are dropped, the transaction keys are replaced by a single hash column,
+  repetitive string columns are dictionary encoded as categories, integers are downcast
+  to the smallest nullable type that fits and money to Float32 when that is lossless to
+  the cent. Reservations are moved ahead of other transactions, keeping their order, so
+  they can later be taken as a slice instead of a copy. Frames that are already compact
+  are returned as is.
+
+  Args:
+    df: earnings DataFrame
+
+  Returns:
+    compact DataFrame
+  """
+  if is_compact(df):
+    return df
+
+  if 'Type' in df.columns:
+    other = (df['Type'] != RESERVATION_TYPE).to_numpy(dtype=bool, na_value=True)
+    if other.any():
+      df = df.iloc[np.argsort(other, kind='stable')]
+
+  keys = row_keys(df)
+  compact = df.drop(columns=[col for col in DROPPED_COLUMNS if col in df.columns])
+  if keys is not None:
+    compact[ROW_KEY_COLUMN] = keys
+
+  for col in compact.columns:
+    values = compact[col]
+    if col in MONEY_COLUMNS:
+      compact[col] = _downcast_money(values)
+    elif col in INTEGER_COLUMNS:
+      compact[col] = pd.to_numeric(values, downcast='integer')
+    elif isinstance(values.dtype, pd.CategoricalDtype):
+      compact[col] = values.cat.remove_unused_categories()
+    elif pd.api.types.is_object_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype):
+      # Near-unique columns such as codes gain nothing from a dictionary
+      if values.nunique() <= len(values) // 2:
+        compact[col] = values.astype('category')
+
+  compact.attrs[_COMPACT_ATTR] = True
+  return compact
+
+
+# Compact frames by report content key. Entries disappear once no session holds the frame.
+_shared_frames = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+def shared_frame(key: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+  """
+  Return the frame registered under `key` or register the one returned by `build`, so
+  sessions that load the same report hold a single copy of its buffers.
+
+  Callers must treat the frame as read-only. Under copy-on-write any column assignment
+  on it copies instead of changing the shared buffers.
+  """
+  with _shared_lock:
+    df = _shared_frames.get(key)
+  if df is not None:
+    return df
+
+  # Built outside the lock so loading one report doesn't block sessions loading another
+  built = build()
+  with _shared_lock:
+    df = _shared_frames.get(key)
+    if df is None:
+      df = _shared_frames[key] = built
+    return df
+
+
+def memory_usage(df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Returns:
+    DataFrame indexed by column (and 'Index') with its dtype and deep size in bytes
+  """
+  sizes = df.memory_usage(deep=True)
+  dtypes = pd.Series({col: str(dtype) for col, dtype in df.dtypes.items()})
+  dtypes['Index'] = str(df.index.dtype)
+  return pd.DataFrame({'dtype': dtypes, 'bytes': sizes}).loc[sizes.index]
@@ -0,0 +1,187 @@
+"""
+Conversion of money columns to a single reporting currency.
+
+Rates come from a local table of `Date`, `Currency` and `Rate`, the units of `Currency`
+worth one unit of the table's base currency. A rate holds from its date until the next
+rate of the same currency, so the table can be daily, monthly or anything in between.
+Each row is converted at the rates in force on its `Date` with one `merge_asof` over
+the distinct (date, currency) pairs of the frame.
+"""
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional
+from .exceptions import DataFrameError, FileProcessingError
+from .schema import MONEY_COLUMNS
+
+FX_COLUMNS = ['Date', 'Currency', 'Rate']
+DEFAULT_BASE = 'USD'
+DEFAULT_FX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fx-rates.csv')
+
+# Column giving the day each transaction is converted at
+CONVERSION_DATE_COLUMN = 'Date'
+
+
+def currencies(df: pd.DataFrame) -> list[str]:
+  """Distinct currencies of a frame, most frequent first."""
+  if df is None or 'Currency' not in df.columns:
+    return []
+  return [str(code) for code in df['Currency'].value_counts(sort=True).index]
+
+
+class FxRates:
+  """
+  Exchange rate table, see the module docstring.
+
+  Rows before a currency's first rate use that first rate, and rows without a date the
+  latest one.
+  """
+  def __init__(self, rates: pd.DataFrame, base: str = DEFAULT_BASE, sample: bool = False):
+    """
+    Args:
+      rates: DataFrame with `FX_COLUMNS`
+      base: currency the rates are quoted against
+      sample: the rates are illustrative, like those of `DEFAULT_FX_PATH`, and amounts
+        converted with them should be flagged as such
+
+    Raises:
+      DataFrameError: required columns missing
+    """
+    missing_columns = [col for col in FX_COLUMNS if col not in rates.columns]
+    if missing_columns:
+      raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    self.base = base.upper()
+    self.sample = sample
+    table = pd.DataFrame({
+      'Date': pd.to_datetime(rates['Date']),
+      'Currency': rates['Currency'].astype(str).str.upper(),
+      'Rate': rates['Rate'].astype('float64'),
+    }).dropna()
+    table = table[table['Currency'] != self.base]
+    self.table = table.sort_values('Date', kind='stable', ignore_index=True)
+    digest = hashlib.sha256(self.base.encode())
+    digest.update(pd.util.hash_pandas_object(self.table, index=False).to_numpy().tobytes())
+    # Identifies the rates in shared result keys
+    self.key = digest.hexdigest()
+
+  @property
+  def currencies(self) -> list[str]:
+    return sorted(set(self.table['Currency']) | {self.base})
+
+  def rates(self, dates, codes) -> np.ndarray:
+    """
+    Rate in force on each date for each currency, against `base`.
+
+    Each distinct (date, currency) pair is looked up once.
+
+    Args:
+      dates: datetime-like array
+      codes: currency of each date (a Categorical is fastest), or a single currency for all
+
+    Returns:
+      float64 array aligned with `dates`
+
+    Raises:
+      DataFrameError: a currency has no rates
+    """
+    dates = pd.DatetimeIndex(dates)
+    if isinstance(codes, str):
+      currency_codes, labels = np.zeros(len(dates), dtype='int64'), pd.Index([codes.upper()])
+    else:
+      currency_codes, labels = pd.factorize(codes)
+    unknown = sorted(set(map(str, labels)) - set(self.currencies))
+    if unknown:
+      raise DataFrameError(f"No exchange rates for: {', '.join(unknown)}")
+
+    # Pairs as single integers; missing dates get code 0
+    date_codes, unique_dates = pd.factorize(dates)
+    pairs = (date_codes.astype('int64') + 1) * len(labels) + currency_codes
+    positions, unique_pairs = pd.factorize(pairs)
+    latest = self.table['Date'].max() if len(self.table) else pd.Timestamp(0)
+    query_dates = pd.DatetimeIndex([latest]).append(unique_dates)
+    query = pd.DataFrame({
+      'Date': query_dates[unique_pairs // len(labels)],
+      'Currency': np.asarray(labels, dtype=object)[unique_pairs % len(labels)].astype(str),
+    }).sort_values('Date', kind='stable')
+
+    values = np.ones(len(query))
+    quoted = (query['Currency'] != self.base).to_numpy()
+    if quoted.any():
+      lookup = query[quoted]
+      before = pd.merge_asof(lookup, self.table, on='Date', by='Currency', direction='backward')['Rate'].to_numpy()
+      if np.isnan(before).any():
+        after = pd.merge_asof(lookup, self.table, on='Date', by='Currency', direction='forward')['Rate'].to_numpy()
+        before = np.where(np.isnan(before), after, before)
+      values[quoted] = before
+    unique_rates = np.empty(len(query))
+    unique_rates[query.index.to_numpy()] = values
+    return unique_rates[positions]
+
+
+def load_fx_rates(path: Optional[str] = None, base: str = DEFAULT_BASE) -> FxRates:
+  """
+  Read a rate table CSV, by default from `AIRBNB_ANALYZER_FX_RATES` or `DEFAULT_FX_PATH`.
+
+  The table shipped at `DEFAULT_FX_PATH` only holds sample rates, so rates read from it
+  come back with `sample` set.
+
+  Raises:
+    FileProcessingError: the file can't be read or lacks `FX_COLUMNS`
+  """
+  path = path or os.environ.get('AIRBNB_ANALYZER_FX_RATES') or DEFAULT_FX_PATH
+  sample = os.path.abspath(path) == DEFAULT_FX_PATH
+  try:
+    return FxRates(pd.read_csv(path), base=base, sample=sample)
+  except (OSError, ValueError, DataFrameError) as e:
+    raise FileProcessingError(f'Cannot read exchange rates from {path}: {e}')
+
+
+def convert_money(df: pd.DataFrame, fx: FxRates, target: str) -> pd.DataFrame:
+  """
+  Express every money column of `df` in `target`.
+
+  Only the money columns and `Currency` are replaced; the others are shared with `df`
+  under copy-on-write. Rows without a currency are taken to be in `target` already, and
+  `df` itself comes back when every row is.
+
+  Args:
+    df: earnings DataFrame with a `Currency` column
+    fx: exchange rates
+    target: reporting currency
+
+  Returns:
+    DataFrame aligned with `df`
+
+  Raises:
+    DataFrameError: `Currency` missing, or a currency has no rates
+  """
+  if 'Currency' not in df.columns:
+    raise DataFrameError("Missing required columns: Currency")
+  target = target.upper()
+  values = df['Currency']
+  if not isinstance(values.dtype, pd.CategoricalDtype):
+    values = values.astype('category')
+  # Compared per category rather than per row; missing currencies have code -1
+  categories = values.cat.categories.astype(str).str.upper()
+  codes = values.cat.codes.to_numpy()
+  foreign = np.isin(codes, np.flatnonzero(categories != target))
+  if not foreign.any():
+    return df
+
+  if CONVERSION_DATE_COLUMN in df.columns:
+    dates = df[CONVERSION_DATE_COLUMN].to_numpy()[foreign]
+  else:
+    dates = np.full(foreign.sum(), np.datetime64('NaT'))
+  remap, labels = pd.factorize(categories)
+  sources = pd.Categorical.from_codes(remap[codes[foreign]], categories=labels)
+  factors = np.ones(len(df))
+  factors[foreign] = fx.rates(dates, target) / fx.rates(dates, sources)
+  # Converted amounts are no longer whole cents, so they stay Float64 even in compact frames
+  converted = {
+    col: pd.array(df[col].to_numpy(dtype='float64', na_value=np.nan) * factors, dtype='Float64')
+    for col in MONEY_COLUMNS if col in df.columns
+  }
+  converted['Currency'] = pd.Categorical.from_codes(np.zeros(len(df), dtype='int8'), categories=[target])
+  return df.assign(**converted)
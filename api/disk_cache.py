@@ -0,0 +1,167 @@
+import hashlib
+import importlib.util
+import os
+import tempfile
+import time
+import pandas as pd
+from typing import Optional
+from .schema import SCHEMA_VERSION
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'airbnb-analyzer')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_SUFFIX = '.feather'
+TMP_SUFFIX = '.tmp'
+# Temporary files older than this were left by a writer that crashed
+STALE_TMP_SECONDS = 60 * 60
+
+
+def content_key(data, variant: str = 'transactions') -> str:
+  """
+  Build a cache key from the raw bytes of a report.
+
+  Args:
+    data: bytes, memoryview or path of the CSV export
+    variant: which processed form of the report is being cached
+
+  Returns:
+    str: content hash combined with the schema version and variant
+  """
+  digest = hashlib.sha256()
+  if isinstance(data, (str, os.PathLike)):
+    with open(data, 'rb') as f:
+      for block in iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(block)
+  else:
+    digest.update(data)
+  return f'{digest.hexdigest()}-v{SCHEMA_VERSION}-{variant}'
+
+
+class ReportCache:
+  """
+  On-disk cache of processed report frames stored as uncompressed Feather (Arrow IPC) files,
+  so they can be memory-mapped back instead of re-parsing the CSV.
+
+  Entries are evicted least-recently-used first once the directory grows past `max_bytes`.
+  Recency is tracked with file modification times, which are refreshed on every hit.
+  The cache disables itself when pyarrow is not installed.
+  """
+  def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+    self.directory = directory or DEFAULT_CACHE_DIR
+    self.max_bytes = max_bytes
+    # Only check that pyarrow is importable; it is imported lazily on first use
+    self.enabled = importlib.util.find_spec('pyarrow') is not None
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+  def _discard(self, path: str):
+    try:
+      os.remove(path)
+    except OSError:
+      pass
+
+  def get(self, key: str) -> Optional[pd.DataFrame]:
+    """
+    Returns:
+      DataFrame stored under `key`, or None on a miss or unreadable entry. Unreadable
+      entries, e.g. truncated ones, are deleted.
+    """
+    if not self.enabled:
+      return None
+
+    import pyarrow as pa
+    from pyarrow import feather
+
+    path = self._path(key)
+    try:
+      df = feather.read_table(path, memory_map=True).to_pandas()
+      os.utime(path)
+    except FileNotFoundError:
+      return None
+    except (OSError, ValueError, pa.ArrowException):
+      self._discard(path)
+      return None
+    return df
+
+  def put(self, key: str, df: pd.DataFrame):
+    """
+    Store `df` under `key`, then evict old entries if the cache is over its size limit.
+    Frames Arrow can't convert are not cached.
+
+    Raises:
+      OSError: the cache directory can't be written
+    """
+    if not self.enabled:
+      return
+
+    import pyarrow as pa
+    from pyarrow import feather
+
+    try:
+      table = pa.Table.from_pandas(df)
+    except (ValueError, TypeError, pa.ArrowException):
+      return
+
+    os.makedirs(self.directory, exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=TMP_SUFFIX)
+    os.close(fd)
+    try:
+      feather.write_feather(table, tmp_path, compression='uncompressed')
+      os.replace(tmp_path, self._path(key))
+    except Exception:
+      self._discard(tmp_path)
+      raise
+    self.evict()
+
+  def evict(self):
+    """
+    Remove least-recently-used entries until the cache fits in `max_bytes`, and
+    temporary files left by writers that crashed.
+    """
+    try:
+      entries = list(os.scandir(self.directory))
+    except FileNotFoundError:
+      return
+
+    stale = time.time() - STALE_TMP_SECONDS
+    for entry in entries:
+      try:
+        if entry.name.endswith(TMP_SUFFIX) and entry.stat().st_mtime < stale:
+          os.remove(entry.path)
+      except FileNotFoundError:
+        pass
+    entries = [entry for entry in entries if entry.name.endswith(CACHE_SUFFIX)]
+
+    stats = sorted(((entry.stat(), entry.path) for entry in entries), key=lambda x: x[0].st_mtime)
+    total = sum(stat.st_size for stat, _ in stats)
+    for stat, path in stats:
+      if total <= self.max_bytes:
+        break
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      total -= stat.st_size
+
+  def clear(self):
+    max_bytes, self.max_bytes = self.max_bytes, 0
+    self.evict()
+    self.max_bytes = max_bytes
+
+
+_default_cache = None
+
+def get_default_cache() -> ReportCache:
+  """
+  Process-wide cache configured through `AIRBNB_ANALYZER_CACHE_DIR` and
+  `AIRBNB_ANALYZER_CACHE_MB`.
+  """
+  global _default_cache
+  if _default_cache is None:
+    max_mb = os.environ.get('AIRBNB_ANALYZER_CACHE_MB')
+    _default_cache = ReportCache(
+      os.environ.get('AIRBNB_ANALYZER_CACHE_DIR'),
+      int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES
+    )
+  return _default_cache
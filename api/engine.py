@@ -0,0 +1,272 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from .exceptions import DataFrameError
+
+# Columns each summary section depends on, mirroring the AirBnB getters
+SECTION_COLUMNS = {
+  'earnings': ['Gross earnings', 'Service fee', 'Occupancy taxes'],
+  'performance': ['Nights'],
+  'listing': ['Listing', 'Nights', 'Amount', 'Paid out', 'Service fee', 'Fast pay fee',
+    'Cleaning fee', 'Occupancy taxes', 'Guest'],
+  'customer': ['Guest', 'Gross earnings', 'Confirmation code', 'Nights'],
+}
+
+# Listing columns aggregated with sum/mean/max, and those aggregated with sum only
+LISTING_FULL_STATS = ['Nights', 'Amount']
+LISTING_SUM_STATS = ['Paid out', 'Service fee', 'Fast pay fee', 'Cleaning fee', 'Occupancy taxes']
+
+TOTAL_COLUMNS = ['Gross earnings', 'Service fee', 'Occupancy taxes', 'Nights']
+
+CUSTOMER_COLUMNS = ['Total Gross Earnings', 'Average Earnings per Booking',
+  'Bookings Executed', 'Total Nights']
+
+
+@dataclass
+class Summary:
+  """
+  Partial aggregates of a reservations frame, computed in one pass by `summarize`.
+
+  Everything is kept as sums, counts and maxes rather than final means so that the
+  public outputs (`basic_earnings`, `listing_stats`, ...) can be derived without touching
+  the original rows again.
+
+  Attributes:
+    rows: number of rows summarized
+    totals: column sums, plus non-null counts as '<column>_count'
+    listing: per-listing sums, non-null counts and maxes
+    guest: per-guest row counts, sums and non-null counts
+    listing_guests: distinct (Listing, Guest) pairs with their row counts
+    missing: section name -> required columns absent from the frame
+  """
+  rows: int
+  totals: pd.Series
+  listing: pd.DataFrame
+  guest: pd.DataFrame
+  listing_guests: pd.Series
+  missing: dict = field(default_factory=dict)
+
+  def require(self, section: str):
+    """
+    Raises:
+      DataFrameError: the frame lacked columns needed by `section`
+    """
+    missing_columns = self.missing.get(section)
+    if missing_columns:
+      raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+
+def _float_values(df: pd.DataFrame, col: str) -> np.ndarray:
+  return df[col].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _group_sum(codes: np.ndarray, n: int, values: np.ndarray) -> np.ndarray:
+  valid = (codes >= 0) & ~np.isnan(values)
+  return np.bincount(codes[valid], weights=values[valid], minlength=n)
+
+
+def _group_count(codes: np.ndarray, n: int, valid: np.ndarray) -> np.ndarray:
+  return np.bincount(codes[(codes >= 0) & valid], minlength=n)
+
+
+def _group_max(codes: np.ndarray, n: int, values: np.ndarray) -> np.ndarray:
+  out = np.full(n, np.nan)
+  valid = (codes >= 0) & ~np.isnan(values)
+  np.fmax.at(out, codes[valid], values[valid])
+  return out
+
+
+def summarize(df: pd.DataFrame) -> Summary:
+  """
+  Compute the partial aggregates behind every AirBnB summary output in a single pass.
+
+  Each numeric column is extracted once and `Listing`/`Guest` are factorized once; all
+  per-group results are then bincount reductions over those shared integer codes.
+
+  Args:
+    df: reservations DataFrame
+
+  Returns:
+    Summary
+  """
+  missing = {
+    section: [col for col in columns if col not in df.columns]
+    for section, columns in SECTION_COLUMNS.items()
+  }
+  numeric_columns = set(TOTAL_COLUMNS + LISTING_FULL_STATS + LISTING_SUM_STATS) & set(df.columns)
+  values = {col: _float_values(df, col) for col in numeric_columns}
+
+  totals = {}
+  for col in TOTAL_COLUMNS:
+    if col in values:
+      totals[col] = np.nansum(values[col])
+      totals[col + '_count'] = np.count_nonzero(~np.isnan(values[col]))
+
+  listing = pd.DataFrame(index=pd.Index([], name='Listing'))
+  guest = pd.DataFrame(index=pd.Index([], name='Guest'))
+  listing_guests = pd.Series([], dtype='int64')
+
+  # Group keys are stored as plain labels so summaries of different batches align on merge
+  if 'Guest' in df.columns:
+    guest_codes, guests = pd.factorize(df['Guest'], sort=True)
+    guests = np.asarray(guests)
+    n_guests = len(guests)
+    guest_valid = guest_codes >= 0
+
+  if not missing['listing']:
+    listing_codes, listings = pd.factorize(df['Listing'], sort=True)
+    listings = np.asarray(listings)
+    n_listings = len(listings)
+    stats = {}
+    for col in LISTING_FULL_STATS:
+      stats[col + '_sum'] = _group_sum(listing_codes, n_listings, values[col])
+      stats[col + '_count'] = _group_count(listing_codes, n_listings, ~np.isnan(values[col]))
+      stats[col + '_max'] = _group_max(listing_codes, n_listings, values[col])
+    for col in LISTING_SUM_STATS:
+      stats[col + '_sum'] = _group_sum(listing_codes, n_listings, values[col])
+    stats['Guest_count'] = _group_count(listing_codes, n_listings, guest_valid)
+    listing = pd.DataFrame(stats, index=pd.Index(listings, name='Listing'))
+
+    # Distinct guests per listing come from the unique (listing, guest) code pairs
+    paired = (listing_codes >= 0) & guest_valid
+    pair_codes = listing_codes[paired].astype('int64') * n_guests + guest_codes[paired]
+    unique_pairs, pair_counts = np.unique(pair_codes, return_counts=True)
+    listing_guests = pd.Series(pair_counts, index=pd.MultiIndex.from_arrays(
+      [listings.take(unique_pairs // n_guests), guests.take(unique_pairs % n_guests)],
+      names=['Listing', 'Guest']
+    ))
+
+  if not missing['customer']:
+    gross = values['Gross earnings']
+    guest = pd.DataFrame({
+      'rows': _group_count(guest_codes, n_guests, np.ones(len(df), dtype=bool)),
+      'Gross earnings_sum': _group_sum(guest_codes, n_guests, gross),
+      'Gross earnings_count': _group_count(guest_codes, n_guests, ~np.isnan(gross)),
+      'Confirmation code_count': _group_count(guest_codes, n_guests, df['Confirmation code'].notna().to_numpy()),
+      'Nights_sum': _group_sum(guest_codes, n_guests, values['Nights']),
+    }, index=pd.Index(guests, name='Guest'))
+
+  return Summary(
+    rows=len(df),
+    totals=pd.Series(totals, dtype='float64'),
+    listing=listing,
+    guest=guest,
+    listing_guests=listing_guests,
+    missing={section: columns for section, columns in missing.items() if columns},
+  )
+
+
+def _merge_frames(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+  """Add two partial aggregate frames, taking the larger value for '*_max' columns."""
+  if left.empty:
+    return right
+  if right.empty:
+    return left
+
+  index = left.index.union(right.index)
+  left, right = left.reindex(index), right.reindex(index)
+  merged = {}
+  for col in left.columns:
+    if col.endswith('_max'):
+      merged[col] = np.fmax(left[col], right[col])
+    else:
+      merged[col] = left[col].fillna(0) + right[col].fillna(0)
+      if col.endswith('_count') or col == 'rows':
+        merged[col] = merged[col].astype('int64')
+  return pd.DataFrame(merged, index=index)
+
+
+def _merge_counts(left: pd.Series, right: pd.Series) -> pd.Series:
+  if left.empty:
+    return right
+  if right.empty:
+    return left
+  return left.add(right, fill_value=0).astype('int64')
+
+
+def merge_summaries(left: Summary, right: Summary) -> Summary:
+  """
+  Combine the summaries of two disjoint sets of rows into the summary of their union.
+
+  The cost depends on the number of listings and guests involved, not on the number of
+  rows the summaries were built from.
+  """
+  missing = {}
+  for section in set(left.missing) | set(right.missing):
+    columns = left.missing.get(section, []) + right.missing.get(section, [])
+    missing[section] = list(dict.fromkeys(columns))
+
+  return Summary(
+    rows=left.rows + right.rows,
+    totals=left.totals.add(right.totals, fill_value=0),
+    listing=_merge_frames(left.listing, right.listing),
+    guest=_merge_frames(left.guest, right.guest),
+    listing_guests=_merge_counts(left.listing_guests, right.listing_guests),
+    missing=missing,
+  )
+
+
+def basic_earnings(summary: Summary, adjustments: float = 0.0) -> dict:
+  """
+  Args:
+    summary: aggregates of the reservations
+    adjustments: total `Amount` of resolution adjustments and payouts, which live outside
+      the reservation rows (see `api.reconcile.adjustment_total`)
+  """
+  summary.require('earnings')
+  gross_earnings = summary.totals['Gross earnings']
+  service_fees = summary.totals['Service fee']
+  tax_withheld = summary.totals['Occupancy taxes']
+  return {
+    'gross_earnings': gross_earnings,
+    'adjustments': adjustments,
+    'service_fees': service_fees,
+    'tax_withheld': tax_withheld,
+    'total': gross_earnings + adjustments - service_fees - tax_withheld
+  }
+
+
+def performance_stats(summary: Summary) -> dict[str, float]:
+  summary.require('performance')
+  nights_count = summary.totals['Nights_count']
+  return {
+    'total_nights': summary.totals['Nights'],
+    'average_nights': summary.totals['Nights'] / nights_count if nights_count else np.nan
+  }
+
+
+def listing_stats(summary: Summary) -> pd.DataFrame:
+  """Per-listing table with the same `<column>_<agg>` layout as a groupby/agg on Listing."""
+  summary.require('listing')
+  listing = summary.listing
+  columns = {}
+  for col in LISTING_FULL_STATS:
+    columns[col + '_sum'] = listing[col + '_sum']
+    columns[col + '_mean'] = listing[col + '_sum'] / listing[col + '_count'].where(listing[col + '_count'] > 0)
+    columns[col + '_max'] = listing[col + '_max']
+  for col in LISTING_SUM_STATS:
+    columns[col + '_sum'] = listing[col + '_sum']
+  columns['Guest_nunique'] = summary.listing_guests.groupby(level='Listing', observed=True).size() \
+    .reindex(listing.index, fill_value=0)
+  columns['Guest_count'] = listing['Guest_count']
+  return pd.DataFrame(columns, index=listing.index)
+
+
+def customer_stats(summary: Summary, top: int | None = None) -> pd.DataFrame:
+  """
+  Repeat guests (more than one booking), sorted by total gross earnings.
+
+  With `top`, only the first `top` guests are selected with a partial sort; ties keep
+  the guests' alphabetical order either way.
+  """
+  summary.require('customer')
+  guest = summary.guest[summary.guest['rows'] > 1]
+  customers_df = pd.DataFrame({
+    'Total Gross Earnings': guest['Gross earnings_sum'],
+    'Average Earnings per Booking': guest['Gross earnings_sum'] / guest['Gross earnings_count'].where(guest['Gross earnings_count'] > 0),
+    'Bookings Executed': guest['Confirmation code_count'],
+    'Total Nights': guest['Nights_sum'],
+  }, index=guest.index)
+  if top is not None and top < len(customers_df):
+    return customers_df.nlargest(top, 'Total Gross Earnings', keep='first')
+  return customers_df.sort_values(by='Total Gross Earnings', ascending=False, kind='stable')
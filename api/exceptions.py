@@ -0,0 +1,11 @@
+class AirBnBError(Exception):
+    """Base exception class for AirBnB related errors"""
+    pass
+
+class DataFrameError(AirBnBError):
+    """Exception raised for errors in DataFrame operations"""
+    pass
+
+class FileProcessingError(AirBnBError):
+    """Exception raised for errors during file processing"""
+    pass
@@ -0,0 +1,252 @@
+"""
+Occupancy and earnings forecasts per listing.
+
+Two lightweight models are fitted on the months of history completed by `as_of`, for
+every listing at once:
+
+- a seasonal baseline, the average nights and `Amount` a listing books for stays
+  starting in each calendar month, over the months it was listed;
+- a booking pace curve, the share of a month's nights that is usually booked at least
+  a given number of days before the month starts. Listings with few stays lean on the
+  portfolio's curve.
+
+A future month is then projected as what is already on the books plus the part of its
+baseline that is usually still to be booked: `booked + (1 - pace) * baseline`. Stays
+count towards the month of their `Start date`, like the earnings of `rollup`.
+"""
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from .exceptions import DataFrameError
+
+FORECAST_COLUMNS = ['Listing', 'Booking date', 'Start date', 'Nights', 'Amount']
+DEFAULT_HORIZON = 6
+# Pace is tracked from this many days before a month starts until its last day
+MAX_LEAD_DAYS = 365
+MIN_LEAD_DAYS = -31
+# Nights of the portfolio's pace curve blended into each listing's own
+PACE_PRIOR_NIGHTS = 60.0
+
+
+@dataclass(frozen=True)
+class ForecastModel:
+  """
+  Result of `fit_forecast`.
+
+  Attributes:
+    listings: listings the model was fitted on, aligned with the rows of every array
+    as_of: day the forecasts are made on; later bookings are unknown to the model
+    seasonal_nights: average nights booked per calendar month, shape (listings, 12)
+    seasonal_earnings: average `Amount` booked per calendar month, shape (listings, 12)
+    pace: share of a month's nights booked at least `MIN_LEAD_DAYS + i` days before it
+      starts, shape (listings, MAX_LEAD_DAYS - MIN_LEAD_DAYS + 1)
+  """
+  listings: pd.Index
+  as_of: pd.Timestamp
+  seasonal_nights: np.ndarray
+  seasonal_earnings: np.ndarray
+  pace: np.ndarray
+
+  def booked_share(self, days_ahead) -> np.ndarray:
+    """Share of each listing's nights usually booked `days_ahead` days before a month starts."""
+    lead = np.clip(np.asarray(days_ahead, dtype='int64'), MIN_LEAD_DAYS, MAX_LEAD_DAYS) - MIN_LEAD_DAYS
+    return self.pace[:, lead]
+
+
+def _stay_arrays(df: pd.DataFrame, listings: Optional[pd.Index] = None):
+  """
+  Listing codes, start month (months since the epoch), lead days before that month,
+  nights and amount of every usable stay.
+  """
+  missing_columns = [col for col in FORECAST_COLUMNS if col not in df.columns]
+  if missing_columns:
+    raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+  if listings is None:
+    codes, listings = pd.factorize(df['Listing'], sort=True)
+    listings = pd.Index(np.asarray(listings), name='Listing')
+  else:
+    codes = listings.get_indexer(df['Listing'])
+  start = df['Start date'].to_numpy().astype('datetime64[D]')
+  booking = df['Booking date'].to_numpy().astype('datetime64[D]')
+  valid = (codes >= 0) & ~np.isnat(start) & ~np.isnat(booking)
+
+  month = start[valid].astype('datetime64[M]')
+  lead = (month.astype('datetime64[D]') - booking[valid]).astype('int64')
+  return (
+    listings,
+    codes[valid],
+    month.astype('int64'),
+    lead,
+    booking[valid],
+    df['Nights'].to_numpy(dtype='float64', na_value=0)[valid],
+    df['Amount'].to_numpy(dtype='float64', na_value=0)[valid],
+  )
+
+
+def _month_counts(first: np.ndarray, last: int) -> np.ndarray:
+  """Months of each calendar month between each `first` month and `last`, inclusive."""
+  calendar_month = np.arange(12)
+  upper = np.floor_divide(last - calendar_month, 12)
+  lower = np.floor_divide(first[:, None] - 1 - calendar_month, 12)
+  return np.where(first[:, None] <= last, upper - lower, 0)
+
+
+def _pace_counts(codes: np.ndarray, n_listings: int, lead: np.ndarray, nights: np.ndarray) -> np.ndarray:
+  """Nights booked at least each number of lead days ahead, shape (listings, leads)."""
+  width = MAX_LEAD_DAYS - MIN_LEAD_DAYS + 1
+  bins = np.clip(lead, MIN_LEAD_DAYS, MAX_LEAD_DAYS) - MIN_LEAD_DAYS
+  counts = np.bincount(codes * width + bins, weights=nights, minlength=n_listings * width).reshape(n_listings, width)
+  return np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+
+
+def _fit_listings(codes, n_listings, month, lead, nights, amount, last_month, prior_pace):
+  """
+  Fit the listings `0..n_listings` of a chunk. Defined at module level so process pool
+  workers can pickle it.
+
+  Returns:
+    tuple: seasonal nights, seasonal earnings and pace arrays of the chunk
+  """
+  calendar_month = month % 12
+  keys = codes * 12 + calendar_month
+  size = n_listings * 12
+  total_nights = np.bincount(keys, weights=nights, minlength=size).reshape(n_listings, 12)
+  total_earnings = np.bincount(keys, weights=amount, minlength=size).reshape(n_listings, 12)
+
+  # A listing counts as listed from the month of its first stay
+  first = np.full(n_listings, last_month + 1, dtype='int64')
+  np.minimum.at(first, codes, month)
+  months_listed = _month_counts(first, last_month)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    seasonal_nights = np.where(months_listed > 0, total_nights / months_listed, 0.0)
+    seasonal_earnings = np.where(months_listed > 0, total_earnings / months_listed, 0.0)
+
+  booked_ahead = _pace_counts(codes, n_listings, lead, nights)
+  total = booked_ahead[:, :1]
+  pace = (booked_ahead + PACE_PRIOR_NIGHTS * prior_pace) / (total + PACE_PRIOR_NIGHTS)
+  return seasonal_nights, seasonal_earnings, pace
+
+
+def fit_forecast(df: pd.DataFrame, as_of=None, max_workers: Optional[int] = None) -> ForecastModel:
+  """
+  Fit the seasonal baselines and booking pace curves of every listing, see the module
+  docstring.
+
+  Args:
+    df: reservations DataFrame
+    as_of: Optional day the forecasts are made on, defaults to the latest `Booking date`.
+      Only months that ended before it are fitted, from stays booked by then.
+    max_workers: Optional number of processes to fit chunks of listings in; the fit is
+      vectorized, so this only pays off for very large portfolios
+
+  Returns:
+    ForecastModel
+
+  Raises:
+    DataFrameError: required columns missing
+  """
+  listings, codes, month, lead, booking, nights, amount = _stay_arrays(df)
+  if as_of is None:
+    as_of = pd.Timestamp(booking.max()) if len(booking) else pd.Timestamp('now').normalize()
+  as_of = pd.Timestamp(as_of).normalize()
+  last_month = int(np.datetime64(as_of, 'M').astype('int64')) - 1
+
+  history = (month <= last_month) & (booking <= np.datetime64(as_of, 'D'))
+  codes, month, lead, nights, amount = codes[history], month[history], lead[history], nights[history], amount[history]
+
+  portfolio = _pace_counts(np.zeros(len(codes), dtype='int64'), 1, lead, nights)
+  prior_pace = portfolio / portfolio[:, :1] if portfolio[0, 0] > 0 else np.ones_like(portfolio)
+
+  n_listings = len(listings)
+  workers = min(max_workers or 1, n_listings)
+  if workers <= 1:
+    fitted = [_fit_listings(codes, n_listings, month, lead, nights, amount, last_month, prior_pace)]
+  else:
+    bounds = np.linspace(0, n_listings, workers + 1).astype('int64')
+    chunks = []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+      rows = (codes >= low) & (codes < high)
+      chunks.append((codes[rows] - low, high - low, month[rows], lead[rows], nights[rows], amount[rows], last_month, prior_pace))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      fitted = list(executor.map(_fit_listings, *zip(*chunks)))
+
+  seasonal_nights, seasonal_earnings, pace = (np.concatenate(part) for part in zip(*fitted))
+  return ForecastModel(
+    listings=listings,
+    as_of=as_of,
+    seasonal_nights=seasonal_nights,
+    seasonal_earnings=seasonal_earnings,
+    pace=pace,
+  )
+
+
+def project(model: ForecastModel, df: pd.DataFrame, horizon: int = DEFAULT_HORIZON, by_listing: bool = False) -> pd.DataFrame:
+  """
+  Project nights, earnings and occupancy for the month of `model.as_of` and the ones after.
+
+  Args:
+    model: fitted on `df` or an earlier version of it
+    df: reservations DataFrame holding what is on the books
+    horizon: number of months to project
+    by_listing: split every month per listing
+
+  Returns:
+    DataFrame indexed by Month (and Listing first) with the nights and earnings
+    already booked, the baseline, the share usually booked by now, and the projected
+    nights, earnings and occupancy
+
+  Raises:
+    DataFrameError: required columns missing
+  """
+  _, codes, month, _, booking, nights, amount = _stay_arrays(df, model.listings)
+  first_month = int(np.datetime64(model.as_of, 'M').astype('int64'))
+  months = np.arange(first_month, first_month + horizon)
+
+  booked = (month >= first_month) & (month < first_month + horizon) & (booking <= np.datetime64(model.as_of, 'D'))
+  n_listings = len(model.listings)
+  keys = codes[booked] * horizon + (month[booked] - first_month)
+  size = n_listings * horizon
+  booked_nights = np.bincount(keys, weights=nights[booked], minlength=size).reshape(n_listings, horizon)
+  booked_earnings = np.bincount(keys, weights=amount[booked], minlength=size).reshape(n_listings, horizon)
+
+  month_start = months.astype('datetime64[M]').astype('datetime64[D]')
+  days_ahead = (month_start - np.datetime64(model.as_of, 'D')).astype('int64')
+  share = model.booked_share(days_ahead)
+  baseline_nights = model.seasonal_nights[:, months % 12]
+  baseline_earnings = model.seasonal_earnings[:, months % 12]
+  forecast_nights = booked_nights + (1 - share) * baseline_nights
+  forecast_earnings = booked_earnings + (1 - share) * baseline_earnings
+  days = ((months + 1).astype('datetime64[M]').astype('datetime64[D]') - month_start).astype('float64')
+
+  month_index = pd.DatetimeIndex(month_start.astype('datetime64[ns]'), name='Month')
+  if by_listing:
+    index = pd.MultiIndex.from_product([model.listings, month_index])
+    result = pd.DataFrame({
+      'booked_nights': booked_nights.ravel(),
+      'booked_earnings': booked_earnings.ravel(),
+      'baseline_nights': baseline_nights.ravel(),
+      'baseline_earnings': baseline_earnings.ravel(),
+      'booked_share': share.ravel(),
+      'nights': forecast_nights.ravel(),
+      'earnings': forecast_earnings.ravel(),
+    }, index=index)
+    result['occupancy'] = np.minimum(forecast_nights / days, 1.0).ravel()
+    return result
+
+  totals = {
+    'booked_nights': booked_nights.sum(axis=0),
+    'booked_earnings': booked_earnings.sum(axis=0),
+    'baseline_nights': baseline_nights.sum(axis=0),
+    'baseline_earnings': baseline_earnings.sum(axis=0),
+  }
+  result = pd.DataFrame(totals, index=month_index)
+  # Share booked by now over the whole portfolio, weighted by each listing's baseline
+  with np.errstate(invalid='ignore', divide='ignore'):
+    result['booked_share'] = (share * baseline_nights).sum(axis=0) / totals['baseline_nights']
+  result['nights'] = forecast_nights.sum(axis=0)
+  result['earnings'] = forecast_earnings.sum(axis=0)
+  result['occupancy'] = np.minimum(forecast_nights, days).sum(axis=0) / (days * max(n_listings, 1))
+  return result
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from .exceptions import DataFrameError
+
+GUEST_COLUMNS = ['Guest', 'Start date', 'Gross earnings']
+
+
+def _month_ordinals(days: np.ndarray) -> np.ndarray:
+  """Months since the epoch of int64 day ordinals."""
+  return days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+
+
+class GuestIndex:
+  """
+  Bookings grouped by guest, for retention questions.
+
+  Guests are factorized once into integer ids. Bookings are then ordered by (guest, start)
+  and `offsets[g]:offsets[g + 1]` delimits the stays of guest `g` in start order, so
+  first and last stays, gaps between consecutive stays and lifetime value are all
+  vectorized reductions over those sorted arrays. Bookings without a guest or start date
+  are left out.
+  """
+  def __init__(self, df: pd.DataFrame):
+    missing_columns = [col for col in GUEST_COLUMNS if col not in df.columns]
+    if missing_columns:
+      raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    codes, guests = pd.factorize(df['Guest'], sort=True)
+    start = np.asarray(df['Start date'], dtype='datetime64[D]')
+    gross = df['Gross earnings'].to_numpy(dtype='float64', na_value=0)
+
+    valid = (codes >= 0) & ~np.isnat(start)
+    rows = np.flatnonzero(valid)
+    start = start[valid].astype('int64')
+    order = np.lexsort((start, codes[valid]))
+
+    self.guests = pd.Index(np.asarray(guests), name='Guest')
+    # Positions in the source frame, codes and values of every booking in (guest, start) order
+    self.rows = rows[order]
+    self.codes = codes[valid][order]
+    self.start = start[order]
+    self.gross = gross[valid][order]
+    self.bookings = np.bincount(self.codes, minlength=len(self.guests))
+    self.offsets = np.concatenate(([0], np.cumsum(self.bookings)))
+
+  def __len__(self) -> int:
+    return len(self.guests)
+
+  @property
+  def _present(self) -> np.ndarray:
+    """Guests with at least one indexed booking."""
+    return self.bookings > 0
+
+  def first_stay(self) -> np.ndarray:
+    """Day ordinal of each guest's first stay, -1 for guests without one."""
+    return np.where(self._present, self.start[np.minimum(self.offsets[:-1], len(self.start) - 1)], -1)
+
+  def last_stay(self) -> np.ndarray:
+    """Day ordinal of each guest's last stay, -1 for guests without one."""
+    return np.where(self._present, self.start[np.maximum(self.offsets[1:] - 1, 0)], -1)
+
+  def lifetime_value(self) -> np.ndarray:
+    """Total gross earnings of each guest."""
+    return np.bincount(self.codes, weights=self.gross, minlength=len(self.guests))
+
+  def repeat_intervals(self) -> np.ndarray:
+    """Days between every pair of consecutive stays by the same guest."""
+    same_guest = self.codes[1:] == self.codes[:-1]
+    return np.diff(self.start)[same_guest]
+
+  def guest_table(self, as_of=None, inactive_days: int = 365, top: int | None = None) -> pd.DataFrame:
+    """
+    One row per guest with bookings, first and last stay, lifetime value, average days
+    between stays and whether the guest churned.
+
+    Args:
+      as_of: Optional reference date, defaults to the latest stay in the index
+      inactive_days: guests whose last stay is more than this many days before `as_of`
+        count as churned
+      top: Optional number of guests to keep, those of the highest lifetime values
+        (see `top`), highest first
+    """
+    if top is None:
+      selected = np.flatnonzero(self._present)
+    else:
+      selected = self.top(top, repeat_only=False)
+    first, last = self.first_stay()[selected], self.last_stay()[selected]
+    bookings = self.bookings[selected]
+    reference = self._reference_day(as_of)
+    with np.errstate(invalid='ignore', divide='ignore'):
+      average_interval = np.where(bookings > 1, (last - first) / (bookings - 1), np.nan)
+    return pd.DataFrame({
+      'Bookings': bookings,
+      'First stay': first.astype('datetime64[D]'),
+      'Last stay': last.astype('datetime64[D]'),
+      'Lifetime value': self.lifetime_value()[selected],
+      'Average days between stays': average_interval,
+      'Churned': reference - last > inactive_days,
+    }, index=self.guests[selected])
+
+  def top(self, n: int, repeat_only: bool = True) -> np.ndarray:
+    """
+    Guest ids of the `n` highest lifetime values, highest first, found with a partial
+    sort instead of ordering every guest. Ties keep the order of the guest ids; `n` of
+    zero or less selects no one.
+    """
+    if n <= 0:
+      return np.array([], dtype='int64')
+    candidates = np.flatnonzero(self.bookings > 1 if repeat_only else self._present)
+    values = self.lifetime_value()[candidates]
+    if n < len(candidates):
+      kept = np.argpartition(-values, n - 1)[:n]
+      # Guests tied with the n-th value may have been dropped arbitrarily; re-admit them
+      # all and let the stable sort below pick the first ones
+      kept = np.flatnonzero(values >= values[kept].min())
+      candidates, values = candidates[kept], values[kept]
+    return candidates[np.argsort(-values, kind='stable')[:n]]
+
+  def cohorts(self, normalize: bool = False) -> pd.DataFrame:
+    """
+    Guests of each first-stay month still booking in later months.
+
+    Returns:
+      DataFrame indexed by cohort month with one column per month since the first stay,
+      holding distinct guests (or the share of the cohort when `normalize`)
+    """
+    if len(self.start) == 0:
+      return pd.DataFrame(index=pd.DatetimeIndex([], name='Cohort'))
+
+    months = _month_ordinals(self.start)
+    cohort = _month_ordinals(self.first_stay())[self.codes]
+    age = months - cohort
+    # Distinct (guest, age) pairs, so several stays in one month count once
+    n_ages = int(age.max()) + 1
+    pairs = np.unique(self.codes.astype('int64') * n_ages + age)
+    guest, age = pairs // n_ages, pairs % n_ages
+    cohort = cohort[self.offsets[guest]]
+
+    first_cohort = int(cohort.min())
+    n_cohorts = int(cohort.max()) - first_cohort + 1
+    counts = np.bincount((cohort - first_cohort) * n_ages + age, minlength=n_cohorts * n_ages)
+    table = pd.DataFrame(
+      counts.reshape(n_cohorts, n_ages),
+      index=pd.DatetimeIndex(
+        (np.arange(n_cohorts) + first_cohort).astype('datetime64[M]').astype('datetime64[ns]'), name='Cohort'
+      ),
+      columns=pd.RangeIndex(n_ages, name='Months since first stay')
+    )
+    table = table[table[0] > 0]
+    if normalize:
+      return table.div(table[0], axis=0)
+    return table
+
+  def churn(self, as_of=None, inactive_days: int = 365) -> dict:
+    """
+    Repeat and churn rates over every indexed guest.
+
+    Returns:
+      dict: guests, repeat guests, repeat rate, median days between repeat stays,
+        churned guests and churn rate
+    """
+    present = self._present
+    guests = int(present.sum())
+    repeat = int((self.bookings > 1).sum())
+    intervals = self.repeat_intervals()
+    churned = int((self._reference_day(as_of) - self.last_stay()[present] > inactive_days).sum())
+    return {
+      'guests': guests,
+      'repeat_guests': repeat,
+      'repeat_rate': repeat / guests if guests else np.nan,
+      'median_repeat_interval': float(np.median(intervals)) if len(intervals) else np.nan,
+      'churned_guests': churned,
+      'churn_rate': churned / guests if guests else np.nan,
+    }
+
+  def _reference_day(self, as_of) -> int:
+    if as_of is None:
+      return int(self.start.max()) if len(self.start) else 0
+    return int(np.datetime64(pd.Timestamp(as_of).date(), 'D').astype('int64'))
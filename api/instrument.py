@@ -0,0 +1,195 @@
+"""
+Lightweight stage timing for the analyzer.
+
+Stages are recorded only while a `Recorder` is active in the current context, e.g.
+
+  with recording(Recorder()) as recorder:
+    bnb.get_listing_stats()
+  print(recorder.to_json())
+
+Without an active recorder, `stage` and `instrumented` cost a single context variable
+lookup. Setting `AIRBNB_ANALYZER_PROFILE=1` activates a process-wide recorder whose
+records are also written to the `api.instrument` logger.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import pandas as pd
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes() -> int:
+  """Current resident memory, falling back to the peak where /proc is unavailable."""
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * _PAGE_SIZE
+  except (OSError, IndexError, ValueError):
+    if resource is None:
+      return 0
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS; only differences are used
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class StageRecord:
+  stage: str
+  seconds: float = 0.0
+  rows: Optional[int] = None
+  memory_delta_mb: float = 0.0
+  depth: int = 0
+  started_at: float = field(default_factory=time.time)
+
+
+class Recorder:
+  """Collects `StageRecord`s; safe to share between threads."""
+  def __init__(self, log: bool = False):
+    self.records: list[StageRecord] = []
+    self.log = log
+    self._lock = threading.Lock()
+
+  def add(self, record: StageRecord):
+    with self._lock:
+      self.records.append(record)
+    if self.log:
+      logger.info(json.dumps(asdict(record)))
+
+  def clear(self):
+    with self._lock:
+      self.records = []
+
+  def to_frame(self) -> pd.DataFrame:
+    """Records in the order the stages finished."""
+    return pd.DataFrame(
+      [asdict(record) for record in self.records],
+      columns=['stage', 'seconds', 'rows', 'memory_delta_mb', 'depth', 'started_at']
+    )
+
+  def summary(self) -> pd.DataFrame:
+    """Calls, total and maximum seconds and memory delta per stage, slowest first."""
+    return self.to_frame().groupby('stage').agg(
+      calls=('seconds', 'size'),
+      seconds=('seconds', 'sum'),
+      max_seconds=('seconds', 'max'),
+      rows=('rows', 'max'),
+      memory_delta_mb=('memory_delta_mb', 'sum')
+    ).sort_values('seconds', ascending=False)
+
+  def to_json(self, **kwargs) -> str:
+    return json.dumps([asdict(record) for record in self.records], **kwargs)
+
+
+_current: contextvars.ContextVar[Optional[Recorder]] = contextvars.ContextVar('recorder', default=None)
+# Nesting level of the stage being run, so records can be shown as a tree
+_depth = contextvars.ContextVar('stage_depth', default=0)
+_process_recorder = Recorder(log=True) if os.environ.get('AIRBNB_ANALYZER_PROFILE') else None
+
+
+def current_recorder() -> Optional[Recorder]:
+  return _current.get() or _process_recorder
+
+
+@contextmanager
+def recording(recorder: Optional[Recorder]):
+  """Record stages run in this context into `recorder`; None disables recording."""
+  token = _current.set(recorder)
+  try:
+    yield recorder
+  finally:
+    _current.reset(token)
+
+
+class _NullStage:
+  """Stands in for a `StageRecord` when nothing is recording; attribute writes are ignored."""
+  __slots__ = ()
+
+  def __setattr__(self, name, value):
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+  __slots__ = ('recorder', 'record', 'start', 'rss', 'token')
+
+  def __init__(self, recorder: Recorder, name: str, rows: Optional[int]):
+    self.recorder = recorder
+    self.record = StageRecord(name, rows=rows)
+
+  def __enter__(self) -> StageRecord:
+    self.record.depth = _depth.get()
+    self.token = _depth.set(self.record.depth + 1)
+    self.rss = _rss_bytes()
+    self.start = time.perf_counter()
+    return self.record
+
+  def __exit__(self, *exc):
+    self.record.seconds = time.perf_counter() - self.start
+    self.record.memory_delta_mb = (_rss_bytes() - self.rss) / 2**20
+    _depth.reset(self.token)
+    self.recorder.add(self.record)
+    return False
+
+
+def stage(name: str, rows: Optional[int] = None):
+  """
+  Context manager timing a block as stage `name`. Set `.rows` on the value it yields
+  once the number of rows processed is known.
+  """
+  recorder = current_recorder()
+  if recorder is None:
+    return _NULL_STAGE
+  return _Stage(recorder, name, rows)
+
+
+def _result_rows(result) -> Optional[int]:
+  if isinstance(result, (pd.DataFrame, pd.Series)):
+    return len(result)
+  return None
+
+
+def instrumented(name: Optional[str] = None, rows: Optional[Callable] = None):
+  """
+  Decorator recording every call of a function as a stage.
+
+  Args:
+    name: stage name, defaults to the function name
+    rows: Optional callable receiving the result followed by the call's arguments and
+      returning the number of rows processed; defaults to the length of a returned frame
+  """
+  def decorator(func):
+    stage_name = name or func.__name__
+    count_rows = rows or (lambda result, *args, **kwargs: _result_rows(result))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      recorder = _current.get() or _process_recorder
+      if recorder is None:
+        return func(*args, **kwargs)
+      with _Stage(recorder, stage_name, None) as record:
+        result = func(*args, **kwargs)
+        record.rows = count_rows(result, *args, **kwargs)
+      return result
+    return wrapper
+  return decorator
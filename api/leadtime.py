@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from .exceptions import DataFrameError
+
+LEAD_TIME_COLUMNS = ['Booking date', 'Start date']
+LEAD_TIME_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Breakdowns group by listing, or by the month of the stay's `Start date`
+BREAKDOWNS = ['listing', 'month']
+
+
+@dataclass(frozen=True)
+class LeadTime:
+  """
+  Days between booking and the start of each stay.
+
+  `days` is read-only and aligned with the rows of the frame it was computed from, with
+  NaN where either date is missing. `stats` and `quantiles` ignore the NaNs.
+  """
+  days: np.ndarray
+  stats: dict
+  quantiles: pd.Series
+
+  @property
+  def valid(self) -> np.ndarray:
+    return self.days[~np.isnan(self.days)]
+
+
+def _check_columns(df: pd.DataFrame, columns: list):
+  missing_columns = [col for col in columns if col not in df.columns]
+  if missing_columns:
+    raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+
+def lead_time_days(df: pd.DataFrame) -> np.ndarray:
+  """
+  Lead time of every row in fractional days, computed straight from the datetime64
+  buffers of `Start date` and `Booking date` without touching the frame.
+
+  Raises:
+    DataFrameError: required columns missing
+  """
+  _check_columns(df, LEAD_TIME_COLUMNS)
+  start = df['Start date'].to_numpy()
+  booking = df['Booking date'].to_numpy()
+  days = (start - booking) / np.timedelta64(1, 'D')
+  days.flags.writeable = False
+  return days
+
+
+def lead_times(df: pd.DataFrame, quantiles=LEAD_TIME_QUANTILES) -> LeadTime:
+  """
+  Args:
+    df: reservations DataFrame
+    quantiles: quantiles to report, between 0 and 1
+
+  Returns:
+    LeadTime
+
+  Raises:
+    DataFrameError: required columns missing
+  """
+  days = lead_time_days(df)
+  valid = days[~np.isnan(days)]
+  if len(valid):
+    stats = {
+      'count': int(len(valid)),
+      'mean': float(valid.mean()),
+      'median': float(np.median(valid)),
+      'std': float(valid.std(ddof=1)) if len(valid) > 1 else np.nan,
+      'min': float(valid.min()),
+      'max': float(valid.max()),
+    }
+    values = np.quantile(valid, quantiles)
+  else:
+    stats = {'count': 0, 'mean': np.nan, 'median': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan}
+    values = np.full(len(quantiles), np.nan)
+  return LeadTime(days=days, stats=stats, quantiles=pd.Series(values, index=pd.Index(quantiles, name='quantile')))
+
+
+def lead_time_breakdown(df: pd.DataFrame, by: str = 'listing', days: np.ndarray | None = None) -> pd.DataFrame:
+  """
+  Lead time statistics per listing or per month of arrival.
+
+  Args:
+    df: reservations DataFrame
+    by: one of 'listing' or 'month'
+    days: Optional lead times already computed for `df` by `lead_time_days`
+
+  Returns:
+    DataFrame indexed by Listing or Month with count, mean, median, min, max, p25 and p75
+
+  Raises:
+    DataFrameError: required columns missing
+    ValueError: unknown breakdown
+  """
+  if by not in BREAKDOWNS:
+    raise ValueError(f"Unsupported breakdown: {by}. Choose from {', '.join(BREAKDOWNS)}")
+  if days is None:
+    days = lead_time_days(df)
+
+  if by == 'listing':
+    _check_columns(df, ['Listing'])
+    keys = pd.Index(df['Listing'].to_numpy(), name='Listing')
+  else:
+    keys = pd.Index(df['Start date'].to_numpy().astype('datetime64[M]'), name='Month')
+
+  # Rows with a missing lead time or group key are dropped by the groupby
+  grouped = pd.Series(days, index=keys).groupby(level=0, observed=True, sort=True)
+  result = grouped.agg(['count', 'mean', 'median', 'min', 'max'])
+  quartiles = grouped.quantile([0.25, 0.75]).unstack()
+  result['p25'] = quartiles[0.25]
+  result['p75'] = quartiles[0.75]
+  return result[result['count'] > 0]
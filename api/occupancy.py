@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from .exceptions import DataFrameError
+
+OCCUPANCY_COLUMNS = ['Listing', 'Start date', 'Nights', 'Amount']
+
+
+def _day_ordinals(values) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Returns:
+    tuple: (int64 days since the epoch, mask of values that were NaT)
+  """
+  days = np.asarray(values, dtype='datetime64[D]')
+  return days.astype('int64'), np.isnat(days)
+
+
+class OccupancyGrid:
+  """
+  Per-listing nightly occupancy and revenue on a dense day grid.
+
+  Each stay adds +1 on its check-in day and -1 on its check-out day in a difference array
+  (and likewise its nightly rate, `Amount` spread over its nights, in a revenue difference array). One
+  cumulative sum along the day axis then yields the booked flags and revenue of every
+  night for every listing, and a second cumulative sum turns any window query into two
+  lookups per listing. No stay is ever expanded night by night.
+
+  Stays end on `End date` when it is present and consistent, otherwise on
+  `Start date` + `Nights`. A night booked by overlapping stays counts once, at the
+  average of their nightly rates.
+  """
+  def __init__(self, df: pd.DataFrame):
+    missing_columns = [col for col in OCCUPANCY_COLUMNS if col not in df.columns]
+    if missing_columns:
+      raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    codes, listings = pd.factorize(df['Listing'], sort=True)
+    start, start_missing = _day_ordinals(df['Start date'])
+    nights = df['Nights'].to_numpy(dtype='float64', na_value=0)
+    amount = df['Amount'].to_numpy(dtype='float64', na_value=0)
+
+    end = start + nights.astype('int64')
+    if 'End date' in df.columns:
+      end_date, end_missing = _day_ordinals(df['End date'])
+      end = np.where(~end_missing & (end_date > start), end_date, end)
+
+    valid = (codes >= 0) & ~start_missing & (end > start)
+    codes, start, end = codes[valid], start[valid], end[valid]
+    nightly_rate = amount[valid] / (end - start)
+
+    self.listings = pd.Index(np.asarray(listings), name='Listing')
+    n_listings = len(self.listings)
+    self.origin = int(start.min()) if len(start) else 0
+    self.n_days = int(end.max()) - self.origin if len(end) else 0
+    width = self.n_days + 1
+
+    # Flattened (listing, day) difference arrays accumulated with bincount
+    size = n_listings * width
+    enter = codes * width + (start - self.origin)
+    leave = codes * width + (end - self.origin)
+    booked_diff = np.bincount(enter, minlength=size) - np.bincount(leave, minlength=size)
+    revenue_diff = np.bincount(enter, weights=nightly_rate, minlength=size) \
+      - np.bincount(leave, weights=nightly_rate, minlength=size)
+
+    booked = np.cumsum(booked_diff.reshape(n_listings, width), axis=1)[:, :self.n_days]
+    revenue = np.cumsum(revenue_diff.reshape(n_listings, width), axis=1)[:, :self.n_days]
+
+    # Overlapping stays on one listing still count as a single booked night, earning the
+    # average of their nightly rates
+    self.booked = booked > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+      revenue = np.where(booked > 1, revenue / booked, revenue)
+    self.revenue = revenue
+    self._booked_prefix = np.concatenate([np.zeros((n_listings, 1), dtype='int64'), np.cumsum(self.booked, axis=1)], axis=1)
+    self._revenue_prefix = np.concatenate([np.zeros((n_listings, 1)), np.cumsum(revenue, axis=1)], axis=1)
+
+  @property
+  def first_day(self) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(self.origin, 'D'))
+
+  @property
+  def last_day(self) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(self.origin + max(self.n_days - 1, 0), 'D'))
+
+  def _window(self, start, end) -> tuple[int, int]:
+    """Window bounds as day ordinals, [first, last + 1), defaulting to the grid span."""
+    first = self.origin if start is None else int(np.datetime64(pd.Timestamp(start), 'D').astype('int64'))
+    last = self.origin + self.n_days - 1 if end is None else int(np.datetime64(pd.Timestamp(end), 'D').astype('int64'))
+    return first, last + 1
+
+  def nightly(self, start=None, end=None) -> pd.DataFrame:
+    """Booked flags per night (rows) and listing (columns) within the window."""
+    first, stop = self._window(start, end)
+    lo, hi = np.clip([first - self.origin, stop - self.origin], 0, self.n_days)
+    days = pd.date_range(pd.Timestamp(np.datetime64(self.origin + lo, 'D')), periods=hi - lo, freq='D')
+    return pd.DataFrame(self.booked[:, lo:hi].T, index=pd.Index(days, name='Night'), columns=self.listings)
+
+  def stats(self, start=None, end=None) -> pd.DataFrame:
+    """
+    Occupancy, ADR and RevPAR per listing over a window of nights.
+
+    Every listing is treated as available on every night of the window.
+
+    Args:
+      start: Optional first night of the window, defaults to the first booked night
+      end: Optional last night of the window (inclusive), defaults to the last booked night
+
+    Returns:
+      DataFrame indexed by Listing with available nights, booked nights, revenue,
+      occupancy rate, average daily rate and revenue per available night
+    """
+    first, stop = self._window(start, end)
+    available = max(stop - first, 0)
+    lo, hi = np.clip([first - self.origin, stop - self.origin], 0, self.n_days)
+
+    booked = self._booked_prefix[:, hi] - self._booked_prefix[:, lo]
+    revenue = self._revenue_prefix[:, hi] - self._revenue_prefix[:, lo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+      return pd.DataFrame({
+        'Available nights': available,
+        'Booked nights': booked,
+        'Revenue': revenue,
+        'Occupancy rate': booked / available if available else np.nan,
+        'ADR': np.where(booked > 0, revenue / booked, np.nan),
+        'RevPAR': revenue / available if available else np.nan,
+      }, index=self.listings)
@@ -0,0 +1,197 @@
+"""
+Payout reconciliation.
+
+Every transaction other than a payout (reservations, resolution adjustments and
+resolution payouts) is settled by the payout sharing its `Reference code`, in the same
+currency. Transactions without one are settled by the first payout issued on or after
+their `Date`, in the same currency. Payouts issued on the same day in the same currency
+are matched together as one settlement, whose `Paid out` should equal the `Amount` of the
+transactions it settles. References are looked up with one index over the payouts, and
+the rest is a single `merge_asof` over both sides sorted by date.
+"""
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from .compact import ROW_KEY_COLUMN
+from .exceptions import DataFrameError
+from .schema import PAYOUT_TYPE, RESERVATION_TYPE
+
+LEDGER_COLUMNS = ['Date', 'Type', 'Confirmation code', 'Currency', 'Amount', 'Paid out']
+# Carried along when present; compact frames drop the first one
+OPTIONAL_LEDGER_COLUMNS = ['Arriving by date', 'Reference code', ROW_KEY_COLUMN]
+
+# Largest difference between paid out and expected money still counted as a match
+DEFAULT_TOLERANCE = 0.01
+
+SETTLEMENT_KEYS = ['Payout date', 'Currency']
+# Shared by a payout and the transactions it settles, when the export links them
+REFERENCE_COLUMN = 'Reference code'
+
+
+def split_transactions(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+  """
+  Separate the reservations of an export from its ledger of every transaction.
+
+  The ledger is a column selection of `df`, which shares its buffers under
+  copy-on-write. Reservations come back as `df` itself when there is nothing else, and as
+  a slice when they lead the frame (see `api.compact.compact_frame`).
+
+  Returns:
+    tuple: reservations DataFrame, and the ledger or None when `df` lacks `LEDGER_COLUMNS`
+  """
+  if any(col not in df.columns for col in LEDGER_COLUMNS):
+    return df, None
+
+  ledger = df[LEDGER_COLUMNS + [col for col in OPTIONAL_LEDGER_COLUMNS if col in df.columns]]
+  is_reservation = (df['Type'] == RESERVATION_TYPE).to_numpy(dtype=bool, na_value=False)
+  n = int(is_reservation.sum())
+  if n == len(df):
+    return df, ledger
+  if is_reservation[:n].all():
+    return df.iloc[:n], ledger
+  return df[is_reservation], ledger
+
+
+def adjustment_rows(ledger: pd.DataFrame) -> np.ndarray:
+  """Rows of transactions that are neither reservations nor payouts."""
+  return (~ledger['Type'].isin([RESERVATION_TYPE, PAYOUT_TYPE])).to_numpy(dtype=bool, na_value=True)
+
+
+def adjustment_total(ledger: pd.DataFrame, start=None, end=None) -> float:
+  """
+  Sum of the `Amount` of every adjustment, optionally only those dated within
+  [start, end] (inclusive).
+  """
+  mask = adjustment_rows(ledger)
+  if start is not None or end is not None:
+    dates = ledger['Date']
+    if start is not None:
+      mask = mask & (dates >= pd.Timestamp(start)).to_numpy(dtype=bool, na_value=False)
+    if end is not None:
+      mask = mask & (dates <= pd.Timestamp(end)).to_numpy(dtype=bool, na_value=False)
+  return float(ledger['Amount'].to_numpy(dtype='float64', na_value=0)[mask].sum())
+
+
+def _currency_key(values: pd.Series) -> pd.Series:
+  """Currency as plain strings, so both sides of the merge group alike."""
+  return values.astype('string').fillna('')
+
+
+def _linked_payouts(items: pd.DataFrame, payouts: pd.DataFrame) -> np.ndarray | None:
+  """
+  Date of the payout sharing each item's `Reference code` in the same currency, NaT for
+  items no payout references. None when the ledger has no references.
+  """
+  if REFERENCE_COLUMN not in items.columns:
+    return None
+  references = payouts[REFERENCE_COLUMN].astype('string')
+  known = references.notna().to_numpy() & ~references.duplicated().to_numpy()
+  index = pd.Index(references[known])
+  if len(index) == 0:
+    return None
+
+  positions = index.get_indexer(items[REFERENCE_COLUMN].astype('string'))
+  found = positions >= 0
+  dates = payouts['Date'].to_numpy()[known]
+  currencies = _currency_key(payouts['Currency']).to_numpy()[known]
+  found &= currencies[positions] == items['Currency'].to_numpy()
+  return np.where(found, dates[positions], np.datetime64('NaT'))
+
+
+@dataclass(frozen=True)
+class Reconciliation:
+  """
+  Result of `reconcile`.
+
+  Attributes:
+    items: every dated non-payout transaction with the `Payout date` that settles it,
+      NaT while no payout has been issued since
+    settlements: one row per (payout date, currency) with the payouts issued, money
+      paid out, transactions settled and their expected total, the difference and
+      whether it is within the tolerance
+    tolerance: largest difference counted as a match
+  """
+  items: pd.DataFrame
+  settlements: pd.DataFrame
+  tolerance: float
+
+  def pending(self) -> pd.DataFrame:
+    """Transactions not settled by any payout yet."""
+    return self.items[self.items['Payout date'].isna()]
+
+  def unmatched(self) -> pd.DataFrame:
+    """Settlements whose money differs from the transactions they settle."""
+    return self.settlements[~self.settlements['Matched']]
+
+  def summary(self) -> dict:
+    """
+    Returns:
+      dict: money paid out and expected, unmatched settlements and the money they are
+        off by, pending transactions and their amount, and total adjustments
+    """
+    unmatched = self.unmatched()
+    pending = self.pending()
+    return {
+      'paid_out': float(self.settlements['Paid out'].sum()),
+      'expected': float(self.settlements['Expected'].sum()),
+      'settlements': len(self.settlements),
+      'unmatched_settlements': len(unmatched),
+      'unmatched_amount': float(unmatched['Difference'].abs().sum()),
+      'pending_items': len(pending),
+      'pending_amount': float(pending['Amount'].sum()),
+      'adjustments': float(self.items.loc[self.items['Type'] != RESERVATION_TYPE, 'Amount'].sum()),
+    }
+
+
+def reconcile(ledger: pd.DataFrame, tolerance: float = DEFAULT_TOLERANCE) -> Reconciliation:
+  """
+  Match payouts to the transactions they settle, see the module docstring.
+
+  Args:
+    ledger: every transaction of an export, see `split_transactions`
+    tolerance: largest difference between paid out and expected money counted as a match
+
+  Returns:
+    Reconciliation
+
+  Raises:
+    DataFrameError: the ledger lacks required columns
+  """
+  missing_columns = [col for col in LEDGER_COLUMNS if col not in ledger.columns]
+  if missing_columns:
+    raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+  ledger = ledger[ledger['Date'].notna()]
+  is_payout = (ledger['Type'] == PAYOUT_TYPE).to_numpy(dtype=bool, na_value=False)
+
+  payouts = ledger[is_payout]
+  grouped = pd.DataFrame({
+    'Payout date': payouts['Date'],
+    'Currency': _currency_key(payouts['Currency']),
+    'Paid out': payouts['Paid out'].astype('float64'),
+  }).groupby(SETTLEMENT_KEYS, sort=True)
+  settlements = grouped.agg(Payouts=('Paid out', 'size'), **{'Paid out': ('Paid out', 'sum')})
+  if 'Arriving by date' in payouts.columns:
+    settlements['Arriving by date'] = payouts.groupby(
+      [payouts['Date'].rename('Payout date'), _currency_key(payouts['Currency'])]
+    )['Arriving by date'].max()
+
+  items = ledger[~is_payout].drop(columns=['Paid out'])
+  items = items.assign(Currency=_currency_key(items['Currency']), Amount=items['Amount'].astype('float64'))
+  items = items.iloc[np.argsort(items['Date'].to_numpy(), kind='stable')]
+  # Settlements are sorted by date already; the first one on or after each item settles it
+  payout_dates = settlements.index.to_frame(index=False)
+  payout_dates['Date'] = payout_dates['Payout date']
+  matched = pd.merge_asof(items[['Date', 'Currency']], payout_dates, on='Date', by='Currency', direction='forward')
+  settled_on = matched['Payout date'].to_numpy()
+  linked = _linked_payouts(items, payouts)
+  if linked is not None:
+    settled_on = np.where(pd.isna(linked), settled_on, linked)
+  items['Payout date'] = settled_on
+
+  settled = items[items['Payout date'].notna()].groupby(SETTLEMENT_KEYS)['Amount'].agg(['size', 'sum'])
+  settlements['Items'] = settled['size'].reindex(settlements.index, fill_value=0)
+  settlements['Expected'] = settled['sum'].reindex(settlements.index, fill_value=0.0)
+  settlements['Difference'] = settlements['Paid out'] - settlements['Expected']
+  settlements['Matched'] = settlements['Difference'].abs() <= tolerance
+  return Reconciliation(items=items, settlements=settlements, tolerance=tolerance)
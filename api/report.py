@@ -0,0 +1,109 @@
+import json
+import os
+import pandas as pd
+from typing import Optional
+from .AirBnB import AirBnB
+from .exceptions import FileProcessingError
+
+OUTPUT_FORMATS = ['json', 'csv', 'parquet']
+
+
+def build_report(
+  bnb: AirBnB,
+  top_customers: Optional[int] = None,
+  freq: str = 'month'
+) -> dict:
+  """
+  Run every AirBnB analysis and collect the results.
+
+  Args:
+    bnb: report to analyze
+    top_customers: Optional limit on the number of repeat customers and guests listed
+    freq: bucket size of the time series, see `AirBnB.get_time_series`
+
+  Returns:
+    dict: section name -> dict of scalars or DataFrame
+  """
+  start, end = bnb.date_range
+  report = {
+    'basic_earnings': bnb.get_basic_earnings(),
+    'performance_stats': bnb.get_performance_stats(),
+    'listing_stats': bnb.get_listing_stats(),
+    'customer_stats': bnb.get_customer_stats(top_customers=top_customers),
+    'guest_stats': bnb.get_guest_stats(top=top_customers),
+    'occupancy_stats': bnb.get_occupancy_stats(start, end),
+    'time_series': bnb.get_time_series(freq=freq, by_listing=True),
+    'forecast': bnb.get_forecast(by_listing=True),
+  }
+  if bnb.ledger is not None:
+    reconciliation = bnb.get_reconciliation()
+    report['reconciliation'] = reconciliation.summary()
+    report['settlements'] = reconciliation.settlements
+  return report
+
+
+def _scalar(value):
+  """Make numpy and pandas scalars JSON serializable."""
+  if isinstance(value, pd.Timestamp):
+    return value.isoformat()
+  if hasattr(value, 'item'):
+    value = value.item()
+  if isinstance(value, float) and value != value:
+    return None
+  return value
+
+
+def write_report(report: dict, output: str, fmt: str = 'json') -> list[str]:
+  """
+  Write a report built by `build_report` to a directory.
+
+  With 'json' everything goes into a single report.json. With 'csv' or 'parquet' each
+  table gets its own file and the scalar sections go into summary.json.
+
+  Args:
+    report: section name -> dict or DataFrame
+    output: directory to write to, created if needed
+    fmt: one of 'json', 'csv', 'parquet'
+
+  Returns:
+    list: paths of the files written
+
+  Raises:
+    FileProcessingError: unknown format, or parquet requested without pyarrow
+  """
+  if fmt not in OUTPUT_FORMATS:
+    raise FileProcessingError(f"Unsupported output format: {fmt}")
+  if fmt == 'parquet':
+    try:
+      import pyarrow  # noqa: F401
+    except ImportError:
+      raise FileProcessingError("Writing parquet requires pyarrow to be installed")
+
+  os.makedirs(output, exist_ok=True)
+  scalars = {name: {key: _scalar(value) for key, value in section.items()}
+    for name, section in report.items() if isinstance(section, dict)}
+  tables = {name: section for name, section in report.items() if isinstance(section, pd.DataFrame)}
+  written = []
+
+  if fmt == 'json':
+    document = dict(scalars)
+    for name, table in tables.items():
+      document[name] = json.loads(table.reset_index().to_json(orient='records', date_format='iso'))
+    path = os.path.join(output, 'report.json')
+    with open(path, 'w') as f:
+      json.dump(document, f, indent=2)
+    return [path]
+
+  for name, table in tables.items():
+    path = os.path.join(output, f'{name}.{fmt}')
+    if fmt == 'csv':
+      table.to_csv(path)
+    else:
+      table.to_parquet(path)
+    written.append(path)
+
+  path = os.path.join(output, 'summary.json')
+  with open(path, 'w') as f:
+    json.dump(scalars, f, indent=2)
+  written.append(path)
+  return written
@@ -0,0 +1,165 @@
+"""
+Process-wide cache of analysis results.
+
+Reports built from the same exports (same content keys, see `api.disk_cache.content_key`)
+share their getter results here, so every session or job opening a report that another
+one already analyzed gets its results without recomputing them. Memory is bounded by an
+estimate of each result's size, with least-recently-used entries evicted first.
+"""
+import dataclasses
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_bytes(value, _depth: int = 0) -> int:
+  """Rough deep size of a result: frames, arrays, containers, dataclasses and plain objects."""
+  if _depth > 4:
+    return sys.getsizeof(value)
+  if isinstance(value, (pd.DataFrame, pd.Series)):
+    usage = value.memory_usage(deep=True)
+    return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+  if isinstance(value, pd.Index):
+    return int(value.memory_usage(deep=True))
+  if isinstance(value, np.ndarray):
+    return int(value.nbytes)
+  if isinstance(value, dict):
+    return sys.getsizeof(value) + sum(estimate_bytes(item, _depth + 1) for item in value.values())
+  if isinstance(value, (list, tuple)):
+    return sys.getsizeof(value) + sum(estimate_bytes(item, _depth + 1) for item in value)
+  if dataclasses.is_dataclass(value) and not isinstance(value, type):
+    return sum(estimate_bytes(getattr(value, f.name), _depth + 1) for f in dataclasses.fields(value))
+  if hasattr(value, '__dict__'):
+    return sum(estimate_bytes(item, _depth + 1) for item in vars(value).values())
+  return sys.getsizeof(value)
+
+
+class ResultCache:
+  """
+  Thread-safe LRU cache of results bounded by their estimated size.
+
+  Concurrent misses on the same key compute it once: later callers wait for the first
+  one instead of starting their own computation.
+  """
+  def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+    self.max_bytes = max_bytes
+    self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+    self._computing: dict[Hashable, Future] = {}
+    self._lock = threading.Lock()
+    self.bytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def get(self, key: Hashable, default=None):
+    with self._lock:
+      try:
+        value, _ = self._entries[key]
+      except KeyError:
+        self.misses += 1
+        return default
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return value
+
+  def put(self, key: Hashable, value):
+    """Store `value` unless it alone exceeds `max_bytes`, evicting old entries to fit it."""
+    size = estimate_bytes(value)
+    with self._lock:
+      self._store(key, value, size)
+
+  def _store(self, key: Hashable, value, size: int):
+    if size > self.max_bytes:
+      return
+    if key in self._entries:
+      self.bytes -= self._entries.pop(key)[1]
+    self._entries[key] = (value, size)
+    self.bytes += size
+    while self.bytes > self.max_bytes:
+      _, (_, evicted) = self._entries.popitem(last=False)
+      self.bytes -= evicted
+      self.evictions += 1
+
+  def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+    """
+    Return the result cached under `key`, computing and caching it on a miss.
+
+    Raises:
+      whatever `compute` raises; failures are not cached
+    """
+    with self._lock:
+      if key in self._entries:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key][0]
+      pending = self._computing.get(key)
+      if pending is None:
+        self.misses += 1
+        pending = self._computing[key] = Future()
+        owner = True
+      else:
+        # Someone else is computing it; their result counts as a hit
+        self.hits += 1
+        owner = False
+
+    if not owner:
+      return pending.result()
+
+    try:
+      value = compute()
+    except BaseException as e:
+      with self._lock:
+        del self._computing[key]
+      pending.set_exception(e)
+      raise
+    size = estimate_bytes(value)
+    with self._lock:
+      self._store(key, value, size)
+      del self._computing[key]
+    pending.set_result(value)
+    return value
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self.bytes = 0
+
+  def info(self) -> dict:
+    """
+    Returns:
+      dict: hits, misses, hit rate, evictions, number of entries, bytes held and the limit
+    """
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'hit_rate': self.hits / lookups if lookups else 0.0,
+        'evictions': self.evictions,
+        'entries': len(self._entries),
+        'bytes': self.bytes,
+        'max_bytes': self.max_bytes,
+      }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+  """Process-wide cache sized through `AIRBNB_ANALYZER_RESULT_CACHE_MB`."""
+  global _default_cache
+  with _default_lock:
+    if _default_cache is None:
+      max_mb = os.environ.get('AIRBNB_ANALYZER_RESULT_CACHE_MB')
+      _default_cache = ResultCache(int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES)
+    return _default_cache
@@ -0,0 +1,167 @@
+import pandas as pd
+from typing import Iterable, Optional
+from .exceptions import FileProcessingError
+from .instrument import instrumented
+
+# Bump whenever the dtypes below change so cached frames are not reused
+SCHEMA_VERSION = 1
+
+# Dates in the export are written as e.g. 12/15/23; some exports use four-digit years
+DATE_FORMAT = '%m/%d/%y'
+FALLBACK_DATE_FORMATS = ['%m/%d/%Y']
+
+DATE_COLUMNS = ['Date', 'Arriving by date', 'Booking date', 'Start date', 'End date']
+CATEGORY_COLUMNS = ['Type', 'Guest', 'Listing', 'Details', 'Currency']
+TEXT_COLUMNS = ['Confirmation code', 'Reference code']
+MONEY_COLUMNS = ['Amount', 'Paid out', 'Service fee', 'Fast pay fee',
+  'Cleaning fee', 'Gross earnings', 'Occupancy taxes']
+INTEGER_COLUMNS = ['Nights', 'Earnings year']
+
+# `Type` of the rows behind every reservation analysis, and of the transfers settling them
+RESERVATION_TYPE = 'Reservation'
+PAYOUT_TYPE = 'Payout'
+
+# Together these identify a single transaction row across overlapping exports
+KEY_COLUMNS = ['Confirmation code', 'Reference code']
+
+REQUIRED_COLUMNS = ['Date', 'Arriving by date', 'Booking date', 'Start date',
+  'Earnings year', 'Type']
+
+# In-memory dtypes of a loaded report, date columns aside
+EARNINGS_DTYPES = {
+  **{col: 'category' for col in CATEGORY_COLUMNS},
+  **{col: str for col in TEXT_COLUMNS},
+  **{col: 'Float64' for col in MONEY_COLUMNS},
+  **{col: 'Int64' for col in INTEGER_COLUMNS},
+}
+
+# Parse-time dtypes. Dates stay strings and numbers stay plain floats while parsing, since
+# the C parser is several times slower producing nullable arrays directly; `cast_columns`
+# converts them once the unneeded rows are gone.
+CSV_DTYPES = {
+  **EARNINGS_DTYPES,
+  **{col: str for col in DATE_COLUMNS},
+  **{col: 'float64' for col in MONEY_COLUMNS + INTEGER_COLUMNS},
+}
+
+
+def resolve_engine(engine: Optional[str] = 'auto') -> str:
+  """
+  Pick the CSV parser backend.
+
+  Args:
+    engine: 'auto', 'pyarrow', 'c' or None. 'auto' uses pyarrow when it is installed.
+
+  Returns:
+    str: engine name accepted by `pd.read_csv`
+  """
+  if engine in (None, 'auto', 'pyarrow'):
+    try:
+      import pyarrow  # noqa: F401
+      return 'pyarrow'
+    except ImportError:
+      return 'c'
+  return engine
+
+
+def validate_columns(columns: Iterable[str], required_columns: list[str] = REQUIRED_COLUMNS):
+  """
+  Raises:
+    FileProcessingError: any of the required columns is missing
+  """
+  columns = set(columns)
+  missing_columns = [col for col in required_columns if col not in columns]
+  if missing_columns:
+    raise FileProcessingError(f'CSV file is missing required columns: {", ".join(missing_columns)}')
+
+
+def parse_dates(values: pd.Series, column: str) -> pd.Series:
+  """
+  Parse a date column with `DATE_FORMAT`, then each of `FALLBACK_DATE_FORMATS`.
+
+  Raises:
+    FileProcessingError: no format parses every date of the column
+  """
+  for date_format in [DATE_FORMAT, *FALLBACK_DATE_FORMATS]:
+    try:
+      return pd.to_datetime(values, format=date_format)
+    except ValueError:
+      pass
+  raise FileProcessingError(f'Unable to parse the dates in column {column}; expected e.g. 12/15/23 or 12/15/2023')
+
+
+def cast_columns(df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Convert an export read with `CSV_DTYPES` to `EARNINGS_DTYPES` in place. Dates are parsed
+  with the fixed export formats instead of per-row format guessing.
+
+  Raises:
+    FileProcessingError: a date column matches none of the export formats
+  """
+  for col in DATE_COLUMNS:
+    if col in df.columns:
+      df[col] = parse_dates(df[col], col)
+  for col in MONEY_COLUMNS + INTEGER_COLUMNS:
+    if col in df.columns:
+      df[col] = df[col].astype(EARNINGS_DTYPES[col])
+  return df
+
+
+def concat_chunks(frames: list[pd.DataFrame]) -> pd.DataFrame:
+  """
+  Concatenate frames read with `CSV_DTYPES`. Categoricals are recoded onto the union of
+  all chunk categories first, so the result keeps categorical columns instead of falling
+  back to object strings. The input frames are left untouched.
+  """
+  frames = [frame for frame in frames if frame is not None]
+  if not frames:
+    return pd.DataFrame()
+  if len(frames) == 1:
+    return frames[0]
+
+  frames = [frame.copy(deep=False) for frame in frames]
+  for col in CATEGORY_COLUMNS:
+    if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames if col in frame.columns):
+      categories = sorted(set().union(*[frame[col].cat.categories for frame in frames if col in frame.columns]))
+      for frame in frames:
+        if col in frame.columns:
+          frame[col] = frame[col].cat.set_categories(categories)
+
+  return pd.concat(frames)
+
+
+@instrumented()
+def read_earnings_csv(
+  source,
+  engine: Optional[str] = 'auto',
+  types: Optional[list[str]] = None
+) -> pd.DataFrame:
+  """
+  Read an AirBnB earnings export through the fixed schema.
+
+  Args:
+    source: path or file-like object containing the CSV export
+    engine: parser backend, see `resolve_engine`
+    types: Optional list of `Type` values to keep, e.g. ['Reservation']
+
+  Returns:
+    DataFrame with categorical text, nullable numeric and datetime date columns
+
+  Raises:
+    FileProcessingError: the file is empty or malformed, required columns are missing or
+      dates can't be parsed
+  """
+  try:
+    df = pd.read_csv(source, engine=resolve_engine(engine), dtype=CSV_DTYPES)
+  except pd.errors.EmptyDataError:
+    raise FileProcessingError('The CSV file is empty')
+  except pd.errors.ParserError as e:
+    if 'Empty CSV file' in str(e):
+      # The pyarrow engine reports empty files as parser errors
+      raise FileProcessingError('The CSV file is empty')
+    raise FileProcessingError('Unable to parse the CSV file. Please ensure it is properly formatted')
+  validate_columns(df.columns)
+
+  if types is not None:
+    df = df[df['Type'].isin(types)].copy()
+  return cast_columns(df)
@@ -0,0 +1,240 @@
+"""
+Embedded SQL store for AirBnB earnings exports.
+
+Every transaction row (reservations, payouts and resolutions) is kept in a single
+`transactions` table with snake_case columns, next to prebuilt views that match
+`AirBnB.get_listing_stats` and `AirBnB.get_customer_stats`. DuckDB is used when it is
+installed, which runs queries in parallel and out of core; otherwise the standard
+library's SQLite.
+
+Usage:
+  python -m api.sql reports.db --load exports/*.csv
+  python -m api.sql reports.db --query "SELECT listing, SUM(gross_earnings) FROM transactions GROUP BY 1"
+"""
+import argparse
+import importlib.util
+import sqlite3
+import pandas as pd
+from typing import Iterable, Optional
+from .compact import row_keys
+from .exceptions import AirBnBError, FileProcessingError
+from .schema import (
+  CSV_DTYPES, DATE_COLUMNS, INTEGER_COLUMNS, MONEY_COLUMNS, REQUIRED_COLUMNS,
+  cast_columns, validate_columns
+)
+
+BACKENDS = ['duckdb', 'sqlite']
+DEFAULT_CHUNKSIZE = 100_000
+
+EXPORT_COLUMNS = ['Date', 'Arriving by date', 'Type', 'Confirmation code', 'Booking date',
+  'Start date', 'End date', 'Nights', 'Guest', 'Listing', 'Details', 'Reference code',
+  'Currency', 'Amount', 'Paid out', 'Service fee', 'Fast pay fee', 'Cleaning fee',
+  'Gross earnings', 'Occupancy taxes', 'Earnings year']
+
+# Export column -> SQL column
+SQL_COLUMNS = {col: col.lower().replace(' ', '_') for col in EXPORT_COLUMNS}
+
+
+def _column_type(col: str, backend: str) -> str:
+  if col in DATE_COLUMNS:
+    return 'DATE' if backend == 'duckdb' else 'TEXT'
+  if col in MONEY_COLUMNS:
+    return 'DOUBLE' if backend == 'duckdb' else 'REAL'
+  if col in INTEGER_COLUMNS:
+    return 'BIGINT' if backend == 'duckdb' else 'INTEGER'
+  return 'TEXT' if backend == 'sqlite' else 'VARCHAR'
+
+
+def _schema(backend: str) -> list[str]:
+  columns = ',\n  '.join(f'{SQL_COLUMNS[col]} {_column_type(col, backend)}' for col in EXPORT_COLUMNS)
+  return [
+    f'CREATE TABLE IF NOT EXISTS transactions (\n  row_key BIGINT PRIMARY KEY,\n  {columns}\n)',
+    """CREATE VIEW IF NOT EXISTS reservations AS
+SELECT * FROM transactions WHERE type = 'Reservation'""",
+    """CREATE VIEW IF NOT EXISTS listing_stats AS
+SELECT
+  listing AS "Listing",
+  COALESCE(SUM(nights), 0) AS "Nights_sum",
+  AVG(nights) AS "Nights_mean",
+  MAX(nights) AS "Nights_max",
+  COALESCE(SUM(amount), 0) AS "Amount_sum",
+  AVG(amount) AS "Amount_mean",
+  MAX(amount) AS "Amount_max",
+  COALESCE(SUM(paid_out), 0) AS "Paid out_sum",
+  COALESCE(SUM(service_fee), 0) AS "Service fee_sum",
+  COALESCE(SUM(fast_pay_fee), 0) AS "Fast pay fee_sum",
+  COALESCE(SUM(cleaning_fee), 0) AS "Cleaning fee_sum",
+  COALESCE(SUM(occupancy_taxes), 0) AS "Occupancy taxes_sum",
+  COUNT(DISTINCT guest) AS "Guest_nunique",
+  COUNT(guest) AS "Guest_count"
+FROM reservations
+WHERE listing IS NOT NULL
+GROUP BY listing""",
+    """CREATE VIEW IF NOT EXISTS customer_stats AS
+SELECT
+  guest AS "Guest",
+  COALESCE(SUM(gross_earnings), 0) AS "Total Gross Earnings",
+  AVG(gross_earnings) AS "Average Earnings per Booking",
+  COUNT(confirmation_code) AS "Bookings Executed",
+  COALESCE(SUM(nights), 0) AS "Total Nights"
+FROM reservations
+WHERE guest IS NOT NULL
+GROUP BY guest
+HAVING COUNT(*) > 1""",
+  ]
+
+
+def resolve_backend(backend: Optional[str] = 'auto') -> str:
+  """'auto' picks DuckDB when it is installed, otherwise SQLite."""
+  if backend in (None, 'auto'):
+    return 'duckdb' if importlib.util.find_spec('duckdb') is not None else 'sqlite'
+  if backend not in BACKENDS:
+    raise ValueError(f"Unsupported backend: {backend}. Choose from {', '.join(BACKENDS)}")
+  return backend
+
+
+class ReportStore:
+  """
+  File-backed (or in-memory) SQL database of earnings exports.
+
+  Rows are keyed by the hash of their `Confirmation code` and `Reference code`, so
+  loading overlapping exports keeps each transaction once.
+  """
+  def __init__(self, path: str = ':memory:', backend: Optional[str] = 'auto'):
+    self.path = path
+    self.backend = resolve_backend(backend)
+    if self.backend == 'duckdb':
+      import duckdb
+      self.connection = duckdb.connect(path)
+      self._errors = duckdb.Error
+    else:
+      self.connection = sqlite3.connect(path, check_same_thread=False)
+      self._errors = sqlite3.Error
+    for statement in _schema(self.backend):
+      self.connection.execute(statement)
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+    return False
+
+  def _to_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+    """`df` with SQL column names, every export column present and a signed row key."""
+    keys = row_keys(df)
+    if keys is None:
+      raise FileProcessingError('Rows need Confirmation code and Reference code columns to be stored')
+    rows = pd.DataFrame({'row_key': keys.view('int64')}, index=df.index)
+    for col in EXPORT_COLUMNS:
+      values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+      if col in DATE_COLUMNS and self.backend == 'sqlite':
+        values = pd.to_datetime(values).dt.strftime('%Y-%m-%d')
+      elif isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+      rows[SQL_COLUMNS[col]] = values
+    return rows
+
+  def load_frame(self, df: pd.DataFrame) -> int:
+    """
+    Insert the rows of an export frame, skipping transactions already stored.
+
+    Returns:
+      int: number of rows inserted
+    """
+    if len(df) == 0:
+      return 0
+    rows = self._to_rows(df)
+    columns = ', '.join(rows.columns)
+    before = self.count()
+    if self.backend == 'duckdb':
+      self.connection.register('_batch', rows)
+      try:
+        self.connection.execute(f'INSERT OR IGNORE INTO transactions ({columns}) SELECT {columns} FROM _batch')
+      finally:
+        self.connection.unregister('_batch')
+    else:
+      values = rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None)
+      placeholders = ', '.join('?' * len(rows.columns))
+      with self.connection:
+        self.connection.executemany(f'INSERT OR IGNORE INTO transactions ({columns}) VALUES ({placeholders})', values)
+    return self.count() - before
+
+  def load_csv(self, source, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+    """
+    Stream an export into the store `chunksize` rows at a time, keeping every
+    transaction type, so the whole file never sits in memory.
+
+    Returns:
+      int: number of rows inserted
+
+    Raises:
+      FileProcessingError: required columns are missing
+    """
+    inserted = 0
+    for i, chunk in enumerate(pd.read_csv(source, dtype=CSV_DTYPES, chunksize=chunksize)):
+      if i == 0:
+        validate_columns(chunk.columns, REQUIRED_COLUMNS)
+      inserted += self.load_frame(cast_columns(chunk))
+    return inserted
+
+  def count(self) -> int:
+    return self.connection.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+
+  def query(self, sql: str, params: Optional[Iterable] = None) -> pd.DataFrame:
+    """
+    Run a query and return its result as a DataFrame.
+
+    Raises:
+      AirBnBError: the query failed
+    """
+    try:
+      cursor = self.connection.execute(sql, list(params) if params is not None else [])
+      if self.backend == 'duckdb':
+        return cursor.df()
+      columns = [description[0] for description in cursor.description or []]
+      return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+    except self._errors as e:
+      raise AirBnBError(f"Query failed: {str(e)}")
+
+  def listing_stats(self) -> pd.DataFrame:
+    """Same table as `AirBnB.get_listing_stats`, computed by the database."""
+    return self.query('SELECT * FROM listing_stats ORDER BY "Listing"').set_index('Listing')
+
+  def customer_stats(self, top_customers: Optional[int] = None) -> pd.DataFrame:
+    """Same table as `AirBnB.get_customer_stats`, computed by the database."""
+    sql = 'SELECT * FROM customer_stats ORDER BY "Total Gross Earnings" DESC, "Guest"'
+    if top_customers:
+      sql += f' LIMIT {int(top_customers)}'
+    return self.query(sql).set_index('Guest')
+
+
+def main(argv: Optional[list[str]] = None):
+  parser = argparse.ArgumentParser(
+    prog='python -m api.sql',
+    description='Load AirBnB earnings exports into an embedded SQL database and query them.'
+  )
+  parser.add_argument('database', help="database file, or ':memory:'")
+  parser.add_argument('--load', nargs='*', default=[], help='CSV exports or directories to load')
+  parser.add_argument('--query', default=None, help='SQL to run after loading')
+  parser.add_argument('--backend', default='auto', choices=['auto'] + BACKENDS)
+  args = parser.parse_args(argv)
+
+  from .batch import find_reports
+
+  try:
+    with ReportStore(args.database, backend=args.backend) as store:
+      for path in find_reports(args.load) if args.load else []:
+        print(f'{path}: {store.load_csv(path)} new rows')
+      if args.query:
+        with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', 200):
+          print(store.query(args.query))
+  except (AirBnBError, ValueError) as e:
+    parser.exit(1, f'error: {e}\n')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from .exceptions import DataFrameError
+
+# Supported rollup granularities; 'year' buckets by the export's `Earnings year`
+FREQUENCIES = ['day', 'week', 'month', 'year']
+
+TIME_SERIES_COLUMNS = ['Start date', 'Nights', 'Gross earnings']
+
+
+def _to_days(values) -> np.ndarray:
+  """Datetime-like values as datetime64[D], with NaT preserved."""
+  return np.asarray(values, dtype='datetime64[D]')
+
+
+def _truncate(days: np.ndarray, freq: str) -> np.ndarray:
+  """Truncate datetime64[D] values to the start of their day, week (Monday) or month."""
+  if freq == 'day':
+    return days
+  if freq == 'month':
+    return days.astype('datetime64[M]').astype('datetime64[D]')
+  if freq == 'week':
+    # 1970-01-01 was a Thursday, so shifting by 3 makes weeks start on Monday
+    ordinals = days.astype('int64')
+    return (ordinals - (ordinals + 3) % 7).astype('datetime64[D]')
+  raise ValueError(f"Unsupported frequency: {freq}")
+
+
+def _period_days(periods: np.ndarray, freq: str) -> np.ndarray:
+  if freq == 'day':
+    return np.ones(len(periods), dtype='int64')
+  if freq == 'week':
+    return np.full(len(periods), 7, dtype='int64')
+  months = periods.astype('datetime64[M]')
+  return ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype('int64')
+
+
+def expand_nights(start: np.ndarray, nights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Expand stays into one entry per booked night without a Python loop.
+
+  Args:
+    start: datetime64[D] check-in dates
+    nights: number of nights of each stay
+
+  Returns:
+    tuple: (row position of the stay for each night, datetime64[D] date of each night)
+  """
+  nights = np.where(np.isnat(start), 0, np.clip(nights, 0, None)).astype('int64')
+  rows = np.repeat(np.arange(len(nights)), nights)
+  # Offset of each night within its stay: 0, 1, ..., nights - 1
+  offsets = np.arange(nights.sum()) - np.repeat(np.cumsum(nights) - nights, nights)
+  return rows, start[rows] + offsets.astype('timedelta64[D]')
+
+
+class CalendarIndex:
+  """
+  Reservation positions ordered by a date column.
+
+  Built once per report, it turns a date-range filter into two binary searches and a
+  take of the matching rows instead of a boolean mask over the whole frame.
+  """
+  def __init__(self, df: pd.DataFrame, date_column: str = 'Start date'):
+    if date_column not in df.columns:
+      raise DataFrameError(f"Missing required column: {date_column}")
+
+    days = _to_days(df[date_column])
+    valid = ~np.isnat(days)
+    self.date_column = date_column
+    self.order = np.flatnonzero(valid)[np.argsort(days[valid], kind='stable')]
+    self.dates = days[self.order]
+
+  def bounds(self) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    """Earliest and latest date in the index, or None when it is empty."""
+    if len(self.dates) == 0:
+      return None
+    return pd.Timestamp(self.dates[0]), pd.Timestamp(self.dates[-1])
+
+  def positions(self, start=None, end=None) -> np.ndarray:
+    """
+    Row positions whose date falls within [start, end], both inclusive and optional,
+    in date order.
+    """
+    lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'D'), side='left')
+    hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'D'), side='right')
+    return self.order[lo:hi]
+
+  def slice(self, df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    return df.iloc[self.positions(start, end)]
+
+
+def rollup(df: pd.DataFrame, freq: str = 'month', by_listing: bool = False) -> pd.DataFrame:
+  """
+  Bucket bookings, earnings and booked nights over time.
+
+  Bookings and gross earnings are attributed to the bucket of each stay's `Start date`,
+  while nights are expanded stay by stay and attributed to the bucket each night falls
+  in, so a stay crossing a month end counts towards both months. Day, week and month
+  buckets also report `occupancy`, the share of the bucket's available listing-nights
+  that were booked.
+  The 'year' bucket groups by the export's `Earnings year`.
+
+  Args:
+    df: reservations DataFrame
+    freq: one of 'day', 'week', 'month', 'year'
+    by_listing: split every bucket per `Listing`
+
+  Returns:
+    DataFrame indexed by period (and Listing) with bookings, earnings and nights
+
+  Raises:
+    DataFrameError: required columns missing
+    ValueError: unknown frequency
+  """
+  if freq not in FREQUENCIES:
+    raise ValueError(f"Unsupported frequency: {freq}. Choose from {', '.join(FREQUENCIES)}")
+
+  required_columns = TIME_SERIES_COLUMNS + (['Listing'] if by_listing else []) \
+    + (['Earnings year'] if freq == 'year' else [])
+  missing_columns = [col for col in required_columns if col not in df.columns]
+  if missing_columns:
+    raise DataFrameError(f"Missing required columns: {', '.join(missing_columns)}")
+
+  keys = ['Listing'] if by_listing else []
+  period_name = 'Earnings year' if freq == 'year' else 'Period'
+  listing = df['Listing'].to_numpy() if by_listing else None
+  nights = df['Nights'].to_numpy(dtype='float64', na_value=0)
+
+  if freq == 'year':
+    periods = df['Earnings year'].to_numpy()
+    booked = pd.DataFrame({'period': periods, 'nights': nights})
+  else:
+    start = _to_days(df['Start date'])
+    periods = _truncate(start, freq)
+    rows, night_dates = expand_nights(start, nights)
+    booked = pd.DataFrame({'period': _truncate(night_dates, freq), 'nights': 1})
+    if by_listing:
+      booked['Listing'] = listing[rows]
+
+  stays = pd.DataFrame({
+    'period': periods,
+    'bookings': 1,
+    'earnings': df['Gross earnings'].to_numpy(dtype='float64', na_value=0),
+  })
+  if by_listing:
+    stays['Listing'] = listing
+
+  grouped_stays = stays.groupby(keys + ['period'], observed=True)[['bookings', 'earnings']].sum()
+  grouped_nights = booked.groupby(keys + ['period'], observed=True)['nights'].sum()
+  result = grouped_stays.join(grouped_nights, how='outer').fillna(0)
+  result['bookings'] = result['bookings'].astype('int64')
+  result.index = result.index.set_names(keys + [period_name])
+
+  if freq != 'year':
+    period_days = _period_days(result.index.get_level_values(period_name).to_numpy(dtype='datetime64[D]'), freq)
+    listings = 1 if by_listing or 'Listing' not in df.columns else max(df['Listing'].nunique(), 1)
+    result['occupancy'] = result['nights'] / (period_days * listings)
+  return result.sort_index()
@@ -0,0 +1,188 @@
+"""
+Time and measure the memory of every stage of a report, from CSV ingestion to each
+AirBnB analysis, on synthetic exports of increasing size.
+
+Each size runs twice in fresh interpreters: once for the wall time of every stage, and
+once under tracemalloc for the peak memory each stage allocates (Python and numpy
+allocations), since tracing slows pandas down too much to time it at the same time.
+The peak resident memory of the timing run is recorded as well. Results can be saved and compared
+against a previous run to catch regressions.
+
+Usage:
+  python benchmarks/bench_analysis.py --sizes 10k 1m
+  python benchmarks/bench_analysis.py --sizes 1m --output bench.json
+  python benchmarks/bench_analysis.py --sizes 1m --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_export import generate_export, parse_rows  # noqa: E402
+
+DEFAULT_SIZES = ['10k', '1m']
+
+
+def _stages(path: str):
+  """(name, callable) pairs run in order; later stages reuse the report built earlier."""
+  sys.path.insert(0, ROOT)
+  from api.AirBnB import AirBnB
+  from api.schema import read_earnings_csv
+
+  state = {}
+
+  def ingest():
+    state['df'] = read_earnings_csv(path, types=['Reservation'])
+    return len(state['df'])
+
+  def build():
+    state['bnb'] = AirBnB(state['df'])
+    return state['bnb'].length
+
+  def compact():
+    return len(AirBnB(state['df'], compact=True).df)
+
+  def call(name, *args, **kwargs):
+    return lambda: getattr(state['bnb'], name)(*args, **kwargs)
+
+  def date_range():
+    start, end = state['bnb'].calendar.bounds()
+    state['bnb'].set_date_range(start, start + (end - start) / 2)
+    result = len(state['bnb'].active_df)
+    state['bnb'].set_date_range()
+    return result
+
+  return [
+    ('ingest', ingest),
+    ('build', build),
+    ('basic_earnings', call('get_basic_earnings')),
+    ('performance_stats', call('get_performance_stats')),
+    ('listing_stats', call('get_listing_stats')),
+    ('customer_stats', call('get_customer_stats', top_customers=10)),
+    ('time_series', call('get_time_series', freq='month')),
+    ('occupancy_stats', call('get_occupancy_stats')),
+    ('lead_times', call('get_lead_times')),
+    ('lead_time_breakdown', call('get_lead_time_breakdown', by='listing')),
+    ('forecast', call('get_forecast', by_listing=True)),
+    ('nights_histogram', call('get_histogram', 'Nights', (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, float('inf')))),
+    ('date_range', date_range),
+    ('compact', compact),
+  ]
+
+
+def time_stages(path: str) -> dict:
+  stages = {}
+  for name, stage in _stages(path):
+    start = time.perf_counter()
+    stage()
+    stages[name] = round(time.perf_counter() - start, 4)
+  # ru_maxrss is reported in kilobytes on Linux
+  return {'seconds': stages, 'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)}
+
+
+def trace_stages(path: str) -> dict:
+  stages = {}
+  tracemalloc.start()
+  for name, stage in _stages(path):
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    stages[name] = round((peak - before) / 2**20, 2)
+  tracemalloc.stop()
+  return {'peak_mb': stages}
+
+
+def _run(path: str, mode: str) -> dict | None:
+  proc = subprocess.run([sys.executable, __file__, '--file', path, '--mode', mode], capture_output=True, text=True)
+  if proc.returncode != 0:
+    print(f'{os.path.basename(path)} ({mode}): failed\n{proc.stderr}', file=sys.stderr)
+    return None
+  return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_size(path: str, rows: int) -> dict | None:
+  timed, traced = _run(path, 'time'), _run(path, 'memory')
+  if timed is None or traced is None:
+    return None
+  return {
+    'rows': rows,
+    'stages': [
+      {'stage': name, 'seconds': seconds, 'peak_mb': traced['peak_mb'].get(name)}
+      for name, seconds in timed['seconds'].items()
+    ],
+    'peak_rss_mb': timed['peak_rss_mb'],
+  }
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+  """Stages that got slower than the baseline by more than `tolerance` (e.g. 0.25 = 25%)."""
+  previous = {(r['rows'], s['stage']): s for r in baseline for s in r['stages']}
+  regressions = []
+  for r in results:
+    for s in r['stages']:
+      old = previous.get((r['rows'], s['stage']))
+      # Sub-millisecond stages are too noisy to compare
+      if old is None or old['seconds'] < 0.001:
+        continue
+      if s['seconds'] > old['seconds'] * (1 + tolerance):
+        regressions.append(f"{r['rows']} rows, {s['stage']}: {old['seconds']:.4f}s -> {s['seconds']:.4f}s")
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="rows per export, e.g. 10k 1m 10m")
+  parser.add_argument('--data-dir', default=None, help='keep generated exports here and reuse them')
+  parser.add_argument('--output', default=None, help='write the results as JSON')
+  parser.add_argument('--baseline', default=None, help='results JSON of an earlier run to compare against')
+  parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline')
+  parser.add_argument('--file', help=argparse.SUPPRESS)
+  parser.add_argument('--mode', choices=['time', 'memory'], help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.file:
+    print(json.dumps(time_stages(args.file) if args.mode == 'time' else trace_stages(args.file)))
+    return
+
+  results = []
+  with tempfile.TemporaryDirectory() as tmp:
+    data_dir = args.data_dir or tmp
+    os.makedirs(data_dir, exist_ok=True)
+    for size in args.sizes:
+      rows = parse_rows(size)
+      path = os.path.join(data_dir, f'earnings-{rows}.csv')
+      if not os.path.exists(path):
+        generate_export(path, rows)
+      result = run_size(path, rows)
+      if result is not None:
+        results.append(result)
+
+  for r in results:
+    print(f"\n{r['rows']:,} rows (peak RSS {r['peak_rss_mb']:.1f} MB)")
+    print(f"{'stage':<22}{'seconds':>10}{'peak MB':>10}")
+    for s in r['stages']:
+      print(f"{s['stage']:<22}{s['seconds']:>10.4f}{s['peak_mb']:>10.2f}")
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(results, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+      print('\nRegressions:\n  ' + '\n  '.join(regressions), file=sys.stderr)
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
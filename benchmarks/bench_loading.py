@@ -0,0 +1,95 @@
+"""
+Compare the legacy report loading path against the schema-based loader.
+
+Each case runs in a fresh interpreter so the peak resident memory it reports is its own.
+
+Usage:
+  python benchmarks/bench_loading.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DUMMY_FILE = os.path.join(ROOT, 'data', 'airbnb-dummy-data-full.csv')
+CASES = ['legacy', 'schema-c', 'schema-pyarrow']
+
+
+def make_input(rows: int, path: str):
+  """Write a CSV of roughly `rows` rows by repeating the dummy export's body."""
+  with open(DUMMY_FILE) as f:
+    header, *body = f.read().splitlines()
+  repeats = max(rows // len(body), 1)
+  with open(path, 'w') as f:
+    f.write(header + '\n')
+    block = '\n'.join(body) + '\n'
+    for _ in range(repeats):
+      f.write(block)
+
+
+def run_case(case: str, path: str) -> dict:
+  import pandas as pd
+  sys.path.insert(0, ROOT)
+  from api.schema import read_earnings_csv
+
+  start = time.perf_counter()
+  if case == 'legacy':
+    date_columns = ['Date', 'Arriving by date', 'Booking date', 'Start date', 'Earnings year']
+    bnb_df = pd.read_csv(path, parse_dates=date_columns)
+    bnb_df['Earnings year'] = bnb_df['Earnings year'].dt.year
+    df = bnb_df[bnb_df['Type'] == 'Reservation']
+  else:
+    df = read_earnings_csv(path, engine=case.split('-')[1], types=['Reservation'])
+  elapsed = time.perf_counter() - start
+
+  return {
+    'case': case,
+    'rows': len(df),
+    'seconds': round(elapsed, 4),
+    'frame_mb': round(df.memory_usage(deep=True).sum() / 2**20, 2),
+    # ru_maxrss is reported in kilobytes on Linux
+    'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--rows', type=int, default=200_000)
+  parser.add_argument('--case', choices=CASES, help=argparse.SUPPRESS)
+  parser.add_argument('--file', help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.case:
+    print(json.dumps(run_case(args.case, args.file)))
+    return
+
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'earnings.csv')
+    make_input(args.rows, path)
+
+    results = []
+    for case in CASES:
+      proc = subprocess.run(
+        [sys.executable, __file__, '--case', case, '--file', path],
+        capture_output=True, text=True
+      )
+      if proc.returncode != 0:
+        print(f'{case}: failed\n{proc.stderr}', file=sys.stderr)
+        continue
+      results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+  baseline = next((r for r in results if r['case'] == 'legacy'), None)
+  print(f"{'case':<16}{'rows':>10}{'seconds':>10}{'speedup':>9}{'frame MB':>10}{'peak RSS MB':>13}")
+  for r in results:
+    speedup = baseline['seconds'] / r['seconds'] if baseline else float('nan')
+    print(f"{r['case']:<16}{r['rows']:>10}{r['seconds']:>10.3f}{speedup:>8.1f}x"
+      f"{r['frame_mb']:>10.2f}{r['peak_rss_mb']:>13.2f}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,233 @@
+"""
+Generate synthetic AirBnB earnings exports for benchmarking.
+
+The output has the exact column layout and date format of a real export: reservations
+interleaved with payouts and resolution rows, sorted by date, with a configurable share
+of bookings made by returning guests.
+
+Usage:
+  python benchmarks/generate_export.py 1m -o earnings-1m.csv
+  python benchmarks/generate_export.py 10000 --listings 50 --repeat-ratio 0.4
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Date', 'Arriving by date', 'Type', 'Confirmation code', 'Booking date', 'Start date',
+  'End date', 'Nights', 'Guest', 'Listing', 'Details', 'Reference code', 'Currency', 'Amount',
+  'Paid out', 'Service fee', 'Fast pay fee', 'Cleaning fee', 'Gross earnings',
+  'Occupancy taxes', 'Earnings year']
+
+NUMERIC_COLUMNS = ['Nights', 'Amount', 'Paid out', 'Service fee', 'Fast pay fee', 'Cleaning fee',
+  'Gross earnings', 'Occupancy taxes']
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+DEFAULT_CHUNKSIZE = 250_000
+
+FIRST_NAMES = ['Maria', 'John', 'David', 'Sarah', 'Mohammed', 'Yuki', 'Ana', 'James', 'Li', 'Priya',
+  'Carlos', 'Emma', 'Noah', 'Fatima', 'Kenji', 'Olivia', 'Miguel', 'Sofia', 'Liam', 'Aisha']
+LAST_NAMES = ['Garcia', 'Smith', 'Kim', 'Johnson', 'Ahmed', 'Tanaka', 'Santos', 'Brown', 'Wei', 'Patel',
+  'Reyes', 'Wilson', 'Lee', 'Khan', 'Sato', 'Cruz', 'Lopez', 'Rossi', 'Nguyen', 'Okafor']
+LISTING_KINDS = ['Cozy Studio', 'Luxury Condo', 'Modern 2BR Apartment', 'Beachfront Villa',
+  'Peaceful Garden House', 'Downtown Loft', 'Mountain Cabin', 'Family Townhouse']
+LISTING_AREAS = ['Makati', 'BGC', 'Cebu', 'Baguio', 'Palawan', 'Tagaytay', 'Siargao', 'Quezon City']
+
+ALPHABET = np.frombuffer(b'0123456789abcdefghijklmnopqrstuvwxyz', dtype='uint8')
+
+
+def parse_rows(value: str) -> int:
+  """Accept '10k', '1m', '10m' or a plain number of rows."""
+  return SIZES.get(value.lower()) or int(value.replace('_', ''))
+
+
+def _codes(ids: np.ndarray, width: int, multiplier: int) -> np.ndarray:
+  """Distinct base-36 codes for distinct ids below 36**width, scrambled so they look random."""
+  space = 36 ** width
+  # Multiplying by a constant coprime with 36 permutes [0, space); writing the fast-changing
+  # low digits first hides that consecutive ids map to evenly spaced values
+  values = (ids.astype('uint64') * np.uint64(multiplier)) % np.uint64(space)
+  chars = np.empty((len(ids), width), dtype='uint8')
+  for position in range(width):
+    chars[:, position] = ALPHABET[(values % np.uint64(36)).astype('int64')]
+    values //= np.uint64(36)
+  return chars.view(f'S{width}').ravel().astype(f'U{width}')
+
+
+def _date_strings(days: np.ndarray) -> np.ndarray:
+  """Format datetime64[D] values the way the export does, e.g. 1/5/24."""
+  first, last = days.min(), days.max()
+  calendar = pd.date_range(first, last, freq='D')
+  table = np.array([f'{d.month}/{d.day}/{d.year % 100:02d}' for d in calendar], dtype=object)
+  return table[(days - first).astype('int64')]
+
+
+def _guest_names(ids: np.ndarray) -> np.ndarray:
+  n_first, n_last = len(FIRST_NAMES), len(LAST_NAMES)
+  names = (np.array(FIRST_NAMES, dtype=object)[ids % n_first] + ' '
+    + np.array(LAST_NAMES, dtype=object)[(ids // n_first) % n_last])
+  # Guests beyond the first/last name combinations get a numeric suffix
+  overflow = ids >= n_first * n_last
+  names[overflow] = names[overflow] + ' ' + (ids[overflow] // (n_first * n_last)).astype(str).astype(object)
+  return names
+
+
+def listing_names(listings: int) -> list[str]:
+  names = []
+  for i in range(listings):
+    kind = LISTING_KINDS[i % len(LISTING_KINDS)]
+    area = LISTING_AREAS[(i // len(LISTING_KINDS)) % len(LISTING_AREAS)]
+    suffix = i // (len(LISTING_KINDS) * len(LISTING_AREAS))
+    names.append(f'{kind} in {area}' + (f' {suffix + 1}' if suffix else ''))
+  return names
+
+
+def generate_chunk(
+  rng: np.random.Generator,
+  first_row: int,
+  rows: int,
+  first_day: np.datetime64,
+  span_days: int,
+  listings: int,
+  guests: int,
+  repeat_ratio: float,
+  payout_ratio: float,
+  adjustment_ratio: float
+) -> pd.DataFrame:
+  """Generate `rows` export rows dated within `span_days` of `first_day`, sorted by date."""
+  row_ids = np.arange(first_row, first_row + rows)
+  weights = np.array([1.0, payout_ratio, adjustment_ratio / 2, adjustment_ratio / 2])
+  kinds = rng.choice(4, size=rows, p=weights / weights.sum())
+  dates = np.sort(first_day + rng.integers(0, max(span_days, 1), size=rows).astype('timedelta64[D]'))
+
+  # Numbers are kept as floats so that missing values are written as empty fields
+  df = pd.DataFrame({col: pd.Series([None] * rows, dtype=object) for col in COLUMNS})
+  for col in NUMERIC_COLUMNS:
+    df[col] = np.nan
+  date_strings = _date_strings(dates)
+  df['Date'] = date_strings
+  df['Type'] = np.array(['Reservation', 'Payout', 'Resolution Adjustment', 'Resolution Payout'])[kinds]
+  df['Reference code'] = _codes(row_ids, 10, multiplier=2_654_435_761)
+  df['Currency'] = 'PHP'
+  df['Earnings year'] = dates.astype('datetime64[Y]').astype('int64') + 1970
+
+  # Reservations: the row is dated the day before arrival
+  reservation = np.flatnonzero(kinds == 0)
+  n = len(reservation)
+  start = dates[reservation] + np.timedelta64(1, 'D')
+  nights = np.minimum(rng.geometric(0.25, size=n), 30)
+  lead = np.minimum(rng.gamma(2.0, 9.0, size=n).astype('int64') + 1, 365)
+  listing = rng.integers(0, listings, size=n)
+  regulars = max(guests // 10, 1)
+  guest = np.where(
+    rng.random(n) < repeat_ratio,
+    rng.integers(0, regulars, size=n),
+    rng.integers(regulars, max(guests, regulars + 1), size=n)
+  )
+  nightly_rate = 900 + (listing * 7919) % 2100
+  cleaning_fee = 800 + (listing * 104_729) % 1200
+  amount = (nightly_rate * nights).astype('float64')
+
+  df.loc[reservation, 'Arriving by date'] = date_strings[reservation]
+  df.loc[reservation, 'Confirmation code'] = 'HM' + _codes(row_ids[reservation], 8, multiplier=2_246_822_519).astype(object)
+  df.loc[reservation, 'Booking date'] = _date_strings(start - lead.astype('timedelta64[D]'))
+  df.loc[reservation, 'Start date'] = _date_strings(start)
+  df.loc[reservation, 'End date'] = _date_strings(start + nights.astype('timedelta64[D]'))
+  df.loc[reservation, 'Nights'] = nights
+  df.loc[reservation, 'Guest'] = _guest_names(guest)
+  df.loc[reservation, 'Listing'] = np.array(listing_names(listings), dtype=object)[listing]
+  df.loc[reservation, 'Amount'] = amount
+  df.loc[reservation, 'Service fee'] = np.round(amount * 0.15)
+  df.loc[reservation, 'Fast pay fee'] = np.round(amount * 0.01)
+  df.loc[reservation, 'Cleaning fee'] = cleaning_fee
+  df.loc[reservation, 'Gross earnings'] = amount + cleaning_fee
+  df.loc[reservation, 'Occupancy taxes'] = np.round(amount * 0.12)
+
+  payout = np.flatnonzero(kinds == 1)
+  df.loc[payout, 'Details'] = 'Transfer to Bank Account (PHP)'
+  df.loc[payout, 'Amount'] = -rng.integers(5, 50, size=len(payout)) * 100.0
+  df.loc[payout, 'Paid out'] = rng.integers(20, 200, size=len(payout)) * 100.0
+
+  adjustment = np.flatnonzero(kinds == 2)
+  df.loc[adjustment, 'Amount'] = -rng.integers(1, 20, size=len(adjustment)) * 100.0
+  resolution_payout = np.flatnonzero(kinds == 3)
+  df.loc[resolution_payout, 'Amount'] = rng.integers(1, 20, size=len(resolution_payout)) * 100.0
+  return df
+
+
+def generate_export(
+  path: str,
+  rows: int,
+  listings: int = 20,
+  guests: int | None = None,
+  repeat_ratio: float = 0.3,
+  payout_ratio: float = 0.6,
+  adjustment_ratio: float = 0.1,
+  start: str = '2021-01-01',
+  years: float = 3,
+  seed: int = 0,
+  chunksize: int = DEFAULT_CHUNKSIZE
+) -> str:
+  """
+  Write a synthetic earnings export to `path`, `chunksize` rows at a time.
+
+  Args:
+    rows: total number of rows, all transaction types included
+    listings: number of distinct listings
+    guests: number of distinct guests, defaults to half the reservations
+    repeat_ratio: share of reservations made by a small pool of returning guests
+    payout_ratio: payout rows per reservation
+    adjustment_ratio: resolution adjustment and resolution payout rows per reservation
+    start: first date of the export
+    years: time span covered by the export
+    seed: random seed; the same arguments always produce the same file
+
+  Returns:
+    str: `path`
+  """
+  if guests is None:
+    guests = max(int(rows / (1 + payout_ratio + adjustment_ratio) / 2), 1)
+  first_day = np.datetime64(start, 'D')
+  total_days = int(years * 365)
+  chunks = max(-(-rows // chunksize), 1)
+
+  with open(path, 'w', newline='') as f:
+    for i in range(chunks):
+      first_row = i * chunksize
+      n = min(chunksize, rows - first_row)
+      # Each chunk covers its own slice of the time span, which keeps the file sorted by date
+      chunk_first_day = first_day + np.timedelta64(total_days * i // chunks, 'D')
+      span = total_days * (i + 1) // chunks - total_days * i // chunks
+      df = generate_chunk(
+        np.random.default_rng([seed, i]), first_row, n, chunk_first_day, span,
+        listings, guests, repeat_ratio, payout_ratio, adjustment_ratio
+      )
+      df.to_csv(f, header=(i == 0), index=False, float_format='%.0f')
+  return path
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('rows', type=parse_rows, help="number of rows, or one of '10k', '1m', '10m'")
+  parser.add_argument('-o', '--output', default=None, help='output CSV (default: earnings-<rows>.csv)')
+  parser.add_argument('--listings', type=int, default=20)
+  parser.add_argument('--guests', type=int, default=None)
+  parser.add_argument('--repeat-ratio', type=float, default=0.3)
+  parser.add_argument('--payout-ratio', type=float, default=0.6)
+  parser.add_argument('--adjustment-ratio', type=float, default=0.1)
+  parser.add_argument('--start', default='2021-01-01')
+  parser.add_argument('--years', type=float, default=3)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+  args = parser.parse_args()
+
+  output = args.output or f'earnings-{args.rows}.csv'
+  generate_export(
+    output, args.rows, listings=args.listings, guests=args.guests, repeat_ratio=args.repeat_ratio,
+    payout_ratio=args.payout_ratio, adjustment_ratio=args.adjustment_ratio, start=args.start,
+    years=args.years, seed=args.seed, chunksize=args.chunksize
+  )
+  print(output)
+
+
+if __name__ == '__main__':
+  main()
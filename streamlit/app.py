@@ -3,10 +3,19 @@ os.sys.path.insert(0, os.getcwd())
 
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from api.AirBnB import AirBnB
-from scripts.process_file import process_airbnb_file, process_dummy_file
-from scripts.graphs import make_twin_graph, make_histogram
+from api.currency import load_fx_rates
+from api.exceptions import AirBnBError
+from api.instrument import Recorder, recording
+from scripts.jobs import JobCancelled, cancel_job, current_job, poll_job, start_job
+from api.disk_cache import content_key
+from api.result_cache import get_result_cache
+from scripts.process_file import DUMMY_FILE, process_airbnb_file, process_dummy_file
+from scripts.tables import (
+  cached_table, cohort_table, customer_table, fiscal_table, forecast_table, lead_time_table, occupancy_table,
+  payout_table, performance_table, show_table
+)
+from scripts.graphs import render_twin_graph, render_histogram, make_twin_chart_altair, make_histogram_altair
 
 st.set_page_config(
   page_title="AirBnB Analyzer",
@@ -26,6 +35,81 @@ if 'bnb_report' not in st.session_state:
 #   </style>
 # """, unsafe_allow_html=True)
 
+NIGHTS_EDGES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, float('inf'))
+NIGHTS_LABELS = ('1', '2', '3', '4', '5', '6', '7', '8', '9', '10+')
+LEAD_TIME_EDGES = (0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, float('inf'))
+LEAD_TIME_LABELS = ('0-5', '6-10', '11-15', '16-20', '21-25', '26-30', '31-35', '36-40', '41-45', '45-50', '50>')
+
+def lead_time_histogram(bnb: AirBnB):
+  return bnb.get_lead_time_histogram(LEAD_TIME_EDGES, labels=LEAD_TIME_LABELS, right=True, include_lowest=True)
+
+def report_sections(top_customers: int) -> dict:
+  """
+  Getters behind each section of the page, in page order, called with the same arguments
+  as the page so background jobs leave their results memoized for it.
+  """
+  return {
+    'earnings': lambda bnb: bnb.get_basic_earnings(),
+    'time_series': lambda bnb: bnb.get_time_series(freq='month'),
+    'performance': lambda bnb: (bnb.get_performance_stats(), bnb.get_histogram('Nights', NIGHTS_EDGES, labels=NIGHTS_LABELS)),
+    'listing': lambda bnb: (bnb.get_listing_stats(), bnb.get_occupancy_stats(None, None)),
+    'payouts': lambda bnb: bnb.get_reconciliation() if bnb.ledger is not None else None,
+    'customers': lambda bnb: (bnb.get_customer_stats(top_customers=top_customers), bnb.get_retention(), bnb.get_cohorts(normalize=True)),
+    'bookings': lambda bnb: (lead_time_histogram(bnb), bnb.get_lead_time_breakdown(by='listing'), bnb.get_lead_time_breakdown(by='month')),
+    'forecast': lambda bnb: (bnb.get_forecast(), bnb.get_forecast(by_listing=True)),
+  }
+
+@st.cache_resource
+def fx_rates():
+  """Exchange rates shared by every session, see `api.currency.load_fx_rates`."""
+  return load_fx_rates()
+
+def money(value: float, currency: str) -> str:
+  return '{} {:,.0f}'.format(currency, value).strip()
+
+def load_uploads(job, uploads: list, currency: str | None, rates) -> AirBnB:
+  """
+  Build one report from uploaded files on a job thread; reservations repeated across
+  uploads are kept once. Large uploads are streamed, reporting progress through `job`.
+  Amounts are reported in `currency`, or the uploads' most common one.
+  """
+  bnb = AirBnB(pd.DataFrame(), compact=True)
+  for i, uploaded_file in enumerate(uploads):
+    job.reading(i / len(uploads))
+    try:
+      # Reports of the same uploads share their results with every other session
+      key = content_key(uploaded_file.getbuffer())
+      bnb.append(
+        process_airbnb_file(
+          uploaded_file, compact=True, cache_key=key,
+          progress_callback=lambda fraction, i=i: job.reading((i + fraction) / len(uploads))
+        ),
+        content_key=key
+      )
+    except JobCancelled:
+      raise
+    except Exception as e:
+      job.errors.append(f"Error processing {uploaded_file.name}: {str(e)}")
+  bnb.consolidate()
+  if bnb.length is not None and rates is not None and bnb.currencies:
+    try:
+      bnb.set_currency(currency if currency in bnb.currencies + rates.currencies else bnb.currencies[0], rates)
+    except AirBnBError as e:
+      job.errors.append(f"Error converting currencies: {str(e)}")
+  return bnb
+
+def section_ready(name: str) -> bool:
+  """
+  Whether the page can draw section `name`. While a background job is still computing
+  it, show the job's progress and poll it instead.
+  """
+  job = current_job()
+  if job is None or job.report is not st.session_state.bnb_report or job.ready(name):
+    return True
+  st.progress(job.progress(), text='Analyzing report...')
+  poll_job(job, job.progress())
+  return False
+
 def results_section(processed_file_output):
   pass
 
@@ -40,10 +124,10 @@ def main():
     \tb. Click 'View All Paid'\n
     \tc. Click 'Get CSV Report'\n
     \td. For full functionality, do not tick off anything and instead Select All.\n
-    2. Place the extracted report in the file uploader below and click 'Accept'.
+    2. Place the extracted report in the file uploader below and click 'Accept'. Reports from several accounts or periods can be uploaded together.
   """, icon="ℹ️")
 
-  file_upload = st.file_uploader("Upload file here", accept_multiple_files=False, type='csv')
+  file_upload = st.file_uploader("Upload file here", accept_multiple_files=True, type='csv')
   process_col, preview_col, extra_col1 = st.columns([1,1,5])
   with process_col:
     process_button = st.button("Process", type="primary", disabled=not file_upload)
@@ -52,23 +136,49 @@ def main():
       help="Show output with a dummy dataset.")
     
   # Create a separate button without on_click
-  if file_upload is not None:
+  if file_upload:
     if process_button:
-      try:
-        # Create an instance of AirBnB class
-        bnb = AirBnB(pd.DataFrame())
-        st.session_state['bnb_report'] = AirBnB(process_airbnb_file(file_upload))
-      except Exception as e:
-          st.error(f"Error processing file: {str(e)}")
+      # Parsing and analysis run on a worker thread and the page fills in as sections
+      # finish; clicking again cancels the run in progress
+      uploads = list(file_upload)
+      currency, rates = st.session_state.get('currency'), fx_rates()
+      start_job(
+        lambda job: load_uploads(job, uploads, currency, rates),
+        report_sections(st.session_state.get('top_customers', 10))
+      )
   
   if preview_button:
+    cancel_job()
     try:
       # Create an instance of AirBnB class
       bnb = AirBnB(pd.DataFrame())
-      st.session_state['bnb_report'] = AirBnB(process_dummy_file())
+      st.session_state['bnb_report'] = AirBnB(
+        process_dummy_file(compact=True), compact=True, content_key=content_key(DUMMY_FILE)
+      )
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
 
+  job = current_job()
+  if job is not None:
+    if job.report is not None:
+      st.session_state['bnb_report'] = job.report
+    if not job.running:
+      for message in job.errors:
+        st.error(message)
+      if job.failure is not None:
+        st.error(f"Error processing file: {str(job.failure)}")
+      # Finished; its errors were shown once
+      cancel_job()
+    elif job.report is None:
+      st.progress(job.progress(), text=f"Reading reports... {job.read:.0%}")
+      poll_job(job, job.progress())
+  # The report can't be filtered while a job is still filling its caches
+  report_busy = current_job() is not None
+  try:
+    rates = fx_rates()
+  except AirBnBError as e:
+    rates = None
+    st.warning(f"Amounts are shown as exported: {e}")
 
   with st.expander('**Advanced options**', False):
     # Filter section
@@ -80,10 +190,64 @@ def main():
       - Specific filters for
         - Customers (top customers limit)
     """)
-    top_customers_limit = st.number_input("Top performing customers", 1, 99, 10, 1)
+    top_customers_limit = st.number_input("Top performing customers", 1, 99, 10, 1, key='top_customers')
+    st.checkbox("Show timings", key='show_timings', help="Time each processing, analysis and chart stage of this page.")
+    chart_backend = st.radio(
+      "Chart renderer",
+      ['matplotlib', 'altair'],
+      horizontal=True,
+      help="Matplotlib charts are rendered once and cached as images; Altair charts are drawn by the browser."
+    )
+
+    stay_dates = full_range = ()
+    report = st.session_state.bnb_report
+    currency = None
+    if report.length is not None and rates is not None:
+      currency = st.selectbox(
+        "Reporting currency",
+        list(dict.fromkeys(report.currencies + rates.currencies)),
+        key='currency',
+        disabled=report_busy,
+        help="Amounts in other currencies are converted at the exchange rate of their transaction date."
+      )
+    if report.length is not None and report.calendar.bounds() is not None:
+      full_range = tuple(date.date() for date in report.calendar.bounds())
+      stay_dates = st.date_input(
+        "Stay dates",
+        value=full_range,
+        min_value=full_range[0],
+        max_value=full_range[1],
+        disabled=report_busy,
+        help="Only include reservations starting within this range."
+      )
+
+  # Date range filtering slices the report's sorted calendar index; an unchanged range keeps cached results
+  if st.session_state.bnb_report.length is not None and not report_busy:
+    # Converted columns and results are kept per currency, so switching back is instant
+    if currency is not None:
+      try:
+        st.session_state.bnb_report.set_currency(currency, rates)
+      except AirBnBError as e:
+        st.error(f"Error converting currencies: {e}")
+    if len(stay_dates) == 2 and stay_dates != full_range:
+      st.session_state.bnb_report.set_date_range(*stay_dates)
+    else:
+      st.session_state.bnb_report.set_date_range()
 
   if 'bnb_report' in st.session_state and st.session_state.bnb_report.length is not None:
+    exported = st.session_state.bnb_report.currencies
+    # Payouts stay in the currency they were made in
+    payout_currency = exported[0] if len(exported) == 1 else ''
+    currency = st.session_state.bnb_report.currency or payout_currency
     st.divider()
+    report_fx = st.session_state.bnb_report.fx_rates
+    if report_fx is not None and report_fx.sample and set(exported) - {st.session_state.bnb_report.currency}:
+      st.warning(
+        f"Amounts in {currency} were converted with the sample exchange rates of data/fx-rates.csv, "
+        "not real ones. Set AIRBNB_ANALYZER_FX_RATES to your own rate table before relying on them."
+      )
+    if not section_ready('earnings'):
+      return
     st.write("#### Earnings Summary")
 
     # Basic Earnings
@@ -92,17 +256,44 @@ def main():
       summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
       with summary_col1:
         with st.container(border=True):
-          st.metric(label="Gross earnings", value='Php {:,.0f}'.format(basic_earnings.get('gross_earnings')))
+          st.metric(label="Gross earnings", value=money(basic_earnings.get('gross_earnings'), currency))
       with summary_col2:
         with st.container(border=True):
-          st.metric(label="Service fees", value='Php {:,.0f}'.format(basic_earnings.get('service_fees')))
+          st.metric(label="Service fees", value=money(basic_earnings.get('service_fees'), currency))
       with summary_col3:
         total_container = st.container(border=True, key='earnings-total-summary')
         with total_container:
-          st.metric(label="Total", value='Php {:,.0f}'.format(basic_earnings.get('total')))
+          st.metric(label="Total", value=money(basic_earnings.get('total'), currency))
+      with summary_col4:
+        with st.container(border=True):
+          st.metric(label="Adjustments", value=money(basic_earnings.get('adjustments'), currency))
     except Exception as e:
       st.error(f"Error processing basic report: {e}")
 
+    if not section_ready('time_series'):
+      return
+    # Earnings over time
+    st.write("#### Earnings Over Time")
+
+    try:
+      granularity = st.selectbox("Group by", ['month', 'week', 'day', 'year'], format_func=str.capitalize)
+      time_series = st.session_state.bnb_report.get_time_series(freq=granularity)
+      series_col1, series_col2 = st.columns(2)
+      with series_col1:
+        st.write("**Gross earnings**")
+        st.bar_chart(time_series['earnings'], color='#404040')
+      with series_col2:
+        if 'occupancy' in time_series.columns:
+          st.write("**Occupancy**")
+          st.line_chart(time_series['occupancy'])
+        else:
+          st.write("**Nights booked**")
+          st.bar_chart(time_series['nights'])
+    except Exception as e:
+      st.error(f"Error processing earnings over time: {e}")
+
+    if not section_ready('performance'):
+      return
     # Performance Stats
     st.write("#### Performance Stats")
 
@@ -117,101 +308,132 @@ def main():
           st.metric(label="Average Nights", value='{:.0f}'.format(performance_stats.get('average_nights')))
       # graph_col, extra_col2 = st.columns([2,2])
       with graph_col:
-        bnb_df = st.session_state.bnb_report.df
-        nights_reserved_dist = make_histogram(
-          bnb_df,
-          'Nights',
-          'count',
-          [1,2,3,4,5,6,7,8,9,10, float('inf')],
-          bar_title="Nights Reserved",
-          xlabel="Nights"
-        )
-        st.pyplot(nights_reserved_dist.get_figure())
+        nights_hist = st.session_state.bnb_report.get_histogram('Nights', NIGHTS_EDGES, labels=NIGHTS_LABELS)
+        if chart_backend == 'altair':
+          st.altair_chart(make_histogram_altair(nights_hist, bar_title="Nights Reserved", xlabel="Nights"))
+        else:
+          st.image(render_histogram(nights_hist, bar_title="Nights Reserved", xlabel="Nights"))
     except Exception as e:
       st.error(f"Error processing performance stats: {e}")
 
+    if not section_ready('listing'):
+      return
     # Listing Stats
     st.write('#### Listing Stats')
     
     try:
-      listing_df = st.session_state.bnb_report.get_listing_stats()
+      report = st.session_state.bnb_report
       st.write("**Fiscal report**")
-      fiscal_listing_df = listing_df[['Amount_sum', 'Service fee_sum']]
-      fiscal_listing_df['Total'] = fiscal_listing_df['Amount_sum'] - fiscal_listing_df['Service fee_sum']
-      fiscal_listing_df.columns = ['Gross earnings', 'Service fees', 'Total']
-      for col in fiscal_listing_df.columns:
-        fiscal_listing_df[col] = fiscal_listing_df[col].apply(lambda x: "Php {:,.2f}".format(x))
-      st.table(
-        fiscal_listing_df
-      )
+      show_table(*cached_table(report, 'fiscal', lambda: fiscal_table(report.get_listing_stats(), currency)))
 
       st.write("**Performance**")
-      customer_night_df = listing_df[['Nights_sum', 'Nights_mean', 'Nights_max', 'Guest_nunique', 'Guest_count']]
-      customer_night_df['Nights_sum'] = customer_night_df['Nights_sum'].astype(int)
-      customer_night_df['Nights_max'] = customer_night_df['Nights_max'].astype(int)
-      customer_night_df.columns = ['Total Nights', 'Average Nights', 'Maximum Nights Stay', 'Unique Guest Bookings', 'Total Guests']
-      st.table(customer_night_df.style.format({
-        'Average Nights': '{:.2f}'
-      }))
+      show_table(*cached_table(report, 'performance', lambda: performance_table(report.get_listing_stats())))
+
+      st.write("**Occupancy**")
+      show_table(*cached_table(report, 'occupancy', lambda: occupancy_table(report.get_occupancy_stats(*report.date_range), currency)))
     except Exception as e:
       st.error(f"Error processing listing statistics: {e}")
 
       st.write("#### Customers")
-    try:
-      earnings_df = st.session_state.bnb_report.get_customer_stats(top_customers=top_customers_limit)
-      earnings_df['Total Nights'] = earnings_df['Total Nights'].astype(int) 
-      edf_1 = earnings_df.style.format({
-        'Total Gross Earnings': 'Php {:,.2f}',
-        'Average Earnings per Booking': 'Php {:,.2f}'
-      })
 
-      earnings_customers_df = earnings_df.reset_index()
+    if not section_ready('payouts'):
+      return
+    # Payouts are matched against the whole report, whatever the stay dates
+    if st.session_state.bnb_report.ledger is not None:
+      st.write('#### Payouts')
+      try:
+        report = st.session_state.bnb_report
+        reconciliation = report.get_reconciliation()
+        payouts = reconciliation.summary()
+        payout_col1, payout_col2, payout_col3 = st.columns(3)
+        with payout_col1:
+          with st.container(border=True):
+            st.metric(label="Paid out", value=money(payouts.get('paid_out'), payout_currency))
+        with payout_col2:
+          with st.container(border=True):
+            st.metric(label="Unmatched payouts", value='{:,} of {:,}'.format(payouts.get('unmatched_settlements'), payouts.get('settlements')))
+        with payout_col3:
+          with st.container(border=True):
+            st.metric(label="Not paid out yet", value=money(payouts.get('pending_amount'), payout_currency))
+        if payouts.get('unmatched_settlements'):
+          st.warning(
+            "{:,} payouts differ from the reservations and adjustments they settle, by {} in total.".format(
+              payouts.get('unmatched_settlements'), money(payouts.get('unmatched_amount'), payout_currency)
+            )
+          )
+        show_table(*cached_table(report, 'payouts', lambda: payout_table(reconciliation.settlements, payout_currency)))
+      except Exception as e:
+        st.error(f"Error processing payouts: {e}")
+
+    if not section_ready('customers'):
+      return
+    try:
+      report = st.session_state.bnb_report
+      earnings_table = cached_table(report, 'customers', lambda: customer_table(report.get_customer_stats(top_customers=top_customers_limit), currency), top_customers_limit)
+      earnings_customers_df = earnings_table[0].reset_index()
 
       cust_col1, cust_col2 = st.columns(2)
       with cust_col1:
-        customers_fig = make_twin_graph(
-          earnings_customers_df, 
-          'Guest', 
-          'Total Gross Earnings', 
-          'Total Nights',
-          y1_color='#404040'
-        )
-        st.pyplot(customers_fig)
-        plt.clf()
+        if chart_backend == 'altair':
+          st.altair_chart(make_twin_chart_altair(
+            earnings_customers_df,
+            'Guest',
+            'Total Gross Earnings',
+            'Total Nights',
+            y1_color='#404040',
+            currency=currency
+          ))
+        else:
+          st.image(render_twin_graph(
+            earnings_customers_df,
+            'Guest',
+            'Total Gross Earnings',
+            'Total Nights',
+            y1_color='#404040',
+            currency=currency
+          ))
       with cust_col2:
-        st.table(edf_1) 
+        show_table(*earnings_table)
+
+      st.write("**Retention**")
+      retention = report.get_retention()
+      retention_col1, retention_col2, retention_col3 = st.columns(3)
+      with retention_col1:
+        with st.container(border=True):
+          st.metric(label="Repeat guests", value='{:.0%}'.format(retention.get('repeat_rate')))
+      with retention_col2:
+        with st.container(border=True):
+          st.metric(label="Median days between stays", value='{:.0f}'.format(retention.get('median_repeat_interval')))
+      with retention_col3:
+        with st.container(border=True):
+          st.metric(label="Churned (no stay in a year)", value='{:.0%}'.format(retention.get('churn_rate')))
+      show_table(*cached_table(report, 'cohorts', lambda: cohort_table(report.get_cohorts(normalize=True))))
     except Exception as e:
       st.error(f"Error processing customer statistics: {e}")
 
       st.write('#### Booking Distributions')
+    if not section_ready('bookings'):
+      return
     try:
-      bookings_df = st.session_state.bnb_report.get_booking_stats()
-      bookings_bins = [0,5,10,15,20,25,30,35,40,45,50, float('inf')]
-      bins_labels=['0-5', '6-10', '11-15', '16-20', '21-25', '26-30', '31-35', '36-40', '41-45', '45-50', '50>']
+      lead_time = st.session_state.bnb_report.get_lead_times()
+      # Memoized on the report; the chart and the findings below read the same counts
+      booking_hist = lead_time_histogram(st.session_state.bnb_report)
       bookings_col1, bookings_col2 = st.columns(2)
       with bookings_col1:
-        cust_fig = make_histogram(
-          bookings_df, 
-          'booking_to_date', 
-          'count', 
-          bookings_bins,
-          bar_title="Booking-to-date distribution",
-          xlabel="Booking-to-date"
-        )
-        st.pyplot(cust_fig.get_figure())
+        if chart_backend == 'altair':
+          st.altair_chart(make_histogram_altair(booking_hist, bar_title="Booking-to-date distribution", xlabel="Booking-to-date"))
+        else:
+          st.image(render_histogram(booking_hist, bar_title="Booking-to-date distribution", xlabel="Booking-to-date"))
       with bookings_col2:
         st.write("##### Findings")
-        binned_btd = pd.cut(bookings_df['booking_to_date'], bookings_bins, labels=bins_labels, include_lowest=True)
-        # st.table(binned_btd.value_counts(sort=False).reset_index())
-        binned_btd = binned_btd.value_counts(sort=False).reset_index()
 
         # Find all ranges with maximum frequency
-        max_freq = binned_btd['count'].max()
-        max_freq_ranges = binned_btd[binned_btd['count'] == max_freq]['booking_to_date'].tolist()
+        max_freq = booking_hist.counts.max()
+        max_freq_ranges = booking_hist.most_frequent()
         
         # Find all ranges with minimum frequency
-        min_freq = binned_btd['count'].min()
-        min_freq_ranges = binned_btd[binned_btd['count'] == min_freq]['booking_to_date'].tolist()
+        min_freq = booking_hist.counts.min()
+        min_freq_ranges = booking_hist.least_frequent()
         
         # Format the ranges for display
         max_ranges_str = " and ".join(max_freq_ranges) if len(max_freq_ranges) <= 2 else ", ".join(max_freq_ranges[:-1]) + f", and {max_freq_ranges[-1]}"
@@ -220,16 +442,69 @@ def main():
         st.write(f"""
             - Most bookings occur **{max_ranges_str} days** away from the booking with **{max_freq} bookings** each
             - Fewest bookings occur **{min_ranges_str} days** away from the booking with **{min_freq} bookings** each
-            - On average, customers book **{"{:.2f}".format(bookings_df['booking_to_date'].mean())} days** away from the actual booking.
+            - On average, customers book **{"{:.2f}".format(lead_time.stats['mean'])} days** away from the actual booking.
+            - Half of all bookings are made between **{"{:.0f}".format(lead_time.quantiles[0.25])}** and **{"{:.0f}".format(lead_time.quantiles[0.75])} days** ahead.
         """)
+
+      listing_tab, month_tab = st.tabs(["By listing", "By month of arrival"])
+      report = st.session_state.bnb_report
+      with listing_tab:
+        show_table(*cached_table(report, 'lead_time', lambda: lead_time_table(report.get_lead_time_breakdown(by='listing')), 'listing'))
+      with month_tab:
+        show_table(*cached_table(report, 'lead_time', lambda: lead_time_table(report.get_lead_time_breakdown(by='month')), 'month'))
     except Exception as e:
       st.error(f"Error processing bookings report: {e}")
 
+    if not section_ready('forecast'):
+      return
+    # Projected from what is already booked, each listing's seasonality and booking pace
+    st.write('#### Forecast')
+    try:
+      report = st.session_state.bnb_report
+      forecast = report.get_forecast()
+      forecast_col1, forecast_col2, forecast_col3 = st.columns(3)
+      with forecast_col1:
+        with st.container(border=True):
+          st.metric(label="Projected earnings ({} months)".format(len(forecast)), value=money(forecast['earnings'].sum(), currency))
+      with forecast_col2:
+        with st.container(border=True):
+          st.metric(label="Projected nights", value='{:,.0f}'.format(forecast['nights'].sum()))
+      with forecast_col3:
+        with st.container(border=True):
+          st.metric(label="Already booked", value='{:.0%}'.format(forecast['booked_earnings'].sum() / forecast['earnings'].sum() if forecast['earnings'].sum() else 0))
+      st.bar_chart(pd.DataFrame({
+        'Booked': forecast['booked_earnings'],
+        'Expected pickup': forecast['earnings'] - forecast['booked_earnings'],
+      }).set_axis(forecast.index.strftime('%b %Y')), color=['#404040', '#A0A0A0'])
+      show_table(*cached_table(report, 'forecast', lambda: forecast_table(report.get_forecast(by_listing=True), currency)))
+    except Exception as e:
+      st.error(f"Error processing forecast: {e}")
+
     # dummy space
   st.divider()
   st.write("*This analyzer is an unofficial project by Jay. You may access the repo [here](https://github.com/jmcruz14/airbnb-analyzer)*")
 
 
+def timings_section(recorder: Recorder):
+  with st.expander('**Timings**', False):
+    st.caption("Stages of the last run, slowest first. Nested stages are included in their parent's time.")
+    st.dataframe(recorder.summary().style.format({
+      'seconds': '{:.4f}',
+      'max_seconds': '{:.4f}',
+      'memory_delta_mb': '{:+.1f}'
+    }, na_rep='-'))
+    st.download_button("Download JSON", recorder.to_json(indent=2), file_name='timings.json', mime='application/json')
+    shared = get_result_cache().info()
+    st.caption("Shared result cache: {:,} hits, {:,} misses ({:.0%} hit rate), {:,} results in {:.1f} of {:.0f} MB, {:,} evicted".format(
+      shared['hits'], shared['misses'], shared['hit_rate'], shared['entries'],
+      shared['bytes'] / 2**20, shared['max_bytes'] / 2**20, shared['evictions']
+    ))
+
 
 if __name__ == '__main__':
-  main()
\ No newline at end of file
+  # Stages are only recorded while the timing panel is on
+  recorder = Recorder() if st.session_state.get('show_timings') else None
+  with recording(recorder):
+    main()
+  if recorder is not None:
+    timings_section(recorder)
\ No newline at end of file
@@ -1,9 +1,24 @@
+import hashlib
+import threading
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
+from collections import OrderedDict
+from io import BytesIO
+from matplotlib.figure import Figure
+from api.binning import Histogram
+from api.instrument import instrumented, stage
 
+# Rendered chart bytes keyed by input data hash and chart parameters
+MAX_CACHED_CHARTS = 64
+_render_cache: OrderedDict[str, bytes] = OrderedDict()
+_render_lock = threading.Lock()
+
+# Shared default size of the matplotlib charts, in inches
+DEFAULT_FIGSIZE = (8, 5)
+
+@instrumented()
 def make_twin_graph(
   bnb_df: pd.DataFrame,
   x_col,
@@ -12,19 +27,22 @@ def make_twin_graph(
   y1_color: str = 'black',
   y2_color: str = 'blue',
   bar_width = 0.3,
+  figsize = DEFAULT_FIGSIZE,
+  currency: str = 'Php',
   # title
 ) -> plt.figure:
-  plt.clf()
-  fig, ax1 = plt.subplots(figsize=(12,12))
+  # Figures are created without pyplot so concurrent sessions don't share global state
+  fig = Figure(figsize=figsize)
+  ax1 = fig.subplots()
 
   # Set bar width and positions
   x = np.arange(len(bnb_df[x_col]))
 
   # Create the first axis for earnings
-  ax1.bar(x - bar_width/2, bnb_df[y1_col], 
+  bars1 = ax1.bar(x - bar_width/2, bnb_df[y1_col],
       width=bar_width, color=y1_color, label='Total Earnings')
   ax1.set_xlabel('Guests')
-  ax1.set_ylabel('Total Earnings (Php)', color=y1_color)
+  ax1.set_ylabel(f'Total Earnings ({currency})', color=y1_color)
   ax1.tick_params(axis='y', labelcolor=y1_color)
 
   # Set x-ticks and rotate labels
@@ -33,41 +51,134 @@ def make_twin_graph(
 
   # Create the second axis for nights
   ax2 = ax1.twinx()
-  ax2.bar(x + bar_width/2, bnb_df[y2_col], 
+  bars2 = ax2.bar(x + bar_width/2, bnb_df[y2_col],
       width=bar_width, color=y2_color, alpha=0.4, label='Number of Nights')
   ax2.set_ylabel('Number of Nights', color=y2_color)
   ax2.tick_params(axis='y', labelcolor=y2_color)
 
-  # Add value labels on top of bars
-  for i, v in enumerate(bnb_df[y1_col]):
-    ax1.text(i - bar_width/2, v + 1, f'{v:.0f}', ha='center', va='bottom', color=y1_color, rotation=45)
-  for i, v in enumerate(bnb_df[y2_col]):
-    ax2.text(i + bar_width/2, v + 0.1, str(int(v)), ha='center', va='bottom', color=y2_color)
+  # Add value labels on top of bars, one call per bar container
+  ax1.bar_label(bars1, fmt='%.0f', color=y1_color, rotation=45, padding=2)
+  ax2.bar_label(bars2, fmt='%.0f', color=y2_color, padding=2)
 
   # Add title and adjust legend
-  plt.title('Repeat Guest Earnings and Nights')
+  ax1.set_title('Repeat Guest Earnings and Nights')
   lines1, labels1 = ax1.get_legend_handles_labels()
   lines2, labels2 = ax2.get_legend_handles_labels()
   ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
-  
+
   return fig
 
+@instrumented()
 def make_histogram(
-  bnb_df,
-  x,
-  stat_y: str,
-  bins,
+  hist: Histogram,
   bar_title,
   xlabel,
-  bar_color: str = 'black'
+  stat_y: str = 'count',
+  bar_color: str = 'black',
+  figsize = DEFAULT_FIGSIZE
 ):
+  # Bars are drawn from precomputed bin counts, so the figure holds one value per bin
   try:
-    plt.clf()
-    # fig, ax = plt.subplots()
-    g = sns.histplot(bnb_df[x], stat=stat_y, bins=bins, color=bar_color)
-    g.set_title(bar_title)
-    g.set(xlabel=xlabel)
-    return g
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    if hist.total == 0:
+      ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
+    x = np.arange(len(hist.labels))
+    ax.bar(x, hist.values(stat_y), width=1, color=bar_color, edgecolor='white', align='center')
+    ax.set_xticks(x)
+    ax.set_xticklabels(hist.labels)
+    ax.set_title(bar_title)
+    ax.set(xlabel=xlabel, ylabel=stat_y.capitalize())
+    return ax
   except Exception as e:
     st.error(f"An error occurred while processing: {e}")
-    return None
\ No newline at end of file
+    return None
+
+def _data_key(df: pd.DataFrame, columns: list) -> str:
+  """Content hash of the columns a chart is drawn from."""
+  hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+  return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+def _render(key: str, draw, fmt: str) -> bytes:
+  """
+  Return the cached bytes under `key`, or draw the figure, save it as `fmt` and cache it.
+  The least recently used charts are dropped beyond `MAX_CACHED_CHARTS`.
+  """
+  with _render_lock:
+    if key in _render_cache:
+      _render_cache.move_to_end(key)
+      return _render_cache[key]
+
+  fig = draw()
+  buffer = BytesIO()
+  with stage('savefig'):
+    fig.savefig(buffer, format=fmt, bbox_inches='tight')
+  rendered = buffer.getvalue()
+
+  with _render_lock:
+    _render_cache[key] = rendered
+    while len(_render_cache) > MAX_CACHED_CHARTS:
+      _render_cache.popitem(last=False)
+  return rendered
+
+@instrumented()
+def render_twin_graph(bnb_df: pd.DataFrame, x_col, y1_col, y2_col, fmt: str = 'png', **kwargs) -> bytes:
+  """
+  `make_twin_graph` rendered to PNG or SVG bytes, served from the render cache when the
+  data and parameters are unchanged.
+  """
+  key = repr(('twin', _data_key(bnb_df, [x_col, y1_col, y2_col]), x_col, y1_col, y2_col, fmt, sorted(kwargs.items())))
+  return _render(key, lambda: make_twin_graph(bnb_df, x_col, y1_col, y2_col, **kwargs), fmt)
+
+@instrumented()
+def render_histogram(hist: Histogram, bar_title, xlabel, fmt: str = 'png', **kwargs) -> bytes:
+  """
+  `make_histogram` rendered to PNG or SVG bytes, served from the render cache when the
+  bin counts and parameters are unchanged.
+  """
+  key = repr(('histogram', hist.edges.tolist(), hist.counts.tolist(), hist.labels, bar_title, xlabel, fmt, sorted(kwargs.items())))
+
+  def draw():
+    ax = make_histogram(hist, bar_title, xlabel, **kwargs)
+    if ax is None:
+      raise ValueError(f"Unable to draw histogram {bar_title!r}")
+    return ax.get_figure()
+
+  return _render(key, draw, fmt)
+
+def make_twin_chart_altair(
+  bnb_df: pd.DataFrame,
+  x_col,
+  y1_col,
+  y2_col,
+  y1_color: str = 'black',
+  y2_color: str = 'blue',
+  currency: str = 'Php'
+):
+  """Vega-Lite version of `make_twin_graph`, rendered by the browser instead of matplotlib."""
+  import altair as alt
+
+  base = alt.Chart(bnb_df[[x_col, y1_col, y2_col]]).encode(
+    x=alt.X(f'{x_col}:N', sort=None, title='Guests', axis=alt.Axis(labelAngle=-45))
+  )
+  earnings = base.mark_bar(color=y1_color, xOffset=-7, size=12).encode(
+    y=alt.Y(f'{y1_col}:Q', title=f'Total Earnings ({currency})', axis=alt.Axis(titleColor=y1_color)),
+    tooltip=[x_col, alt.Tooltip(f'{y1_col}:Q', format=',.0f')]
+  )
+  nights = base.mark_bar(color=y2_color, opacity=0.4, xOffset=7, size=12).encode(
+    y=alt.Y(f'{y2_col}:Q', title='Number of Nights', axis=alt.Axis(titleColor=y2_color)),
+    tooltip=[x_col, f'{y2_col}:Q']
+  )
+  return alt.layer(earnings, nights).resolve_scale(y='independent').properties(
+    title='Repeat Guest Earnings and Nights'
+  )
+
+def make_histogram_altair(hist: Histogram, bar_title, xlabel, stat_y: str = 'count', bar_color: str = 'black'):
+  """Vega-Lite version of `make_histogram`."""
+  import altair as alt
+
+  chart_df = pd.DataFrame({xlabel: hist.labels, stat_y: hist.values(stat_y)})
+  return alt.Chart(chart_df).mark_bar(color=bar_color).encode(
+    x=alt.X(f'{xlabel}:N', sort=None, axis=alt.Axis(labelAngle=0)),
+    y=alt.Y(f'{stat_y}:Q')
+  ).properties(title=bar_title)
@@ -0,0 +1,126 @@
+import contextvars
+import threading
+import streamlit as st
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable, Optional
+from api.AirBnB import AirBnB
+
+# Shared by every session. Parsing goes through pyarrow, which reads on its own threads
+# without holding the GIL, and the analyses are mostly numpy, so a few threads go far.
+MAX_WORKERS = 4
+POLL_SECONDS = 0.5
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='report-job')
+
+
+class JobCancelled(Exception):
+  """Raised inside a job once a newer job replaced it."""
+  pass
+
+
+class ReportJob:
+  """
+  Builds a report and runs its section getters on a worker thread.
+
+  `load` builds the report; each section then runs in order and memoizes its results on
+  the report, so the page can show a section as soon as `ready` says so. Jobs never touch
+  Streamlit; the script run reads `report`, `errors` and `ready` instead.
+  """
+  def __init__(self, load: Callable[['ReportJob'], AirBnB], sections: dict[str, Callable[[AirBnB], object]]):
+    self.sections = sections
+    self.report: Optional[AirBnB] = None
+    self.errors: list[str] = []
+    self._done: set[str] = set()
+    # Share of the uploads read so far, reported by the streaming reader
+    self._read = 0.0
+    self._cancel = threading.Event()
+    # Recorders and other context variables of the submitting run carry over to the worker
+    self.future = _executor.submit(contextvars.copy_context().run, self._run, load)
+
+  def _run(self, load: Callable[['ReportJob'], AirBnB]):
+    self.report = load(self)
+    for name, compute in self.sections.items():
+      self.check()
+      try:
+        compute(self.report)
+      except Exception:
+        # The page calls the getter again and shows the error where the section goes
+        pass
+      self._done.add(name)
+
+  def check(self):
+    """
+    Raises:
+      JobCancelled: the job was cancelled
+    """
+    if self._cancel.is_set():
+      raise JobCancelled()
+
+  def reading(self, fraction: float):
+    """
+    Report how much of the uploads `load` has read; also a cancellation point.
+
+    Raises:
+      JobCancelled: the job was cancelled
+    """
+    self._read = fraction
+    self.check()
+
+  def cancel(self):
+    """Stop the job at its next step; a job still waiting for a worker never starts."""
+    self._cancel.set()
+    self.future.cancel()
+
+  @property
+  def read(self) -> float:
+    """Share of the uploads read, see `reading`."""
+    return 1.0 if self.report is not None else self._read
+
+  @property
+  def cancelled(self) -> bool:
+    return self._cancel.is_set()
+
+  @property
+  def running(self) -> bool:
+    return not self.future.done()
+
+  @property
+  def failure(self) -> Optional[BaseException]:
+    """Exception that ended the job, None while it runs, succeeded or was cancelled."""
+    if not self.future.done() or self.future.cancelled():
+      return None
+    error = self.future.exception()
+    return None if isinstance(error, (JobCancelled, CancelledError)) else error
+
+  def ready(self, section: str) -> bool:
+    """Whether `section` is computed, or never will be because the job ended."""
+    return section in self._done or not self.running
+
+  def progress(self) -> float:
+    """Share of the sections done; ingestion counts as one more step."""
+    steps = len(self.sections) + 1
+    return (len(self._done) + self.read) / steps
+
+
+def start_job(load: Callable[[ReportJob], AirBnB], sections: dict[str, Callable[[AirBnB], object]]) -> ReportJob:
+  """Start a job for this session, cancelling the one it supersedes."""
+  cancel_job()
+  job = st.session_state['report_job'] = ReportJob(load, sections)
+  return job
+
+
+def cancel_job():
+  job = st.session_state.pop('report_job', None)
+  if job is not None:
+    job.cancel()
+
+
+def current_job() -> Optional[ReportJob]:
+  return st.session_state.get('report_job')
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def poll_job(job: ReportJob, steps_shown: float):
+  """Rerun the page once the job has made progress since it was last drawn."""
+  if job.progress() != steps_shown or not job.running:
+    st.rerun()
@@ -1,95 +1,169 @@
 import pandas as pd
 import streamlit as st
-from typing import Optional
-from io import BytesIO
+from typing import Callable, Optional
+from api.compact import compact_frame, shared_frame
+from api.disk_cache import content_key, get_default_cache
+from api.exceptions import FileProcessingError
+from api.instrument import instrumented
+from api.schema import (
+    CSV_DTYPES,
+    cast_columns, concat_chunks, read_earnings_csv, validate_columns
+)
 
-class StreamlitFileProcessingError(Exception):
-    """Exception raised for errors during file processing in Streamlit"""
-    pass
+# Uploads larger than this are read in chunks instead of in one go
+STREAMING_THRESHOLD_BYTES = 20 * 1024 * 1024
+DEFAULT_CHUNKSIZE = 50_000
+DUMMY_FILE = './data/airbnb-dummy-data-full.csv'
 
-def process_airbnb_file(file_upload) -> Optional[pd.DataFrame]:
+def _source_size(source) -> Optional[int]:
+    """Best-effort size in bytes of a file-like object, used for progress reporting."""
+    size = getattr(source, 'size', None)
+    if size:
+        return size
+    try:
+        return source.getbuffer().nbytes
+    except (AttributeError, ValueError):
+        return None
+
+def read_transactions_chunked(
+    source,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> pd.DataFrame:
     """
-    Process an AirBnB CSV file uploaded through Streamlit and return a DataFrame of reservations.
-    
+    Stream an AirBnB CSV in chunks, converting each chunk to the typed schema as it is read.
+
+    Every transaction type is kept: payouts and adjustments are needed to reconcile payouts
+    with the reservations they settle.
+
+    Args:
+        source: path or file-like object containing the CSV export
+        chunksize: number of raw rows parsed per chunk
+        progress_callback: called with the fraction of the source consumed after each chunk
+
+    Returns:
+        DataFrame containing the rows of every chunk
+
+    Raises:
+        FileProcessingError: required columns are missing from the CSV
+    """
+    total_bytes = _source_size(source)
+    frames = []
+
+    with pd.read_csv(source, chunksize=chunksize, dtype=CSV_DTYPES) as reader:
+        for chunk in reader:
+            if not frames:
+                validate_columns(chunk.columns)
+
+            frames.append(cast_columns(chunk))
+
+            if progress_callback is not None and total_bytes and hasattr(source, 'tell'):
+                progress_callback(min(source.tell() / total_bytes, 1.0))
+
+    if progress_callback is not None:
+        progress_callback(1.0)
+    return concat_chunks(frames)
+
+@instrumented()
+def _parse_upload(
+    file_upload,
+    chunksize: Optional[int],
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> pd.DataFrame:
+    file_size = _source_size(file_upload) or 0
+    if chunksize is None and file_size > STREAMING_THRESHOLD_BYTES:
+        chunksize = DEFAULT_CHUNKSIZE
+
+    # UploadedFile is already an in-memory buffer, so read it directly instead of copying it
+    file_upload.seek(0)
+    if not chunksize:
+        return read_earnings_csv(file_upload)
+    return read_transactions_chunked(file_upload, chunksize=chunksize, progress_callback=progress_callback)
+
+def _load_upload(cache_key: str, parse: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Read an upload from the on-disk report cache, parsing and caching it on a miss."""
+    cache = get_default_cache()
+    reservations_bnb = cache.get(cache_key)
+
+    if reservations_bnb is None:
+        reservations_bnb = parse()
+        try:
+            cache.put(cache_key, reservations_bnb)
+        except OSError:
+            # A read-only or full cache directory should not block the analysis
+            pass
+    return reservations_bnb
+
+@instrumented()
+def process_airbnb_file(
+    file_upload,
+    chunksize: Optional[int] = None,
+    compact: bool = False,
+    cache_key: Optional[str] = None,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> pd.DataFrame:
+    """
+    Process an AirBnB CSV file uploaded through Streamlit and return a DataFrame of its transactions.
+
+    Uploads above `STREAMING_THRESHOLD_BYTES` (or any upload when `chunksize` is given)
+    are streamed chunk by chunk, reporting progress through `progress_callback`, instead
+    of being parsed whole. Parsed reports are kept in the on-disk report cache, keyed by
+    the upload's content hash. With `compact`, the frame is shrunk with `compact_frame`
+    and shared with every other session that loaded the same report.
+
+    Streamlit is never called, so this can run on a background job thread; errors are
+    raised rather than shown.
+
     Args:
         file_upload: Streamlit's UploadedFile object
-            
+        chunksize: Optional number of rows per chunk to force streaming ingestion
+        compact: return a shared, compact and read-only frame
+        cache_key: Optional content key of the upload when the caller already computed it
+        progress_callback: called with the fraction of the upload read after each chunk
+
     Returns:
-        DataFrame containing processed reservation data or None if processing fails
+        DataFrame containing every transaction of the report
+
+    Raises:
+        FileProcessingError: not a CSV file, empty or malformed, or required columns are missing
     """
+    if not file_upload.name.endswith('.csv'):
+        raise FileProcessingError(f'{file_upload.name} is not a CSV file')
+
+    # Known reports are served from memory or the on-disk cache without parsing the CSV again
+    cache_key = cache_key or content_key(file_upload.getbuffer())
+    def parse():
+        return _parse_upload(file_upload, chunksize, progress_callback)
+
     try:
-        if file_upload is None:
-            st.error('No file uploaded')
-            return None
-            
-        if not file_upload.name.endswith('.csv'):
-            st.error('Please upload a CSV file')
-            return None
-
-        # Read the uploaded file
-        date_columns = ['Date', 'Arriving by date', 'Booking date', 
-                       'Start date', 'Earnings year']
-        
-        bnb_df = pd.read_csv(
-            BytesIO(file_upload.getvalue()), 
-            parse_dates=date_columns
-        )
-        
-        # Validate required columns
-        required_columns = date_columns + ['Type']
-        missing_columns = [col for col in required_columns if col not in bnb_df.columns]
-        
-        if missing_columns:
-            st.error(f'CSV file is missing required columns: {", ".join(missing_columns)}')
-            return None
-
-        # Process the data
-        bnb_df['Earnings year'] = bnb_df['Earnings year'].dt.year
-        reservations_bnb = bnb_df[bnb_df['Type'] == 'Reservation']
-        
-        # Update session state
-        st.session_state['bnb_report'] = reservations_bnb
-        return reservations_bnb
-        
+        if compact:
+            return shared_frame(cache_key, lambda: compact_frame(_load_upload(cache_key, parse)))
+        return _load_upload(cache_key, parse)
     except pd.errors.EmptyDataError:
-        st.error('The uploaded CSV file is empty')
-        return None
+        raise FileProcessingError('The uploaded CSV file is empty')
     except pd.errors.ParserError:
-        st.error('Unable to parse the CSV file. Please ensure it is properly formatted')
-        return None
-    except Exception as e:
-        st.error(f'An error occurred while processing the file: {str(e)}')
-        return None
-    
-def process_dummy_file() -> pd.DataFrame:
+        raise FileProcessingError('Unable to parse the CSV file. Please ensure it is properly formatted')
+
+@instrumented()
+def process_dummy_file(compact: bool = False) -> pd.DataFrame:
     try:
-        dummy_file = './data/airbnb-dummy-data-full.csv'
-
-        # Read the uploaded file
-        date_columns = ['Date', 'Arriving by date', 'Booking date', 
-                       'Start date', 'Earnings year']
-        
-        bnb_df = pd.read_csv(
-            dummy_file,
-            parse_dates=date_columns
-        )
-        
-        # Validate required columns
-        required_columns = date_columns + ['Type']
-        missing_columns = [col for col in required_columns if col not in bnb_df.columns]
-        
-        if missing_columns:
-            st.error(f'CSV file is missing required columns: {", ".join(missing_columns)}')
-            return None
-
-        # Process the data
-        bnb_df['Earnings year'] = bnb_df['Earnings year'].dt.year
-        reservations_bnb = bnb_df[bnb_df['Type'] == 'Reservation']
-        
+        dummy_file = DUMMY_FILE
+
+        if compact:
+            reservations_bnb = shared_frame(
+                content_key(dummy_file),
+                lambda: compact_frame(read_earnings_csv(dummy_file))
+            )
+        else:
+            reservations_bnb = read_earnings_csv(dummy_file)
+
         # Update session state
         st.session_state['bnb_report'] = reservations_bnb
         return reservations_bnb
-        
+
+    except FileProcessingError as e:
+        st.error(str(e))
+        return None
     except pd.errors.EmptyDataError:
         st.error('The uploaded CSV file is empty')
         return None
@@ -98,4 +172,4 @@ def process_dummy_file() -> pd.DataFrame:
         return None
     except Exception as e:
         st.error(f'An error occurred while processing the file: {str(e)}')
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,134 @@
+import weakref
+import pandas as pd
+import streamlit as st
+from typing import Callable
+from api.AirBnB import AirBnB
+from api.instrument import instrumented
+
+# Display tables keep their numeric dtypes; number formats are applied by the browser
+# through `column_config`, so nothing is formatted cell by cell in Python. Money columns
+# are prefixed with the report's currency, this one when none is given
+CURRENCY_PREFIX = 'Php'
+MAX_CACHED_TABLES = 32
+
+def money_column(label: str | None = None, prefix: str = CURRENCY_PREFIX):
+  return st.column_config.NumberColumn(label, format=f'{prefix} %,.2f')
+
+def count_column(label: str | None = None):
+  return st.column_config.NumberColumn(label, format='%,d')
+
+def decimal_column(label: str | None = None, digits: int = 2):
+  return st.column_config.NumberColumn(label, format=f'%,.{digits}f')
+
+def percent_column(label: str | None = None):
+  return st.column_config.NumberColumn(label, format='percent')
+
+def fiscal_table(listing_df: pd.DataFrame, currency: str = CURRENCY_PREFIX) -> tuple[pd.DataFrame, dict]:
+  """Gross earnings, service fees and their difference per listing."""
+  table = pd.DataFrame({
+    'Gross earnings': listing_df['Amount_sum'],
+    'Service fees': listing_df['Service fee_sum'],
+    'Total': listing_df['Amount_sum'] - listing_df['Service fee_sum'],
+  })
+  return table, {col: money_column(prefix=currency) for col in table.columns}
+
+def performance_table(listing_df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+  """Nights and guest counts per listing."""
+  table = pd.DataFrame({
+    'Total Nights': listing_df['Nights_sum'].round().astype('Int64'),
+    'Average Nights': listing_df['Nights_mean'],
+    'Maximum Nights Stay': listing_df['Nights_max'].round().astype('Int64'),
+    'Unique Guest Bookings': listing_df['Guest_nunique'],
+    'Total Guests': listing_df['Guest_count'],
+  })
+  return table, {
+    'Total Nights': count_column(),
+    'Average Nights': decimal_column(),
+    'Maximum Nights Stay': count_column(),
+    'Unique Guest Bookings': count_column(),
+    'Total Guests': count_column(),
+  }
+
+def occupancy_table(occupancy_df: pd.DataFrame, currency: str = CURRENCY_PREFIX) -> tuple[pd.DataFrame, dict]:
+  table = occupancy_df[['Booked nights', 'Occupancy rate', 'ADR', 'RevPAR']]
+  return table, {
+    'Booked nights': count_column(),
+    'Occupancy rate': percent_column(),
+    'ADR': money_column(prefix=currency),
+    'RevPAR': money_column(prefix=currency),
+  }
+
+def customer_table(customers_df: pd.DataFrame, currency: str = CURRENCY_PREFIX) -> tuple[pd.DataFrame, dict]:
+  table = customers_df.assign(**{'Total Nights': customers_df['Total Nights'].round().astype('Int64')})
+  return table, {
+    'Total Gross Earnings': money_column(prefix=currency),
+    'Average Earnings per Booking': money_column(prefix=currency),
+    'Bookings Executed': count_column(),
+    'Total Nights': count_column(),
+  }
+
+def lead_time_table(breakdown_df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+  table = breakdown_df
+  if isinstance(table.index, pd.DatetimeIndex):
+    table = table.set_axis(table.index.strftime('%b %Y').rename(table.index.name))
+  column_config = {col: decimal_column(digits=1) for col in ['mean', 'median', 'min', 'max', 'p25', 'p75']}
+  column_config['count'] = count_column()
+  return table, column_config
+
+def cohort_table(cohorts_df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+  """Share of each first-stay cohort booking again, one column per month since the first stay."""
+  table = cohorts_df.set_axis(cohorts_df.index.strftime('%b %Y').rename('Cohort'))
+  table.columns = [f'Month {age}' for age in table.columns]
+  return table, {col: percent_column() for col in table.columns}
+
+def payout_table(settlements_df: pd.DataFrame, currency: str = CURRENCY_PREFIX) -> tuple[pd.DataFrame, dict]:
+  """Payouts per day and currency next to the money of the transactions they settle."""
+  table = settlements_df.reset_index(level='Currency')
+  column_config = {
+    'Payout date': st.column_config.DateColumn(),
+    'Payouts': count_column(),
+    'Paid out': money_column(prefix=currency),
+    'Items': count_column('Transactions'),
+    'Expected': money_column(prefix=currency),
+    'Difference': money_column(prefix=currency),
+    'Matched': st.column_config.CheckboxColumn(),
+  }
+  if 'Arriving by date' in table.columns:
+    column_config['Arriving by date'] = st.column_config.DateColumn()
+  return table, column_config
+
+def forecast_table(forecast_df: pd.DataFrame, currency: str = CURRENCY_PREFIX) -> tuple[pd.DataFrame, dict]:
+  """Projected nights, earnings and occupancy per listing and month, next to what is booked already."""
+  table = forecast_df[['booked_nights', 'nights', 'booked_earnings', 'earnings', 'occupancy']]
+  months = table.index.get_level_values('Month').strftime('%b %Y')
+  table = table.set_axis(pd.MultiIndex.from_arrays([table.index.get_level_values('Listing'), months.rename('Month')]))
+  return table, {
+    'booked_nights': count_column('Booked nights'),
+    'nights': decimal_column('Projected nights', digits=1),
+    'booked_earnings': money_column('Booked earnings', prefix=currency),
+    'earnings': money_column('Projected earnings', prefix=currency),
+    'occupancy': percent_column('Projected occupancy'),
+  }
+
+def cached_table(bnb: AirBnB, name: str, build: Callable[[], tuple[pd.DataFrame, dict]], *args) -> tuple[pd.DataFrame, dict]:
+  """
+  Build a display table once per report version.
+
+  Tables are kept in the session per report, keyed by its version and reporting
+  currency, the table name and `args`. Entries of older versions are dropped as soon as
+  the report changes, and everything goes once the report itself is replaced.
+  """
+  reports = st.session_state.setdefault('table_cache', weakref.WeakKeyDictionary())
+  cache = reports.setdefault(bnb, {})
+  key = (bnb.version, bnb.currency, name, args)
+  if key not in cache:
+    for stale in [k for k in cache if k[0] != bnb.version]:
+      del cache[stale]
+    if len(cache) >= MAX_CACHED_TABLES:
+      cache.clear()
+    cache[key] = build()
+  return cache[key]
+
+@instrumented()
+def show_table(table: pd.DataFrame, column_config: dict):
+  st.dataframe(table, column_config=column_config)
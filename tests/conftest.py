@@ -0,0 +1,23 @@
+import os
+import pandas as pd
+import pytest
+from api.schema import RESERVATION_TYPE, read_earnings_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+SAMPLE_EXPORT = os.path.join(DATA_DIR, 'airbnb-dummy-data-full.csv')
+
+
+@pytest.fixture
+def export_path() -> str:
+  return SAMPLE_EXPORT
+
+
+@pytest.fixture
+def export() -> pd.DataFrame:
+  """Every transaction of the sample export."""
+  return read_earnings_csv(SAMPLE_EXPORT)
+
+
+@pytest.fixture
+def reservations(export) -> pd.DataFrame:
+  return export[export['Type'] == RESERVATION_TYPE]
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from api.AirBnB import AirBnB
+
+
+def _assert_same_report(report: AirBnB, rebuilt: AirBnB):
+  assert report.length == rebuilt.length
+  assert len(report.ledger) == len(rebuilt.ledger)
+  assert report.get_basic_earnings() == pytest.approx(rebuilt.get_basic_earnings())
+  assert report.get_performance_stats() == pytest.approx(rebuilt.get_performance_stats())
+  pd.testing.assert_frame_equal(report.get_listing_stats(), rebuilt.get_listing_stats(), check_dtype=False)
+  pd.testing.assert_frame_equal(report.get_customer_stats(), rebuilt.get_customer_stats(), check_dtype=False)
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_append_matches_full_rebuild(export, compact):
+  half = len(export) // 2
+  report = AirBnB(export.iloc[:half], compact=compact)
+  # Aggregates of the first batch exist before the second is folded in
+  report.get_listing_stats()
+
+  added = report.append(export.iloc[half:])
+
+  assert added == len(export) - half
+  _assert_same_report(report, AirBnB(export, compact=compact))
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_append_skips_rows_already_seen(export, compact):
+  third = len(export) // 3
+  report = AirBnB(export.iloc[:2 * third], compact=compact)
+
+  # Overlaps the rows already held, and repeats some of its own rows
+  batch = pd.concat([export.iloc[third:], export.iloc[-3:]])
+  added = report.append(batch)
+
+  assert added == len(export) - 2 * third
+  _assert_same_report(report, AirBnB(export, compact=compact))
+  assert report.append(export) == 0
+
+
+def test_append_to_empty_report(export):
+  report = AirBnB(pd.DataFrame())
+
+  assert report.append(export) == len(export)
+  _assert_same_report(report, AirBnB(export))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import api.AirBnB as AirBnB_module
+from api.AirBnB import AirBnB
+from api.binning import bin_counts
+from api.result_cache import get_result_cache
+
+EDGES = [0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, float('inf')]
+VALUES = np.array([0, 0, 1, 5, 5, 6, 10, 12.5, 20, 49.9, 50, 50.1, 400, -1, np.nan])
+
+
+@pytest.mark.parametrize('edges', [EDGES, [0, 1, 2, 7, 30], [-np.inf, 0, 10, np.inf]])
+@pytest.mark.parametrize('right, include_lowest', [(False, False), (True, False), (True, True)])
+def test_bin_counts_matches_pd_cut(edges, right, include_lowest):
+  hist = bin_counts(VALUES, edges, right=right, include_lowest=include_lowest)
+
+  expected = pd.Series(pd.cut(VALUES, edges, right=right, include_lowest=include_lowest)).value_counts(sort=False)
+  np.testing.assert_array_equal(hist.counts, expected.to_numpy())
+
+
+def test_bin_counts_reads_series_with_missing_values(reservations):
+  nights = reservations['Nights'].astype('Float64')
+  nights.iloc[:3] = pd.NA
+  labels = [str(i) for i in range(1, 10)] + ['10+']
+  edges = list(range(1, 11)) + [float('inf')]
+
+  hist = bin_counts(nights, edges, labels=labels)
+
+  expected = pd.cut(nights.astype('float64'), edges, right=False, labels=labels).value_counts(sort=False)
+  assert hist.labels == labels
+  np.testing.assert_array_equal(hist.counts, expected.to_numpy())
+  assert hist.total == expected.sum()
+
+
+def test_bin_counts_rejects_bad_bins():
+  with pytest.raises(ValueError):
+    bin_counts(VALUES, [0, 10, 5])
+  with pytest.raises(ValueError):
+    bin_counts(VALUES, [0, 5, 10], labels=['only one'])
+
+
+def test_lead_time_histogram_is_memoized(export, monkeypatch):
+  calls = []
+  monkeypatch.setattr(AirBnB_module, 'bin_counts', lambda *args, **kwargs: calls.append(args) or bin_counts(*args, **kwargs))
+  # Another test's report over the same export may already hold the histogram
+  get_result_cache().clear()
+  report = AirBnB(export)
+  edges = tuple(EDGES)
+
+  hist = report.get_lead_time_histogram(edges, right=True, include_lowest=True)
+  again = report.get_lead_time_histogram(edges, right=True, include_lowest=True)
+
+  assert len(calls) == 1
+  np.testing.assert_array_equal(again.counts, hist.counts)
+  days = pd.Series(report.get_lead_times().days)
+  expected = pd.cut(days, EDGES, right=True, include_lowest=True).value_counts(sort=False)
+  np.testing.assert_array_equal(hist.counts, expected.to_numpy())
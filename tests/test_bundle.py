@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from api.AirBnB import AirBnB
+from api.exceptions import FileProcessingError
+from api.result_cache import get_result_cache
+
+
+@pytest.fixture
+def saved(export, tmp_path):
+  report = AirBnB(export)
+  path = str(tmp_path / 'report.abnb')
+  report.save(path)
+  # Nothing computed for `report` may answer for the loaded copy
+  get_result_cache().clear()
+  return report, path
+
+
+def test_load_reads_results_without_the_frames(saved):
+  report, path = saved
+  loaded = AirBnB.load(path)
+
+  assert loaded.get_basic_earnings() == pytest.approx(report.get_basic_earnings())
+  assert loaded.get_performance_stats() == pytest.approx(report.get_performance_stats())
+  pd.testing.assert_frame_equal(loaded.get_listing_stats(), report.get_listing_stats())
+  pd.testing.assert_frame_equal(loaded.get_customer_stats(), report.get_customer_stats())
+  pd.testing.assert_frame_equal(loaded.get_customer_stats(3), report.get_customer_stats(3))
+  assert loaded.get_lead_times().stats == pytest.approx(report.get_lead_times().stats)
+
+  # Every result above came from the bundle rather than from recomputing over the rows
+  assert loaded._unread == {'reservations', 'ledger'}
+
+
+def test_load_round_trips_the_frames(saved):
+  report, path = saved
+  loaded = AirBnB.load(path)
+
+  assert loaded.length == report.length
+  pd.testing.assert_frame_equal(loaded.df, report.df)
+  pd.testing.assert_frame_equal(loaded.ledger, report.ledger)
+
+
+def test_results_outside_the_bundle_are_computed(saved):
+  report, path = saved
+  loaded = AirBnB.load(path)
+
+  start, end = report.df['Start date'].min(), report.df['Start date'].median()
+  report.set_date_range(start, end)
+  loaded.set_date_range(start, end)
+
+  pd.testing.assert_frame_equal(loaded.get_listing_stats(), report.get_listing_stats())
+
+
+def test_load_rejects_other_files(export_path):
+  with pytest.raises(FileProcessingError):
+    AirBnB.load(export_path)
+
+
+def test_load_missing_file(tmp_path):
+  with pytest.raises(FileProcessingError):
+    AirBnB.load(str(tmp_path / 'missing.abnb'))
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from api.currency import DEFAULT_FX_PATH, FxRates, convert_money, load_fx_rates
+
+
+@pytest.fixture
+def fx() -> FxRates:
+  # PHP per USD, changing on Feb 1; EUR has a single rate
+  return FxRates(pd.DataFrame({
+    'Date': ['2024-01-01', '2024-02-01', '2024-01-01'],
+    'Currency': ['PHP', 'PHP', 'EUR'],
+    'Rate': [50.0, 60.0, 0.8],
+  }))
+
+
+def _transactions(dates, currencies, amounts) -> pd.DataFrame:
+  return pd.DataFrame({
+    'Date': pd.to_datetime(dates),
+    'Currency': currencies,
+    'Amount': pd.array(amounts, dtype='Float64'),
+    'Nights': [1] * len(dates),
+  })
+
+
+def test_rows_convert_at_the_rate_in_force_on_their_date(fx):
+  df = _transactions(
+    ['2024-01-15', '2024-01-31', '2024-02-01', '2024-03-10', '2023-12-01'],
+    ['PHP'] * 5,
+    [500.0, 500.0, 600.0, 600.0, 500.0],
+  )
+
+  converted = convert_money(df, fx, 'USD')
+
+  # Dates before the first rate use that first rate
+  assert list(converted['Amount']) == pytest.approx([10.0, 10.0, 10.0, 10.0, 10.0])
+  assert list(converted['Currency'].astype(str)) == ['USD'] * 5
+  pd.testing.assert_series_equal(converted['Nights'], df['Nights'])
+
+
+def test_cross_rates_go_through_the_base_currency(fx):
+  df = _transactions(['2024-02-15', '2024-02-15'], ['PHP', 'EUR'], [600.0, 8.0])
+
+  converted = convert_money(df, fx, 'EUR')
+
+  assert list(converted['Amount']) == pytest.approx([8.0, 8.0])
+
+
+def test_rows_already_in_the_target_are_returned_as_is(fx):
+  df = _transactions(['2024-02-15'], ['USD'], [10.0])
+
+  assert convert_money(df, fx, 'usd') is df
+
+
+def test_unknown_currency_raises(fx):
+  from api.exceptions import DataFrameError
+
+  with pytest.raises(DataFrameError, match='JPY'):
+    convert_money(_transactions(['2024-02-15'], ['JPY'], [10.0]), fx, 'USD')
+
+
+def test_bundled_table_is_flagged_as_sample(tmp_path, monkeypatch):
+  monkeypatch.delenv('AIRBNB_ANALYZER_FX_RATES', raising=False)
+  assert load_fx_rates().sample
+  assert load_fx_rates(DEFAULT_FX_PATH).sample
+
+  own = tmp_path / 'rates.csv'
+  own.write_text('Date,Currency,Rate\n2024-01-01,PHP,56.0\n')
+  assert not load_fx_rates(str(own)).sample
+  monkeypatch.setenv('AIRBNB_ANALYZER_FX_RATES', str(own))
+  assert not load_fx_rates().sample
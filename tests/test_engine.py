@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from api.engine import customer_stats, listing_stats, merge_summaries, summarize
+
+
+def test_summarize_totals_match_column_sums(reservations):
+  summary = summarize(reservations)
+
+  assert summary.rows == len(reservations)
+  for col in ['Gross earnings', 'Service fee', 'Occupancy taxes', 'Nights']:
+    assert summary.totals[col] == pytest.approx(reservations[col].sum())
+    assert summary.totals[col + '_count'] == reservations[col].notna().sum()
+
+
+def test_listing_stats_match_groupby(reservations):
+  expected = reservations.groupby('Listing', observed=True).agg({
+    'Nights': ['sum', 'mean', 'max'],
+    'Amount': ['sum', 'mean', 'max'],
+    'Paid out': 'sum',
+    'Service fee': 'sum',
+    'Fast pay fee': 'sum',
+    'Cleaning fee': 'sum',
+    'Occupancy taxes': 'sum',
+    'Guest': ['nunique', 'count'],
+  })
+  expected.columns = ['_'.join(col) for col in expected.columns]
+
+  result = listing_stats(summarize(reservations))
+
+  assert list(result.index) == list(expected.index)
+  for col in expected.columns:
+    np.testing.assert_allclose(
+      result[col].to_numpy(dtype='float64'), expected[col].to_numpy(dtype='float64'), err_msg=col
+    )
+
+
+def test_customer_stats_match_groupby(reservations):
+  counts = reservations['Guest'].value_counts()
+  repeat = reservations[reservations['Guest'].isin(counts[counts > 1].index)]
+  grouped = repeat.groupby('Guest', observed=True)
+  expected = pd.DataFrame({
+    'Total Gross Earnings': grouped['Gross earnings'].sum(),
+    'Average Earnings per Booking': grouped['Gross earnings'].mean(),
+    'Bookings Executed': grouped['Confirmation code'].count(),
+    'Total Nights': grouped['Nights'].sum(),
+  }).sort_values('Total Gross Earnings', ascending=False, kind='stable')
+
+  result = customer_stats(summarize(reservations))
+
+  assert list(result.index) == list(expected.index)
+  np.testing.assert_allclose(result.to_numpy(dtype='float64'), expected.to_numpy(dtype='float64'))
+
+
+def test_customer_stats_top_is_prefix_of_full_ranking(reservations):
+  summary = summarize(reservations)
+
+  full = customer_stats(summary)
+  top = customer_stats(summary, top=3)
+
+  pd.testing.assert_frame_equal(top, full.head(3))
+
+
+def test_merged_summaries_match_summary_of_union(reservations):
+  half = len(reservations) // 2
+
+  merged = merge_summaries(summarize(reservations.iloc[:half]), summarize(reservations.iloc[half:]))
+  whole = summarize(reservations)
+
+  pd.testing.assert_frame_equal(listing_stats(merged), listing_stats(whole), check_dtype=False)
+  pd.testing.assert_frame_equal(customer_stats(merged), customer_stats(whole), check_dtype=False)
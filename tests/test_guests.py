@@ -0,0 +1,20 @@
+import pytest
+from api.AirBnB import AirBnB
+
+
+@pytest.mark.parametrize('n', [0, -1])
+def test_top_without_guests_is_empty(export, n):
+  report = AirBnB(export)
+
+  assert len(report.guests.top(n)) == 0
+  table = report.get_guest_stats(top=n)
+  assert table.empty
+  assert list(table.columns) == list(report.get_guest_stats().columns)
+
+
+def test_top_matches_sorted_lifetime_values(export):
+  report = AirBnB(export)
+  table = report.get_guest_stats()
+  expected = table.sort_values('Lifetime value', ascending=False, kind='stable').head(5)
+
+  assert list(report.get_guest_stats(top=5).index) == list(expected.index)
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+from api.AirBnB import AirBnB
+from api.occupancy import OccupancyGrid
+
+
+def _stays(rows) -> pd.DataFrame:
+  """Reservations from (listing, check-in, check-out, amount) tuples."""
+  listing, start, end, amount = zip(*rows)
+  start, end = pd.to_datetime(list(start)), pd.to_datetime(list(end))
+  return pd.DataFrame({
+    'Date': start,
+    'Type': 'Reservation',
+    'Confirmation code': [f'HM{i}' for i in range(len(rows))],
+    'Reference code': [f'ref{i}' for i in range(len(rows))],
+    'Booking date': start - pd.Timedelta(days=30),
+    'Start date': start,
+    'End date': end,
+    'Nights': (end - start).days,
+    'Guest': [f'Guest {i}' for i in range(len(rows))],
+    'Listing': list(listing),
+    'Amount': list(amount),
+    'Gross earnings': list(amount),
+    'Service fee': 0.0,
+    'Occupancy taxes': 0.0,
+  })
+
+
+@pytest.fixture
+def stays() -> pd.DataFrame:
+  return _stays([
+    # Nights of Jan 28 to Feb 3, checking out on Feb 4; the Loft earns 100 a night
+    ('Loft', '2024-01-28', '2024-02-04', 700.0),
+    ('Loft', '2024-02-10', '2024-02-12', 200.0),
+    ('Villa', '2024-02-01', '2024-02-02', 50.0),
+  ])
+
+
+@pytest.mark.parametrize('start, end, loft_nights', [
+  ('2024-02-01', '2024-02-03', 3),  # last nights of a stay begun before the window
+  ('2024-02-03', '2024-02-03', 1),  # single night window
+  ('2024-02-04', '2024-02-09', 0),  # check-out day is not a night
+  ('2024-01-27', '2024-01-28', 1),  # check-in day is
+  ('2024-02-11', '2024-02-20', 1),  # window past the last night
+  ('2024-01-01', '2024-03-31', 9),
+])
+def test_booked_nights_on_window_boundaries(stays, start, end, loft_nights):
+  result = OccupancyGrid(stays).stats(start, end)
+
+  available = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+  assert result.loc['Loft', 'Booked nights'] == loft_nights
+  assert result.loc['Loft', 'Available nights'] == available
+  assert result.loc['Loft', 'Occupancy rate'] == pytest.approx(loft_nights / available)
+  assert result.loc['Loft', 'Revenue'] == pytest.approx(100.0 * loft_nights)
+
+
+def test_default_window_spans_the_booked_nights(stays):
+  grid = OccupancyGrid(stays)
+
+  assert grid.first_day == pd.Timestamp('2024-01-28')
+  assert grid.last_day == pd.Timestamp('2024-02-11')
+  assert grid.stats().loc['Villa', 'Booked nights'] == 1
+
+
+def test_overlapping_stays_count_once_at_their_average_rate():
+  stays = _stays([
+    ('Loft', '2024-03-01', '2024-03-03', 200.0),
+    ('Loft', '2024-03-02', '2024-03-04', 400.0),
+  ])
+
+  result = OccupancyGrid(stays).stats('2024-03-01', '2024-03-03')
+
+  assert result.loc['Loft', 'Booked nights'] == 3
+  # Mar 1 at 100, Mar 2 at the average of 100 and 200, Mar 3 at 200
+  assert result.loc['Loft', 'Revenue'] == pytest.approx(450.0)
+  assert result.loc['Loft', 'ADR'] == pytest.approx(150.0)
+
+
+def test_stay_without_end_date_uses_nights():
+  stays = _stays([('Loft', '2024-03-01', '2024-03-04', 300.0)])
+  stays['End date'] = pd.NaT
+
+  assert OccupancyGrid(stays).stats('2024-03-01', '2024-03-31').loc['Loft', 'Booked nights'] == 3
+
+
+def test_date_range_keeps_stays_begun_before_it(stays):
+  report = AirBnB(stays)
+  report.set_date_range('2024-02-01', '2024-02-29')
+
+  result = report.get_occupancy_stats()
+
+  assert result.loc['Loft', 'Booked nights'] == 5
+  assert result.loc['Loft', 'Available nights'] == 29
+  assert result.loc['Loft', 'Revenue'] == pytest.approx(500.0)
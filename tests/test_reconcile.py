@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from api.reconcile import reconcile, split_transactions
+
+
+def _ledger(rows, references=True) -> pd.DataFrame:
+  """Ledger from (date, type, reference, amount, paid out) tuples, all in PHP."""
+  date, kind, reference, amount, paid_out = zip(*rows)
+  ledger = pd.DataFrame({
+    'Date': pd.to_datetime(list(date)),
+    'Type': list(kind),
+    'Confirmation code': [f'HM{i}' if t == 'Reservation' else None for i, t in enumerate(kind)],
+    'Reference code': list(reference),
+    'Currency': 'PHP',
+    'Amount': pd.array(amount, dtype='Float64'),
+    'Paid out': pd.array(paid_out, dtype='Float64'),
+  })
+  return ledger if references else ledger.drop(columns=['Reference code'])
+
+
+def _settled_on(result, date) -> list[str]:
+  items = result.items
+  return sorted(items.loc[items['Payout date'] == pd.Timestamp(date), 'Date'].dt.strftime('%m-%d'))
+
+
+def test_items_settle_in_the_payout_sharing_their_reference():
+  ledger = _ledger([
+    ('2024-01-01', 'Reservation', 'P2', 100.0, None),
+    ('2024-01-02', 'Reservation', 'P1', 50.0, None),
+    ('2024-01-03', 'Payout', 'P1', None, 50.0),
+    ('2024-01-05', 'Reservation', 'P2', 30.0, None),
+    ('2024-01-10', 'Payout', 'P2', None, 130.0),
+  ])
+
+  result = reconcile(ledger)
+
+  # The Jan 1 reservation is paid out on Jan 10, although a payout was issued on Jan 3
+  assert _settled_on(result, '2024-01-03') == ['01-02']
+  assert _settled_on(result, '2024-01-10') == ['01-01', '01-05']
+  assert result.settlements['Matched'].all()
+  assert result.summary()['unmatched_settlements'] == 0
+
+
+@pytest.mark.parametrize('references', [False, True])
+def test_items_without_reference_settle_in_the_next_payout(references):
+  ledger = _ledger([
+    ('2024-01-01', 'Reservation', None, 100.0, None),
+    ('2024-01-02', 'Resolution Adjustment', None, -20.0, None),
+    ('2024-01-03', 'Payout', 'P1', None, 80.0),
+    ('2024-01-03', 'Reservation', None, 40.0, None),
+    ('2024-01-08', 'Payout', 'P2', None, 45.0),
+    ('2024-01-09', 'Reservation', None, 60.0, None),
+  ], references=references)
+
+  result = reconcile(ledger)
+
+  assert _settled_on(result, '2024-01-03') == ['01-01', '01-02', '01-03']
+  assert _settled_on(result, '2024-01-08') == []
+  settlements = result.settlements.droplevel('Currency')
+  assert settlements.loc['2024-01-03', 'Expected'] == pytest.approx(120.0)
+  assert not settlements.loc['2024-01-03', 'Matched']
+  assert settlements.loc['2024-01-08', 'Items'] == 0
+  # Nothing has been paid out since the last reservation
+  assert list(result.pending()['Amount']) == [60.0]
+
+
+def test_reference_of_another_currency_falls_back_to_the_date():
+  ledger = _ledger([
+    ('2024-01-01', 'Reservation', 'P1', 100.0, None),
+    ('2024-01-02', 'Payout', 'P1', None, 100.0),
+    ('2024-01-04', 'Payout', 'P9', None, 5.0),
+  ])
+  ledger['Currency'] = ['USD', 'PHP', 'USD']
+
+  result = reconcile(ledger)
+
+  assert _settled_on(result, '2024-01-04') == ['01-01']
+
+
+def test_sample_export_keeps_references_after_compacting(export):
+  from api.compact import compact_frame
+
+  _, ledger = split_transactions(compact_frame(export))
+
+  assert 'Reference code' in ledger.columns
+  assert len(reconcile(ledger).items) == (export['Type'] != 'Payout').sum()